@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+DigiHome Access and Locks Concurrency Testing
+Edits two sections of one owner's access and locks data in parallel and
+verifies that neither edit overwrites the other, and that the defaults of
+a new document are applied only once
+"""
+
+import requests
+import uuid
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv('/app/frontend/.env')
+
+# Get backend URL from environment
+BACKEND_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://bolig-dashboard.preview.emergentagent.com')
+API_BASE = f"{BACKEND_URL}/api"
+
+PARALLEL_ROUNDS = 20
+
+print(f"Testing DigiHome Access and Locks Concurrency at: {API_BASE}")
+print("=" * 70)
+
+class TestResults:
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name):
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name, error):
+        self.failed += 1
+        self.errors.append(f"{test_name}: {error}")
+        print(f"❌ FAIL: {test_name} - {error}")
+
+    def summary(self):
+        print("\n" + "=" * 70)
+        print(f"CONCURRENCY TEST SUMMARY: {self.passed} passed, {self.failed} failed")
+        if self.errors:
+            print("\nFAILED TESTS:")
+            for error in self.errors:
+                print(f"  - {error}")
+        return self.failed == 0
+
+results = TestResults()
+
+def create_owner():
+    response = requests.post(f"{API_BASE}/owner-portal", json={
+        "address": "Storgata 15, 0155 Oslo, Norway",
+        "name": "Erik Nordahl",
+        "phone": "+47 987 65 432",
+        "email": f"erik.nordahl.{uuid.uuid4().hex[:12]}@example.no",
+        "password": "SikkertPassord123!"
+    })
+    if response.status_code != 200:
+        raise Exception(f"Create owner failed with status {response.status_code}: {response.text}")
+    return response.json()["id"]
+
+def update_section(owner_id, path, data):
+    response = requests.put(f"{API_BASE}/owners/{owner_id}/access-locks/{path}", json=data)
+    return response.status_code
+
+def get_access_locks(owner_id):
+    response = requests.get(f"{API_BASE}/owners/{owner_id}/access-locks")
+    if response.status_code != 200:
+        raise Exception(f"Get access locks failed with status {response.status_code}")
+    return response.json()
+
+def test_parallel_section_edits():
+    """
+    Test: parallel edits of two sections of a document that does not exist yet
+    1. Create an owner (no access and locks data stored)
+    2. Send PUTs to primary access and backup access in parallel
+    3. Verify both edits persist and untouched fields keep their defaults
+    """
+    try:
+        owner_id = create_owner()
+
+        edits = [
+            ("primary-access", {"location": "Hovedinngangsdør, 3. etg"}),
+            ("backup-access", {"key_location": "Safe hos nabo (Leil. 302)"})
+        ]
+        with ThreadPoolExecutor(max_workers=len(edits)) as pool:
+            status_codes = list(pool.map(lambda edit: update_section(owner_id, *edit), edits))
+
+        if any(code != 200 for code in status_codes):
+            results.add_fail("Parallel section edits", f"Status codes: {status_codes}")
+            return False
+        results.add_pass("Parallel edits of a new document accepted")
+
+        data = get_access_locks(owner_id)
+        primary = data.get("primary_access", {})
+        backup = data.get("backup_access", {})
+        if primary.get("location") != "Hovedinngangsdør, 3. etg" or backup.get("key_location") != "Safe hos nabo (Leil. 302)":
+            results.add_fail("Both edits persist", f"primary_access={primary}, backup_access={backup}")
+            return False
+        results.add_pass("Both edits persist")
+
+        if primary.get("bluetooth_enabled") is not False or "parking_info" not in data or "emergency_protocol" not in data:
+            results.add_fail("Defaults applied", f"Got {data}")
+            return False
+        results.add_pass("Defaults applied to untouched fields and sections")
+        return True
+    except Exception as e:
+        results.add_fail("Parallel section edits - Exception", f"Error: {str(e)}")
+        return False
+
+def test_repeated_parallel_edits():
+    """
+    Test: repeated parallel edits of different sections and fields
+    1. Send PUTs to parking info, navigation and two primary access fields in parallel, many times
+    2. Verify the last value of every field persists
+    3. Verify the document id and created_at were set once
+    """
+    try:
+        owner_id = create_owner()
+
+        update_section(owner_id, "room-walkthrough", {"rooms_documented": "7 rom (komplett)"})
+        first = get_access_locks(owner_id)
+
+        for round_number in range(PARALLEL_ROUNDS):
+            edits = [
+                ("parking", {"garage_spot": f"P-kjeller, plass #{round_number}"}),
+                ("navigation", {"door_code": f"{round_number:04d}"}),
+                ("primary-access", {"pin_code": f"{round_number:06d}"}),
+                ("primary-access", {"battery_type": f"AA x{round_number}"})
+            ]
+            with ThreadPoolExecutor(max_workers=len(edits)) as pool:
+                status_codes = list(pool.map(lambda edit: update_section(owner_id, *edit), edits))
+            if any(code != 200 for code in status_codes):
+                results.add_fail("Repeated parallel edits", f"Round {round_number} status codes: {status_codes}")
+                return False
+
+        last = PARALLEL_ROUNDS - 1
+        data = get_access_locks(owner_id)
+        expected = {
+            ("parking_info", "garage_spot"): f"P-kjeller, plass #{last}",
+            ("navigation_from_street", "door_code"): f"{last:04d}",
+            ("primary_access", "pin_code"): f"{last:06d}",
+            ("primary_access", "battery_type"): f"AA x{last}",
+            ("room_walkthrough", "rooms_documented"): "7 rom (komplett)"
+        }
+        lost = {f"{section}.{field}": data.get(section, {}).get(field)
+                for (section, field), value in expected.items() if data.get(section, {}).get(field) != value}
+        if lost:
+            results.add_fail("No lost section writes", f"Unexpected values: {lost}")
+            return False
+        results.add_pass(f"{PARALLEL_ROUNDS} rounds of parallel edits, no lost writes")
+
+        if data.get("id") != first.get("id") or data.get("created_at") != first.get("created_at"):
+            results.add_fail("Defaults set once", f"id/created_at changed: {first.get('id')} -> {data.get('id')}")
+            return False
+        results.add_pass("Document id and created_at set once")
+        return True
+    except Exception as e:
+        results.add_fail("Repeated parallel edits - Exception", f"Error: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    test_parallel_section_edits()
+    test_repeated_parallel_edits()
+    success = results.summary()
+    exit(0 if success else 1)
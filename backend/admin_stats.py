@@ -0,0 +1,161 @@
+"""
+Aggregated CRM statistics for the admin dashboard.
+
+The numbers come from Mongo aggregation pipelines, which scan the leads
+and owners collections, so the result is cached. Requests are answered
+from the cache. Writes that change the numbers call invalidate_stats().
+The next request then starts one background refresh and is still served
+the previous result. Only the first request after startup waits for the
+pipelines.
+
+The cache is per process. With several uvicorn workers, another worker's
+copy may lag a write by up to STATS_CACHE_TTL_SECONDS.
+"""
+from database import db
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+STATS_CACHE_TTL_SECONDS = float(os.environ.get('STATS_CACHE_TTL_SECONDS', '30'))
+TREND_WEEKS = int(os.environ.get('STATS_TREND_WEEKS', '12'))
+
+OWNER_STATUSES = ["Ringt", "Sendt tilbud", "Onboarding", "Kontrakt", "Lost"]
+LEAD_STATUSES = ["new", "contacted", "converted", "rejected"]
+
+
+def week_start(now: datetime) -> datetime:
+    """Monday 00:00 of the week containing now"""
+    return datetime(now.year, now.month, now.day) - timedelta(days=now.weekday())
+
+
+def weekly_trend_pipeline(since: datetime, extra_counts: dict = None) -> list:
+    counts = {"count": {"$sum": 1}}
+    counts.update(extra_counts or {})
+    return [
+        {"$match": {"created_at": {"$gte": since}}},
+        {"$group": {
+            # Monday 00:00 of the ISO week; unlike $dateTrunc this also runs on MongoDB < 5.0
+            "_id": {"$dateFromParts": {
+                "isoWeekYear": {"$isoWeekYear": "$created_at"},
+                "isoWeek": {"$isoWeek": "$created_at"},
+                "isoDayOfWeek": 1
+            }},
+            **counts
+        }},
+        {"$sort": {"_id": 1}}
+    ]
+
+
+def status_counts_pipeline() -> list:
+    return [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
+
+
+async def compute_stats() -> dict:
+    """Run every pipeline concurrently and shape the result"""
+    now = datetime.utcnow()
+    since = week_start(now) - timedelta(weeks=TREND_WEEKS - 1)
+    converted = {"converted": {"$sum": {"$cond": [{"$eq": ["$status", "converted"]}, 1, 0]}}}
+
+    lead_statuses, owner_statuses, lead_weeks, owner_weeks, linked_owners = await asyncio.gather(
+        db.leads.aggregate(status_counts_pipeline()).to_list(None),
+        db.owners.aggregate(status_counts_pipeline()).to_list(None),
+        db.leads.aggregate(weekly_trend_pipeline(since, converted)).to_list(None),
+        db.owners.aggregate(weekly_trend_pipeline(since)).to_list(None),
+        db.owners.count_documents({"lead_id": {"$ne": None}})
+    )
+
+    leads_by_status = {status: 0 for status in LEAD_STATUSES}
+    for row in lead_statuses:
+        status = row["_id"] or "new"
+        leads_by_status[status] = leads_by_status.get(status, 0) + row["count"]
+
+    owners_by_status = {status: 0 for status in OWNER_STATUSES}
+    for row in owner_statuses:
+        # Owners created before statuses existed count as "Ringt"
+        status = row["_id"] or "Ringt"
+        owners_by_status[status] = owners_by_status.get(status, 0) + row["count"]
+
+    total_leads = sum(leads_by_status.values())
+    total_owners = sum(owners_by_status.values())
+
+    weeks = {}
+    for i in range(TREND_WEEKS):
+        start = since + timedelta(weeks=i)
+        weeks[start] = {"week_start": start, "leads": 0, "converted_leads": 0, "owners": 0}
+    for row in lead_weeks:
+        if row["_id"] in weeks:
+            weeks[row["_id"]].update(leads=row["count"], converted_leads=row["converted"])
+    for row in owner_weeks:
+        if row["_id"] in weeks:
+            weeks[row["_id"]]["owners"] = row["count"]
+    for week in weeks.values():
+        week["conversion_rate"] = week["converted_leads"] / week["leads"] if week["leads"] else 0.0
+
+    return {
+        "leads": {"total": total_leads, "by_status": leads_by_status},
+        "owners": {"total": total_owners, "by_status": owners_by_status, "from_leads": linked_owners},
+        "conversion": {
+            "lead_to_owner_rate": leads_by_status.get("converted", 0) / total_leads if total_leads else 0.0,
+            "signed_rate": owners_by_status["Kontrakt"] / total_owners if total_owners else 0.0
+        },
+        "weekly": list(weeks.values()),
+        "computed_at": now
+    }
+
+
+class StatsCache:
+    """
+    Holds the last computed stats. Serves them while they are fresh,
+    and serves them stale while a single background refresh runs.
+    """
+
+    def __init__(self, compute, ttl: float):
+        self.compute = compute
+        self.ttl = ttl
+        self.value = None
+        self.computed_at = 0.0
+        self.stale = True
+        self.refresh_task = None
+
+    def invalidate(self):
+        self.stale = True
+
+    def is_fresh(self) -> bool:
+        return not self.stale and time.monotonic() - self.computed_at < self.ttl
+
+    async def refresh(self):
+        # Writes that land while the pipelines run mark the result stale again
+        self.stale = False
+        started = time.monotonic()
+        try:
+            value = await self.compute()
+        except Exception as e:
+            self.stale = True
+            if self.value is None:
+                raise
+            logger.error(f"Stats refresh failed, serving previous result: {str(e)}")
+            return self.value
+        self.value = value
+        self.computed_at = started
+        return value
+
+    async def get(self):
+        if self.value is not None and self.is_fresh():
+            return self.value
+        if self.refresh_task is None or self.refresh_task.done():
+            self.refresh_task = asyncio.create_task(self.refresh())
+        if self.value is None:
+            return await asyncio.shield(self.refresh_task)
+        return self.value
+
+
+stats_cache = StatsCache(compute_stats, STATS_CACHE_TTL_SECONDS)
+
+
+def invalidate_stats():
+    """Called by handlers after writes that change the stats"""
+    stats_cache.invalidate()
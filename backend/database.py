@@ -0,0 +1,69 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MongoManager:
+    """
+    Owns the single MongoDB client (and connection pool) for this process.
+    Opened and closed by the app lifespan in server.py.
+    """
+
+    def __init__(self):
+        self.client = None
+        self.db = None
+
+    async def connect(self):
+        mongo_url = os.environ['MONGO_URL']
+        max_pool_size = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+        min_pool_size = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+
+        self.client = AsyncIOMotorClient(
+            mongo_url,
+            maxPoolSize=max_pool_size,
+            minPoolSize=min_pool_size,
+            maxIdleTimeMS=int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '300000')),
+            serverSelectionTimeoutMS=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+        )
+        self.db = self.client[os.environ.get('DB_NAME', 'digihome')]
+
+        # Warm up the pool so the first requests don't pay for connection setup.
+        # Concurrent pings force the driver to open min_pool_size sockets now.
+        warmup = max(min_pool_size, 1)
+        await asyncio.gather(*(self.client.admin.command('ping') for _ in range(warmup)))
+        logger.info(f"MongoDB connected (maxPoolSize={max_pool_size}, minPoolSize={min_pool_size})")
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+            logger.info("MongoDB connection closed")
+        self.client = None
+        self.db = None
+
+
+mongo = MongoManager()
+
+
+class _Database:
+    """
+    Stand-in for the motor database that routers import at module level.
+    Resolves collections against the client opened in the app lifespan.
+    """
+
+    def _resolve(self):
+        if mongo.db is None:
+            raise RuntimeError("MongoDB is not connected; start the app lifespan first")
+        return mongo.db
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __getitem__(self, name):
+        return self._resolve()[name]
+
+
+db = _Database()
+
@@ -0,0 +1,95 @@
+"""
+Streaming exports of the CRM collections as NDJSON or CSV.
+
+Documents are read from a MongoDB cursor in batches of EXPORT_BATCH_SIZE
+and written to the response as they arrive. The response is sent with
+backpressure (the next batch is only read once the previous chunk has
+been sent), so memory stays constant whatever the number of rows.
+
+NDJSON lines are rendered with orjson, like the JSON endpoints. CSV has one
+column per selected field (all model fields by default). Nested values
+(objects, lists) are written as JSON in a single cell.
+"""
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from responses import default
+from datetime import datetime
+from typing import Optional
+import csv
+import io
+import orjson
+import os
+
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '1000'))
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def export_columns(fields: Optional[list], model, sensitive=()) -> list:
+    """CSV columns: id plus the selected fields, or every model field except sensitive ones"""
+    if fields:
+        return ["id", *[name for name in fields if name != "id"]]
+    return [name for name in model.model_fields if name not in sensitive]
+
+
+def cell(doc: dict, path: str):
+    value = doc
+    for part in path.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value, default=default).decode()
+    return value
+
+
+async def ndjson_chunks(cursor):
+    chunk = bytearray()
+    rows = 0
+    async for doc in cursor:
+        chunk += orjson.dumps(doc, default=default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+        rows += 1
+        if rows == EXPORT_BATCH_SIZE:
+            yield bytes(chunk)
+            chunk.clear()
+            rows = 0
+    if chunk:
+        yield bytes(chunk)
+
+
+async def csv_chunks(cursor, columns: list):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    rows = 0
+    async for doc in cursor:
+        writer.writerow([cell(doc, column) for column in columns])
+        rows += 1
+        if rows == EXPORT_BATCH_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def export_response(collection, query: dict, selected: dict, sort: list, file_format: str,
+                    columns: list, name: str) -> StreamingResponse:
+    """Stream every document matching query in the given format (ndjson or csv)"""
+    if file_format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Invalid format. Must be one of: {list(MEDIA_TYPES)}")
+
+    cursor = collection.find(query, selected).sort(sort).batch_size(EXPORT_BATCH_SIZE)
+    chunks = ndjson_chunks(cursor) if file_format == "ndjson" else csv_chunks(cursor, columns)
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{file_format}"
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
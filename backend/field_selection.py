@@ -0,0 +1,75 @@
+"""
+Sparse fieldsets for read endpoints: ?fields=name,email,onboarding_data.city
+
+Field names are checked against the model and turned into a MongoDB
+projection, so unrequested fields are neither decoded nor sent. id is
+always included. Sensitive fields (e.g. password_hash) can never be
+selected and are excluded in the projection when no fields are given.
+"""
+from fastapi import HTTPException
+from typing import Optional
+
+SENSITIVE_FIELDS = {
+    "owners": ("password_hash",),
+}
+
+
+def parse_fields(fields: Optional[str], model, sensitive=()) -> Optional[list]:
+    """
+    Split and validate a fields parameter. Returns None when all fields are wanted.
+    Paths nested in an already selected field are dropped (MongoDB rejects path collisions).
+    """
+    if fields is None:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    if not names:
+        return None
+
+    allowed = set(model.model_fields) - set(sensitive)
+    invalid = [name for name in names if name.split(".")[0] not in allowed]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {invalid}")
+
+    selected = []
+    for name in sorted(set(names), key=len):
+        if not any(name.startswith(parent + ".") for parent in selected):
+            selected.append(name)
+    return selected
+
+
+def projection(fields: Optional[list], sensitive=()) -> dict:
+    """MongoDB projection for parsed fields (None: everything except sensitive fields)"""
+    if fields:
+        result = {"_id": 0, "id": 1}
+        result.update({name: 1 for name in fields if name != "id"})
+        return result
+    result = {"_id": 0}
+    result.update({name: 0 for name in sensitive})
+    return result
+
+
+def select_fields(doc: dict, fields: Optional[list]) -> dict:
+    """Apply the same selection to a document built in Python (e.g. a virtual default)"""
+    if not fields:
+        return doc
+    result = {}
+    for name in ["id", *fields]:
+        _copy_path(doc, result, name.split("."))
+    return result
+
+
+def _copy_path(source: dict, target: dict, parts: list):
+    key = parts[0]
+    if key not in source:
+        return
+    value = source[key]
+    if len(parts) == 1:
+        target[key] = value
+    elif isinstance(value, dict):
+        _copy_path(value, target.setdefault(key, {}), parts[1:])
+    elif isinstance(value, list):
+        # Like MongoDB, select the sub-path in every embedded document
+        items = target.setdefault(key, [{} for _ in value])
+        for item, selected in zip(value, items):
+            if isinstance(item, dict):
+                _copy_path(item, selected, parts[1:])
@@ -0,0 +1,115 @@
+"""
+Resized, re-encoded derivatives (thumbnail, medium, full) of uploaded images.
+
+Resizing runs in a process pool so it never competes with request
+handling for the event loop or the GIL. Upload handlers enqueue it as a
+persistent job (see jobs.py), which a job worker runs after the response
+is sent. Derivatives go into the content-addressed upload store like any
+other upload.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from starlette.concurrency import run_in_threadpool
+from pathlib import Path
+from uuid import uuid4
+from uploads import STAGING_DIR, UPLOAD_DIR, release_upload, store_blob
+import asyncio
+import hashlib
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels for each derivative
+DERIVATIVE_SIZES = {
+    "thumbnail": 320,
+    "medium": 1280,
+    "full": 2560,
+}
+JPEG_QUALITY = int(os.environ.get('IMAGE_DERIVATIVE_QUALITY', '82'))
+IMAGE_WORKERS = int(os.environ.get('IMAGE_DERIVATIVE_WORKERS', '2'))
+
+_pool = None
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def render_derivatives(source_path: str, staging_dir: str):
+    """
+    Runs in a worker process. Writes one JPEG per derivative size and
+    returns [(size_name, path, sha256, byte_count)].
+    """
+    from PIL import Image, ImageOps
+
+    results = []
+    path = None
+    try:
+        with Image.open(source_path) as source:
+            image = ImageOps.exif_transpose(source).convert("RGB")
+            for size_name, max_edge in DERIVATIVE_SIZES.items():
+                derivative = image.copy()
+                derivative.thumbnail((max_edge, max_edge), Image.LANCZOS)
+                path = os.path.join(staging_dir, f"{uuid4()}.derivative")
+                derivative.save(path, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+                with open(path, "rb") as f:
+                    data = f.read()
+                results.append((size_name, path, hashlib.sha256(data).hexdigest(), len(data)))
+    except BaseException:
+        # Don't leave the sizes rendered so far (or a half-written one) in staging
+        for written in [result[1] for result in results] + [path]:
+            if written and os.path.exists(written):
+                os.remove(written)
+        raise
+    return results
+
+
+async def create_derivatives(image_url: str):
+    """
+    Generate and store the derivatives of an uploaded image.
+    Returns {size_name: url}, or None if the image could not be processed.
+    """
+    source_path = UPLOAD_DIR / image_url[len("/uploads/"):]
+    loop = asyncio.get_running_loop()
+    try:
+        rendered = await loop.run_in_executor(get_pool(), render_derivatives, str(source_path), str(STAGING_DIR))
+    except Exception as e:
+        logger.warning(f"Could not create derivatives for {image_url}: {str(e)}")
+        return None
+
+    derivatives = {}
+    try:
+        for size_name, path, sha256, byte_count in rendered:
+            stored = await store_blob(path, sha256, byte_count, "jpg")
+            derivatives[size_name] = stored.url
+    except BaseException:
+        await release_derivatives(derivatives)
+        raise
+    finally:
+        # Stored files were moved into the store; remove the ones that were not
+        for _, path, _, _ in rendered:
+            await run_in_threadpool(Path(path).unlink, True)
+    return derivatives
+
+
+async def release_derivatives(derivatives: dict):
+    """Drop the references create_derivatives() took"""
+    for url in derivatives.values():
+        await release_upload(url)
+
+
+def pick_size(url: str, derivatives, size: str = None):
+    """Return the derivative URL for size when available, else the original"""
+    if size and derivatives and size in derivatives:
+        return derivatives[size]
+    return url
@@ -0,0 +1,263 @@
+"""
+Declarative index registry for every collection the routers query.
+
+Indexes are applied idempotently at startup (see server.py) or from the
+command line:
+
+    python indexes.py                          # create missing indexes, rebuild changed ones
+    python indexes.py --verify                 # fail if a route query shape does a COLLSCAN
+    python indexes.py --merge-duplicate-leads  # merge leads sharing an email first
+
+Startup only creates missing indexes. An existing index whose options
+differ from the registry (e.g. leads.email before it became unique) is
+reported there and dropped and rebuilt only from the command line, so
+concurrent workers never drop each other's indexes. The app refuses to
+start while a REQUIRED index is missing; if duplicate lead emails block
+the unique index, merge them with --merge-duplicate-leads.
+"""
+from pymongo import ASCENDING, DESCENDING, TEXT
+from pymongo.errors import PyMongoError
+import asyncio
+import sys
+
+# Fields covered by the admin free-text search
+SEARCH_KEYS = [("name", TEXT), ("email", TEXT), ("phone", TEXT), ("address", TEXT)]
+
+# (collection, keys, options)
+INDEXES = [
+    ("owners", [("id", ASCENDING)], {"unique": True}),
+    ("owners", [("email", ASCENDING)], {"unique": True}),
+    ("leads", [("id", ASCENDING)], {"unique": True}),
+    ("leads", [("email", ASCENDING)], {"unique": True}),
+    ("leads", [("created_at", DESCENDING), ("id", DESCENDING)], {}),
+    ("owners", [("created_at", DESCENDING), ("id", DESCENDING)], {}),
+    # Admin list filters, sorts and search
+    ("leads", [("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], {}),
+    ("owners", [("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], {}),
+    ("leads", [("name", ASCENDING), ("id", ASCENDING)], {}),
+    ("owners", [("name", ASCENDING), ("id", ASCENDING)], {}),
+    ("leads", SEARCH_KEYS, {"default_language": "none"}),
+    ("owners", SEARCH_KEYS, {"default_language": "none"}),
+    # Prefix search (name and email use the indexes above)
+    ("leads", [("phone", ASCENDING)], {}),
+    ("owners", [("phone", ASCENDING)], {}),
+    # One section document per owner
+    ("property_documentation", [("owner_id", ASCENDING)], {"unique": True}),
+    ("access_and_locks", [("owner_id", ASCENDING)], {"unique": True}),
+    ("floor_plans", [("owner_id", ASCENDING)], {"unique": True}),
+    ("furniture_equipment", [("owner_id", ASCENDING)], {"unique": True}),
+    # Many partners per owner
+    ("partners", [("owner_id", ASCENDING), ("id", ASCENDING)], {"unique": True}),
+    # Owner status transitions
+    ("owner_status_history", [("owner_id", ASCENDING), ("changed_at", ASCENDING)], {}),
+    # Upload blobs awaiting garbage collection
+    ("upload_blobs", [("zero_since", ASCENDING)], {}),
+    # Resumable upload sessions
+    ("upload_sessions", [("id", ASCENDING)], {"unique": True}),
+    ("upload_sessions", [("expires_at", ASCENDING)], {}),
+    # Background jobs; finished jobs expire after a week
+    ("jobs", [("id", ASCENDING)], {"unique": True}),
+    ("jobs", [("status", ASCENDING), ("run_at", ASCENDING)], {}),
+    ("jobs", [("status", ASCENDING), ("locked_until", ASCENDING)], {}),
+    ("jobs", [("finished_at", ASCENDING)], {"expireAfterSeconds": 7 * 24 * 3600}),
+]
+
+# Indexes the app cannot run without: (collection, index name)
+REQUIRED = {
+    # Lead submission is an upsert on email; without it concurrent submissions duplicate
+    ("leads", "email_1"),
+}
+
+# Query shapes issued by the routers, checked by --verify: (collection, filter[, sort])
+QUERY_SHAPES = [
+    ("owners", {"id": "x"}),
+    ("owners", {"email": "x"}),
+    ("leads", {"id": "x"}),
+    ("leads", {"email": "x"}),
+    ("leads", {}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("leads", {"created_at": {"$lt": "x"}}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("owners", {}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("leads", {"status": "x"}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("owners", {"status": "x"}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("leads", {}, [("name", ASCENDING), ("id", ASCENDING)]),
+    ("owners", {}, [("name", ASCENDING), ("id", ASCENDING)]),
+    ("leads", {"$text": {"$search": "x"}}),
+    ("owners", {"$text": {"$search": "x"}}),
+    ("leads", {"$or": [{"$text": {"$search": "x"}}, {"name": {"$regex": "^x"}},
+                       {"email": {"$regex": "^x"}}, {"phone": {"$regex": "^x"}}]}),
+    ("owners", {"$or": [{"$text": {"$search": "x"}}, {"name": {"$regex": "^x"}},
+                        {"email": {"$regex": "^x"}}, {"phone": {"$regex": "^x"}}]}),
+    ("leads", {"created_at": {"$gte": "x"}}),
+    ("owners", {"created_at": {"$gte": "x"}}),
+    ("property_documentation", {"owner_id": "x"}),
+    ("access_and_locks", {"owner_id": "x"}),
+    ("floor_plans", {"owner_id": "x"}),
+    ("furniture_equipment", {"owner_id": "x"}),
+    ("partners", {"owner_id": "x"}),
+    ("partners", {"id": "x", "owner_id": "x"}),
+    ("owner_status_history", {"owner_id": "x"}, [("changed_at", ASCENDING)]),
+    ("upload_blobs", {"zero_since": {"$lte": "x"}}),
+    ("upload_sessions", {"id": "x", "owner_id": "x"}),
+    ("upload_sessions", {"expires_at": {"$lt": "x"}}),
+    ("jobs", {"status": "queued", "run_at": {"$lte": "x"}}),
+    ("jobs", {"status": "running", "locked_until": {"$lte": "x"}}),
+]
+
+
+def index_name(keys):
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+def options_differ(info: dict, options: dict) -> bool:
+    """Compare an index_information() entry with registry options"""
+    wanted = {"unique": False, **options}
+    return any(info.get(key, False if key == "unique" else None) != value for key, value in wanted.items())
+
+
+async def merge_duplicate_leads(db) -> int:
+    """
+    Merge leads that share an email into the oldest one, so the unique
+    email index can be built. Deletes leads: run it from the command line
+    only, with the app stopped. The kept lead keeps its id and created_at,
+    takes the contact details of the latest submission, is "converted" if
+    any duplicate was, and collects their notes. Owners linked to a removed
+    duplicate are re-linked. Returns the number of leads removed.
+    """
+    removed = 0
+    duplicates = db.leads.aggregate([
+        {"$group": {"_id": "$email", "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ], allowDiskUse=True)
+    async for group in duplicates:
+        leads = await db.leads.find({"email": group["_id"]}, {"_id": 0}).sort(
+            [("created_at", ASCENDING), ("id", ASCENDING)]
+        ).to_list(None)
+        keep, latest = leads[0], leads[-1]
+        duplicate_ids = [lead["id"] for lead in leads[1:]]
+
+        update = {field: latest[field] for field in ("address", "name", "phone") if latest.get(field)}
+        if any(lead.get("status") == "converted" for lead in leads):
+            update["status"] = "converted"
+        notes = list(dict.fromkeys(lead["notes"] for lead in leads if lead.get("notes")))
+        if notes:
+            update["notes"] = "\n\n".join(notes)
+
+        await db.leads.update_one({"id": keep["id"]}, {"$set": update})
+        await db.owners.update_many({"lead_id": {"$in": duplicate_ids}}, {"$set": {"lead_id": keep["id"]}})
+        result = await db.leads.delete_many({"id": {"$in": duplicate_ids}})
+        removed += result.deleted_count
+
+    return removed
+
+
+async def ensure_indexes(db, rebuild=False):
+    """
+    Create every registered index that is missing. An index whose options
+    changed is dropped and rebuilt with rebuild=True, otherwise reported.
+    Returns a list of error messages for indexes that could not be built.
+    """
+    errors = []
+    existing = {}
+    for collection, keys, options in INDEXES:
+        name = index_name(keys)
+        try:
+            if collection not in existing:
+                existing[collection] = await db[collection].index_information()
+            info = existing[collection].get(name)
+            if info is not None and not options_differ(info, options):
+                continue
+
+            if info is not None:
+                if not rebuild:
+                    errors.append(f"{collection}.{name}: options differ, rebuild with python indexes.py")
+                    continue
+                # create_index would fail with an options conflict under the same name
+                await db[collection].drop_index(name)
+            await db[collection].create_index(keys, name=name, **options)
+        except PyMongoError as e:
+            errors.append(f"{collection}.{name}: {str(e)}")
+    return errors
+
+
+async def missing_required_indexes(db) -> list:
+    """REQUIRED indexes that are absent or have the wrong options"""
+    missing = []
+    for collection, keys, options in INDEXES:
+        name = index_name(keys)
+        if (collection, name) not in REQUIRED:
+            continue
+        info = (await db[collection].index_information()).get(name)
+        if info is None or options_differ(info, options):
+            missing.append(f"{collection}.{name}")
+    return missing
+
+
+def _stages(plan):
+    """Yield every stage name in an explain() plan tree"""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _stages(value)
+
+
+async def verify_indexes(db):
+    """
+    Run explain() on each registered query shape. Returns a list of shapes
+    whose winning plan falls back to a collection scan.
+    """
+    failures = []
+    for collection, query, *sort in QUERY_SHAPES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort[0])
+        explain = await cursor.explain()
+        winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in _stages(winning_plan):
+            failures.append(f"{collection} {query}")
+    return failures
+
+
+async def main(verify=False, merge_leads=False):
+    from database import mongo
+
+    await mongo.connect()
+    try:
+        if merge_leads:
+            print(f"✅ Merged {await merge_duplicate_leads(mongo.db)} duplicate leads")
+
+        errors = await ensure_indexes(mongo.db, rebuild=True)
+        for error in errors:
+            print(f"❌ Index build failed: {error}")
+        if not errors:
+            print(f"✅ {len(INDEXES)} indexes in place")
+        for missing in await missing_required_indexes(mongo.db):
+            print(f"❌ Required index missing: {missing}")
+            errors.append(missing)
+
+        if verify:
+            failures = await verify_indexes(mongo.db)
+            for failure in failures:
+                print(f"❌ COLLSCAN: {failure}")
+            if not failures:
+                print(f"✅ {len(QUERY_SHAPES)} query shapes use an index")
+            errors = errors + failures
+
+        return not errors
+    finally:
+        mongo.close()
+
+
+if __name__ == "__main__":
+    from pathlib import Path
+    from dotenv import load_dotenv
+
+    load_dotenv(Path(__file__).parent / '.env')
+    success = asyncio.run(main(
+        verify="--verify" in sys.argv[1:],
+        merge_leads="--merge-duplicate-leads" in sys.argv[1:]
+    ))
+    sys.exit(0 if success else 1)
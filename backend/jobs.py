@@ -0,0 +1,249 @@
+"""
+Persistent background jobs backed by the `jobs` collection.
+
+Routes enqueue work that should not delay the response (notifications,
+media processing, cleanup). Workers claim jobs atomically with
+findOneAndUpdate, so any number of uvicorn workers or standalone worker
+processes can share the queue without double-processing. A claimed job is
+invisible to other workers until its visibility timeout expires. The
+worker extends the timeout while the handler runs, so it only expires
+when the worker dies or stalls. The job is then claimed again, so
+delivery is at-least-once. Failed jobs are retried with exponential backoff.
+A job is marked failed after max_attempts, whether its handler raised,
+ran longer than JOB_MAX_RUNTIME_SECONDS or took its worker down.
+
+Workers run either inline in the API process (JOB_WORKER_INLINE, started
+by the app lifespan) or standalone, optionally as several processes:
+
+    python jobs.py --processes 4 --concurrency 8
+"""
+from pymongo import ReturnDocument
+from database import db
+from datetime import datetime, timedelta
+from uuid import uuid4
+import asyncio
+import logging
+import os
+import socket
+
+logger = logging.getLogger(__name__)
+
+JOB_CONCURRENCY = int(os.environ.get('JOB_CONCURRENCY', '4'))
+POLL_INTERVAL_SECONDS = float(os.environ.get('JOB_POLL_INTERVAL_SECONDS', '1'))
+DEFAULT_VISIBILITY_TIMEOUT = timedelta(seconds=int(os.environ.get('JOB_VISIBILITY_TIMEOUT_SECONDS', '300')))
+DEFAULT_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '5'))
+MAX_RUNTIME_SECONDS = float(os.environ.get('JOB_MAX_RUNTIME_SECONDS', '3600'))
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 3600
+
+# job type -> (handler, visibility timeout)
+HANDLERS = {}
+
+
+def job_handler(job_type: str, visibility_timeout: timedelta = DEFAULT_VISIBILITY_TIMEOUT):
+    """
+    Register an async function as the handler for job_type.
+    It is called with the job payload as keyword arguments.
+    """
+    def register(func):
+        HANDLERS[job_type] = (func, visibility_timeout)
+        return func
+    return register
+
+
+async def enqueue(job_type: str, payload: dict = None, delay_seconds: float = 0, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+    """Add a job to the queue and return its id"""
+    now = datetime.utcnow()
+    _, visibility_timeout = HANDLERS.get(job_type, (None, DEFAULT_VISIBILITY_TIMEOUT))
+    job = {
+        "id": str(uuid4()),
+        "type": job_type,
+        "payload": payload or {},
+        "status": "queued",
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "visibility_timeout_ms": int(visibility_timeout.total_seconds() * 1000),
+        "run_at": now + timedelta(seconds=delay_seconds),
+        "locked_until": None,
+        "locked_by": None,
+        "last_error": None,
+        "created_at": now,
+        "updated_at": now,
+        "finished_at": None
+    }
+    await db.jobs.insert_one(job)
+    return job["id"]
+
+
+async def claim_job(worker_id: str):
+    """
+    Atomically take the next due job: a queued job whose run_at has passed,
+    or a running job whose worker let the visibility timeout expire.
+    """
+    now = datetime.utcnow()
+    job = await db.jobs.find_one_and_update(
+        {
+            "type": {"$in": list(HANDLERS)},
+            "$or": [
+                {"status": "queued", "run_at": {"$lte": now}},
+                {
+                    "status": "running",
+                    "locked_until": {"$lte": now},
+                    "$expr": {"$lt": ["$attempts", "$max_attempts"]}
+                }
+            ]
+        },
+        [{"$set": {
+            "status": "running",
+            "locked_by": worker_id,
+            "locked_until": {"$add": [now, "$visibility_timeout_ms"]},
+            "attempts": {"$add": ["$attempts", 1]},
+            "updated_at": now
+        }}],
+        sort=[("run_at", 1)],
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    return job
+
+
+async def fail_abandoned_jobs() -> int:
+    """
+    Mark failed the running jobs whose visibility timeout expired on their
+    last attempt (the worker died or stalled every time)
+    """
+    now = datetime.utcnow()
+    result = await db.jobs.update_many(
+        {
+            "status": "running",
+            "locked_until": {"$lte": now},
+            "$expr": {"$gte": ["$attempts", "$max_attempts"]}
+        },
+        {"$set": {
+            "status": "failed",
+            "locked_until": None,
+            "locked_by": None,
+            "last_error": "Visibility timeout expired on the last attempt",
+            "finished_at": now,
+            "updated_at": now
+        }}
+    )
+    if result.modified_count:
+        logger.error(f"{result.modified_count} abandoned jobs failed permanently")
+    return result.modified_count
+
+
+async def keep_claim(job: dict, worker_id: str):
+    """Extend the job's visibility timeout while its handler runs"""
+    visibility_timeout = timedelta(milliseconds=job["visibility_timeout_ms"])
+    while True:
+        await asyncio.sleep(visibility_timeout.total_seconds() / 3)
+        now = datetime.utcnow()
+        try:
+            await db.jobs.update_one(
+                {"id": job["id"], "locked_by": worker_id, "status": "running"},
+                {"$set": {"locked_until": now + visibility_timeout, "updated_at": now}}
+            )
+        except Exception as e:
+            logger.warning(f"Could not extend job {job['id']}: {str(e)}")
+
+
+async def run_job(job: dict, worker_id: str):
+    handler, _ = HANDLERS[job["type"]]
+    heartbeat = asyncio.create_task(keep_claim(job, worker_id))
+    try:
+        await asyncio.wait_for(handler(**job["payload"]), MAX_RUNTIME_SECONDS)
+    except Exception as e:
+        now = datetime.utcnow()
+        error = f"Handler ran longer than {MAX_RUNTIME_SECONDS:.0f}s" if isinstance(e, asyncio.TimeoutError) else str(e)
+        if job["attempts"] >= job["max_attempts"]:
+            update = {"status": "failed", "finished_at": now}
+            logger.error(f"Job {job['type']} {job['id']} failed permanently: {error}")
+        else:
+            backoff = min(BACKOFF_BASE_SECONDS * 2 ** (job["attempts"] - 1), BACKOFF_MAX_SECONDS)
+            update = {"status": "queued", "run_at": now + timedelta(seconds=backoff)}
+            logger.warning(f"Job {job['type']} {job['id']} failed, retrying in {backoff}s: {error}")
+        update.update({"locked_until": None, "locked_by": None, "last_error": error, "updated_at": now})
+    else:
+        now = datetime.utcnow()
+        update = {"status": "done", "locked_until": None, "finished_at": now, "updated_at": now}
+    finally:
+        heartbeat.cancel()
+
+    # Only the worker holding the claim records the outcome
+    await db.jobs.update_one({"id": job["id"], "locked_by": worker_id}, {"$set": update})
+
+
+class JobWorker:
+    """Runs `concurrency` claim/execute loops on the current event loop"""
+
+    def __init__(self, concurrency: int = JOB_CONCURRENCY):
+        self.concurrency = concurrency
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.tasks = []
+
+    async def loop(self):
+        while True:
+            try:
+                job = await claim_job(self.worker_id)
+                if job is None:
+                    await fail_abandoned_jobs()
+                    await asyncio.sleep(POLL_INTERVAL_SECONDS)
+                    continue
+                await run_job(job, self.worker_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker error: {str(e)}")
+                await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+    def start(self):
+        self.tasks = [asyncio.create_task(self.loop()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+
+def run_standalone_worker(concurrency: int):
+    """Entry point for one standalone worker process"""
+    from database import mongo
+    import server  # noqa: F401 - registers every route's job handlers
+    import jobs  # the registry lives in the imported module, not in __main__
+
+    async def main():
+        await mongo.connect()
+        worker = jobs.JobWorker(concurrency)
+        worker.start()
+        try:
+            await asyncio.gather(*worker.tasks)
+        finally:
+            await worker.stop()
+            mongo.close()
+
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    import argparse
+    from multiprocessing import Process
+    from pathlib import Path
+    from dotenv import load_dotenv
+
+    load_dotenv(Path(__file__).parent / '.env')
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get('JOB_CONCURRENCY', JOB_CONCURRENCY)))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.processes == 1:
+        run_standalone_worker(args.concurrency)
+    else:
+        processes = [Process(target=run_standalone_worker, args=(args.concurrency,)) for _ in range(args.processes)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
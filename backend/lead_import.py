@@ -0,0 +1,225 @@
+"""
+Streaming bulk import of leads from CSV or NDJSON.
+
+The request body is read chunk by chunk and parsed line by line, so
+memory stays bounded whatever the file size. Each row is validated
+against LeadCreate. Valid rows are upserted by email in bulk_write
+batches. While one batch is being written, the next one is parsed.
+Invalid rows and rejected writes are reported with their row number; the
+error list is capped, the error count is not.
+"""
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from pydantic import ValidationError
+from fastapi import HTTPException
+from database import db
+from models.lead import Lead, LeadCreate
+import asyncio
+import codecs
+import csv
+import json
+import os
+
+IMPORT_BATCH_SIZE = int(os.environ.get('LEAD_IMPORT_BATCH_SIZE', '1000'))
+MAX_LINE_LENGTH = 64 * 1024
+MAX_REPORTED_ERRORS = 1000
+
+FORMATS = ("csv", "ndjson")
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+def detect_format(content_type: str):
+    return CONTENT_TYPES.get((content_type or "").split(";")[0].strip().lower())
+
+
+async def iter_lines(stream):
+    """Decode an async byte stream into lines (UTF-8, optional BOM)"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in stream:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+        if len(buffer) > MAX_LINE_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Line longer than {MAX_LINE_LENGTH} characters")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+def in_quoted_field(text: str) -> bool:
+    """
+    True if text ends inside a quoted CSV field. Follows the csv module's
+    default dialect: a quote only opens a field at its start, "" is an
+    escaped quote, and other quotes are literal characters.
+    """
+    quoted = False
+    field_start = True
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if quoted:
+            if char == '"':
+                if text[i + 1:i + 2] == '"':
+                    i += 1
+                else:
+                    quoted = False
+        elif char == '"' and field_start:
+            quoted = True
+        field_start = not quoted and char == ","
+        i += 1
+    return quoted
+
+
+async def csv_rows(lines):
+    """
+    Yield (row_number, dict) from CSV lines with a header row.
+    Quoted fields may span lines. Malformed records yield a ValueError.
+    """
+    header = None
+    pending = None
+    row_number = 0
+    async for line in lines:
+        pending = line if pending is None else f"{pending}\n{line}"
+        if '"' in pending and in_quoted_field(pending):
+            if len(pending) > MAX_LINE_LENGTH:
+                raise HTTPException(status_code=400, detail=f"Record longer than {MAX_LINE_LENGTH} characters")
+            continue  # the record continues on the next line
+        record = next(csv.reader([pending]), [])
+        pending = None
+        if header is None:
+            header = [name.strip() for name in record]
+            continue
+        row_number += 1
+        if not record:
+            continue
+        if len(record) > len(header):
+            yield row_number, ValueError(f"Expected {len(header)} fields, got {len(record)}")
+        else:
+            yield row_number, dict(zip(header, record))
+
+    if pending is not None:
+        yield row_number + 1, ValueError("Unterminated quoted field")
+
+
+async def ndjson_rows(lines):
+    """Yield (row_number, value) for each non-empty line; undecodable lines yield a ValueError"""
+    row_number = 0
+    async for line in lines:
+        row_number += 1
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except ValueError as e:
+            yield row_number, ValueError(f"Invalid JSON: {str(e)}")
+
+
+def lead_upsert(lead_data: LeadCreate) -> dict:
+    """
+    Update document for an upsert keyed on email: contact fields are set,
+    id, created_at and status are only set when the lead is new
+    """
+    fields = lead_data.dict()
+    new_lead = Lead(**fields).dict()
+    return {
+        "$set": fields,
+        "$setOnInsert": {key: value for key, value in new_lead.items() if key not in fields}
+    }
+
+
+def upsert_operation(lead_data: LeadCreate) -> UpdateOne:
+    return UpdateOne({"email": lead_data.email}, lead_upsert(lead_data), upsert=True)
+
+
+class ImportReport:
+    def __init__(self):
+        self.processed = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, row: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def dict(self):
+        return {
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors)
+        }
+
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors())
+
+
+async def write_batch(operations: list, row_numbers: list, report: ImportReport):
+    try:
+        result = await db.leads.bulk_write(operations, ordered=False)
+        details = result.bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+        for write_error in details.get("writeErrors", []):
+            report.error(row_numbers[write_error["index"]], write_error.get("errmsg", "Write failed"))
+    report.inserted += details.get("nUpserted", 0)
+    report.updated += details.get("nMatched", 0)
+
+
+async def import_leads(stream, file_format: str) -> dict:
+    """Import leads from an async byte stream in the given format (csv or ndjson)"""
+    if file_format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format. Must be one of: {list(FORMATS)}")
+
+    report = ImportReport()
+    rows = csv_rows(iter_lines(stream)) if file_format == "csv" else ndjson_rows(iter_lines(stream))
+    operations, row_numbers = [], []
+    pending_write = None
+
+    async def flush():
+        nonlocal operations, row_numbers, pending_write
+        if pending_write:
+            await pending_write
+        # Write this batch while the next one is parsed
+        pending_write = asyncio.ensure_future(write_batch(operations, row_numbers, report))
+        operations, row_numbers = [], []
+
+    try:
+        async for row_number, row in rows:
+            report.processed += 1
+            if isinstance(row, Exception):
+                report.error(row_number, str(row))
+                continue
+            if not isinstance(row, dict):
+                report.error(row_number, "Row must be an object")
+                continue
+            try:
+                lead = LeadCreate(**{key: value for key, value in row.items() if key})
+            except ValidationError as e:
+                report.error(row_number, validation_message(e))
+                continue
+            operations.append(upsert_operation(lead))
+            row_numbers.append(row_number)
+            if len(operations) >= IMPORT_BATCH_SIZE:
+                await flush()
+
+        if operations:
+            await flush()
+    finally:
+        if pending_write:
+            await pending_write
+
+    return report.dict()
@@ -8,6 +8,22 @@ class VideoData(BaseModel):
     duration: Optional[str] = None
     uploaded_at: Optional[datetime] = None
 
+class VideoUploadCreate(BaseModel):
+    filename: str
+    size: int  # Total size in bytes
+
+class VideoUploadSession(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid4()))
+    owner_id: str
+    category: str
+    filename: str
+    size: int
+    offset: int = 0  # Bytes received so far
+    locked_at: Optional[datetime] = None  # Set while a chunk is being written
+    lock_id: Optional[str] = None  # Identifies the request holding the lock
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime
+
 class PrimaryAccess(BaseModel):
     system_type: Optional[str] = None  # e.g., "Smartlås (Yale Doorman V2N)"
     access_method: Optional[str] = None  # e.g., "PIN-kode eller nøkkel"
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from uuid import uuid4
 
@@ -19,6 +19,7 @@ class FloorPlanData(BaseModel):
     owner_id: str
     
     image_url: Optional[str] = None
+    image_derivatives: Optional[Dict[str, str]] = None  # {"thumbnail": url, "medium": url, "full": url}
     comment: Optional[str] = None
     annotations: List[Annotation] = []
     
@@ -40,3 +40,8 @@ class FurnitureEquipmentUpdate(BaseModel):
     general_comments: Optional[str] = None
     last_confirmed: Optional[datetime] = None
     confirmed_by: Optional[str] = None
+
+class FurnitureBulkCheck(BaseModel):
+    checked: bool
+    item_ids: Optional[List[str]] = None
+    category: Optional[str] = None  # 'kitchen', 'tableware', 'household', 'other'
@@ -24,6 +24,7 @@ class Owner(BaseModel):
     onboarding_completed: bool = Field(default=False)
     onboarding_data: Optional[Dict[str, Any]] = None
     status: str = Field(default="Ringt")  # "Ringt", "Sendt tilbud", "Onboarding", "Kontrakt", "Lost"
+    status_changed_at: Optional[datetime] = None
 
 class OwnerResponse(BaseModel):
     id: str
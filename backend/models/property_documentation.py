@@ -7,6 +7,7 @@ class DocumentationImage(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid4()))
     url: str
     caption: Optional[str] = None
+    derivatives: Optional[Dict[str, str]] = None  # {"thumbnail": url, "medium": url, "full": url}
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
 
 class DocumentationFile(BaseModel):
@@ -0,0 +1,125 @@
+"""
+Paging, sorting and counting for the admin list endpoints.
+
+Lists are ordered by one sort field with id as tie-breaker, newest first
+by default. Keyset (cursor) pagination uses an opaque, URL-safe token
+holding the sort key of the last row on the previous page. Each page is
+then an index range scan on (field, id), so page 1000 costs the same as
+page 1.
+"""
+from fastapi import HTTPException
+from bson import json_util
+from datetime import datetime
+from typing import Optional
+import asyncio
+import base64
+import re
+
+SORT = [("created_at", -1), ("id", -1)]
+MAX_PAGE_SIZE = 1000
+
+
+def parse_sort(sort: str, allowed) -> list:
+    """
+    Turn "field" / "-field" into a Mongo sort with id as tie-breaker.
+    Only fields in allowed may be used.
+    """
+    direction = -1 if sort.startswith("-") else 1
+    field = sort.lstrip("-+")
+    if field not in allowed:
+        raise HTTPException(status_code=400, detail=f"Invalid sort. Must be one of: {list(allowed)}")
+    return [(field, direction), ("id", direction)]
+
+
+def created_range(created_from: Optional[datetime] = None, created_to: Optional[datetime] = None) -> dict:
+    """Filter on created_at, inclusive start and exclusive end"""
+    bounds = {}
+    if created_from:
+        bounds["$gte"] = created_from
+    if created_to:
+        bounds["$lt"] = created_to
+    return {"created_at": bounds} if bounds else {}
+
+
+def search_filter(q: str) -> dict:
+    """
+    Admin free-text search. Whole words match anywhere in name, email, phone
+    or address (text index). The term also matches as a case-sensitive
+    prefix of name, email or phone as stored, e.g. "ola@" or "+47 912",
+    which the text index cannot do. Each prefix is an index range scan.
+    """
+    term = q.strip()
+    prefix = {"$regex": f"^{re.escape(term)}"}
+    return {"$or": [
+        {"$text": {"$search": term}},
+        {"name": prefix},
+        {"email": prefix},
+        {"phone": prefix}
+    ]}
+
+
+def encode_cursor(row: dict, sort: list = SORT) -> str:
+    key = json_util.dumps([row[field] for field, _ in sort])
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: list = SORT) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json_util.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(key, list) or len(key) != len(sort):
+            raise ValueError("sort key length")
+        return key
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def after_cursor(cursor: str, sort: list = SORT) -> dict:
+    """Filter for rows that sort after the cursor"""
+    key = decode_cursor(cursor, sort)
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {f: key[j] for j, (f, _) in enumerate(sort[:i])}
+        clause[field] = {"$lt" if direction < 0 else "$gt": key[i]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+async def count_matching(collection, query: dict) -> int:
+    """Total rows matching query; unfiltered counts come from collection metadata"""
+    if not query:
+        return await collection.estimated_document_count()
+    return await collection.count_documents(query)
+
+
+async def keyset_page(collection, query: dict, projection: dict, limit: int, cursor: str = None, sort: list = SORT):
+    """
+    Fetch one page. An empty cursor starts at the first row.
+    Returns {"items": [...], "next_cursor": str or None}
+    """
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
+    if cursor:
+        query = {"$and": [query, after_cursor(cursor, sort)]} if query else after_cursor(cursor, sort)
+
+    # Sort keys must be in the projection to build the next cursor
+    projection = dict(projection)
+    if any(value == 1 for key, value in projection.items() if key != "_id"):
+        projection.update({field: 1 for field, _ in sort})
+
+    rows = await collection.find(query, projection).sort(sort).limit(limit + 1).to_list(limit + 1)
+    next_cursor = encode_cursor(rows[limit - 1], sort) if len(rows) > limit else None
+    return {"items": rows[:limit], "next_cursor": next_cursor}
+
+
+async def list_page(collection, query: dict, projection: dict, sort: list, skip: int, limit: int, cursor: str = None):
+    """
+    Fetch one page (offset or keyset) and the total number of matching
+    rows concurrently. Returns (page, total), where page is a list for
+    offset paging or {"items", "next_cursor"} for keyset paging.
+    """
+    if cursor is not None:
+        page = keyset_page(collection, query, projection, limit, cursor, sort)
+    else:
+        page = collection.find(query, projection).sort(sort).skip(skip).limit(limit).to_list(limit)
+    return await asyncio.gather(page, count_matching(collection, query))
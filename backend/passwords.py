@@ -0,0 +1,42 @@
+"""
+Password hashing off the event loop.
+
+bcrypt is deliberately slow (hundreds of ms at production cost), so hashing
+and verification run in a bounded thread pool. The bcrypt C extension
+releases the GIL, so other requests keep being served meanwhile. The cost
+factor comes from BCRYPT_ROUNDS. Hashes made with a different cost are
+upgraded on the next successful verification.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from passlib.hash import bcrypt
+import asyncio
+import os
+
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '4'))
+
+_hasher = bcrypt.using(rounds=BCRYPT_ROUNDS)
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, _hasher.hash, password)
+
+
+async def verify_password(password: str, password_hash: str):
+    """
+    Returns (valid, new_hash). new_hash is set when the password is valid
+    but the stored hash uses a different cost and should be replaced.
+    """
+    if not password_hash:
+        return False, None
+    loop = asyncio.get_running_loop()
+    try:
+        valid = await loop.run_in_executor(_executor, _hasher.verify, password, password_hash)
+    except ValueError:
+        # Not a bcrypt hash
+        return False, None
+    if valid and _hasher.needs_update(password_hash):
+        return True, await hash_password(password)
+    return valid, None
@@ -0,0 +1,48 @@
+"""
+Fast JSON responses.
+
+ORJSONResponse is the app's default response class: whatever a handler
+returns is rendered with orjson instead of json.dumps.
+
+FastAPI still runs jsonable_encoder (or response_model validation) on
+handler results first, which is the larger cost for big documents. GETs
+that return documents read from MongoDB call trusted_read(). With
+TRUSTED_DB_READS on (the default), that renders the documents directly
+with orjson and skips re-validation. The documents were validated by our
+models when they were written. Set TRUSTED_DB_READS=false to send them
+through jsonable_encoder / response_model again.
+"""
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from bson import ObjectId
+import orjson
+import os
+
+TRUSTED_DB_READS = os.environ.get('TRUSTED_DB_READS', 'true').lower() == 'true'
+
+
+def default(value):
+    """Types orjson does not serialize natively"""
+    if isinstance(value, BaseModel):
+        return value.dict()
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def trusted_read(content, response: Response = None):
+    """
+    Return MongoDB documents from a handler. In trusted mode they are
+    rendered as-is, keeping headers set on the injected response.
+    """
+    if not TRUSTED_DB_READS:
+        return content
+    return ORJSONResponse(content, headers=dict(response.headers) if response is not None else None)
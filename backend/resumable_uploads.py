@@ -0,0 +1,184 @@
+"""
+Resumable chunked uploads (tus-style) for large files.
+
+A client creates a session with the total size, then sends the file as
+any number of chunks, each starting at the session's current offset.
+If a connection drops, the client asks for the offset and resumes from
+there. Chunks are streamed to a partial file, so server memory stays
+bounded regardless of file size. When the last byte arrives, the file is
+hashed and moved into the content-addressed upload store.
+"""
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from pymongo import ReturnDocument
+from database import db
+from models.access_and_locks import VideoUploadSession
+from uploads import STAGING_DIR, CHUNK_SIZE, MAX_UPLOAD_SIZES, StoredUpload, store_blob, too_large
+from datetime import datetime, timedelta
+from uuid import uuid4
+import hashlib
+import os
+
+SESSION_TTL = timedelta(hours=int(os.environ.get('RESUMABLE_UPLOAD_TTL_HOURS', '24')))
+
+# A chunk lock older than this is treated as abandoned. The holder refreshes
+# it every LOCK_REFRESH while streaming, so only a stalled request loses it.
+LOCK_TIMEOUT = timedelta(minutes=10)
+LOCK_REFRESH = timedelta(minutes=1)
+
+
+def session_path(upload_id: str):
+    return STAGING_DIR / f"{upload_id}.upload"
+
+
+async def create_session(owner_id: str, category: str, filename: str, size: int, kind: str = "video") -> dict:
+    """
+    Start a new upload session and reserve its partial file
+    """
+    if size > MAX_UPLOAD_SIZES[kind]:
+        raise too_large(kind)
+
+    session = VideoUploadSession(
+        owner_id=owner_id,
+        category=category,
+        filename=filename,
+        size=size,
+        expires_at=datetime.utcnow() + SESSION_TTL
+    )
+    await run_in_threadpool(session_path(session.id).touch)
+    await db.upload_sessions.insert_one(session.dict())
+
+    # Opportunistically clean up abandoned sessions
+    await expire_sessions()
+
+    return session.dict()
+
+
+async def get_session(upload_id: str, owner_id: str) -> dict:
+    session = await db.upload_sessions.find_one({"id": upload_id, "owner_id": owner_id}, {"_id": 0})
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return session
+
+
+async def refresh_lock(upload_id: str, lock_id: str) -> datetime:
+    """Extend the chunk lock; 409 if another request has taken it over"""
+    now = datetime.utcnow()
+    result = await db.upload_sessions.update_one({"id": upload_id, "lock_id": lock_id}, {"$set": {"locked_at": now}})
+    if not result.matched_count:
+        raise HTTPException(status_code=409, detail="Upload lock expired; resume from the current offset")
+    return now
+
+
+async def append_chunk(upload_id: str, owner_id: str, offset: int, stream) -> dict:
+    """
+    Write a chunk starting at offset from an async byte stream.
+    The offset must equal the session's current offset. Bytes received
+    before a dropped connection are kept, so the client can resume.
+    Returns the updated session.
+    """
+    now = datetime.utcnow()
+    lock_id = str(uuid4())
+    session = await db.upload_sessions.find_one_and_update(
+        {
+            "id": upload_id,
+            "owner_id": owner_id,
+            "offset": offset,
+            "$or": [{"locked_at": None}, {"locked_at": {"$lt": now - LOCK_TIMEOUT}}]
+        },
+        {"$set": {"locked_at": now, "lock_id": lock_id}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if not session:
+        current = await get_session(upload_id, owner_id)
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload offset mismatch or chunk in progress. Current offset is {current['offset']}"
+        )
+
+    written = 0
+    locked_at = now
+    buffer = await run_in_threadpool(open, session_path(upload_id), "r+b")
+    try:
+        # Drop any bytes past the acknowledged offset from an interrupted chunk
+        await run_in_threadpool(buffer.seek, offset)
+        await run_in_threadpool(buffer.truncate)
+        async for chunk in stream:
+            if offset + written + len(chunk) > session["size"]:
+                raise HTTPException(status_code=413, detail="Chunk exceeds the declared upload size")
+            # Never write after the lock may have passed to another request
+            if datetime.utcnow() - locked_at > LOCK_REFRESH:
+                locked_at = await refresh_lock(upload_id, lock_id)
+            await run_in_threadpool(buffer.write, chunk)
+            written += len(chunk)
+    finally:
+        await run_in_threadpool(buffer.close)
+        # Only the lock holder commits its offset; a stale writer's bytes are truncated by the next chunk
+        session = await db.upload_sessions.find_one_and_update(
+            {"id": upload_id, "lock_id": lock_id},
+            {"$set": {
+                "offset": offset + written,
+                "locked_at": None,
+                "lock_id": None,
+                "expires_at": datetime.utcnow() + SESSION_TTL
+            }},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+
+    if not session:
+        raise HTTPException(status_code=409, detail="Upload lock expired; resume from the current offset")
+    return session
+
+
+async def complete_session(session: dict) -> StoredUpload:
+    """
+    Hash the assembled file, move it into the upload store and end the session
+    """
+    # Claim completion so a repeated final chunk cannot store the file twice
+    now = datetime.utcnow()
+    claimed = await db.upload_sessions.find_one_and_update(
+        {
+            "id": session["id"],
+            "offset": session["size"],
+            "$or": [{"locked_at": None}, {"locked_at": {"$lt": now - LOCK_TIMEOUT}}]
+        },
+        {"$set": {"locked_at": now, "lock_id": str(uuid4())}}
+    )
+    if not claimed:
+        raise HTTPException(status_code=409, detail="Upload is incomplete or already being completed")
+
+    path = session_path(session["id"])
+
+    def file_sha256():
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    sha256 = await run_in_threadpool(file_sha256)
+    file_ext = session["filename"].split('.')[-1].lower()
+    stored = await store_blob(path, sha256, session["size"], file_ext)
+    await db.upload_sessions.delete_one({"id": session["id"]})
+    return stored
+
+
+async def expire_sessions(batch_size: int = 100) -> int:
+    """
+    Remove up to batch_size expired sessions and their partial files
+    """
+    now = datetime.utcnow()
+    expired = await db.upload_sessions.find(
+        {"expires_at": {"$lt": now}},
+        {"_id": 0, "id": 1}
+    ).limit(batch_size).to_list(batch_size)
+
+    removed = 0
+    for session in expired:
+        result = await db.upload_sessions.delete_one({"id": session["id"], "expires_at": {"$lt": now}})
+        if result.deleted_count:
+            await run_in_threadpool(session_path(session["id"]).unlink, True)
+            removed += 1
+    return removed
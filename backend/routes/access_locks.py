@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, Header, Request
 from models.access_and_locks import (
     AccessAndLocksData,
     PrimaryAccessUpdate,
@@ -7,25 +7,46 @@ from models.access_and_locks import (
     NavigationFromStreetUpdate,
     RoomWalkthroughUpdate,
     ParkingInfoUpdate,
-    VideoData
+    VideoData,
+    VideoUploadCreate
 )
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from database import db
+from responses import trusted_read
+from pymongo import ReturnDocument
+from uploads import receive_upload, release_upload
+import resumable_uploads
+from section_defaults import SectionDefaults
+from section_cache import section_cache
 from datetime import datetime
-from uuid import uuid4
-import shutil
-from pathlib import Path
 
 router = APIRouter()
 
-# MongoDB connection
-mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'digihome')]
+# Empty access and locks data, stored on first edit
+DEFAULTS = SectionDefaults("access_and_locks", lambda: AccessAndLocksData(owner_id="").dict())
 
-# File upload directory
-UPLOAD_DIR = Path("/app/uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
+SECTIONS = (
+    "primary_access",
+    "backup_access",
+    "emergency_protocol",
+    "navigation_from_street",
+    "room_walkthrough",
+    "parking_info",
+)
+
+async def load_access_locks(owner_id: str):
+    """
+    Get the access and locks data of an existing owner,
+    or empty data if it has never been edited
+    """
+    data = await section_cache.get(
+        "access_and_locks", owner_id,
+        lambda: db.access_and_locks.find_one({"owner_id": owner_id}, {"_id": 0})
+    )
+    
+    if not data:
+        return DEFAULTS.document(owner_id)
+    
+    return data
 
 @router.get("/owners/{owner_id}/access-locks")
 async def get_access_locks_data(owner_id: str):
@@ -34,54 +55,52 @@ async def get_access_locks_data(owner_id: str):
     """
     try:
         # Check if owner exists
-        owner = await db.owners.find_one({"id": owner_id}, {"_id": 0})
+        owner = await db.owners.find_one({"id": owner_id}, {"_id": 1})
         if not owner:
             raise HTTPException(status_code=404, detail="Owner not found")
         
-        # Get or create access locks data
-        data = await db.access_and_locks.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not data:
-            # Create new data for owner
-            new_data = AccessAndLocksData(owner_id=owner_id)
-            await db.access_and_locks.insert_one(new_data.dict())
-            return new_data.dict()
-        
-        return data
+        return trusted_read(await load_access_locks(owner_id))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch access locks data: {str(e)}")
 
+async def upsert_section(owner_id: str, section: str, fields: dict, return_document=ReturnDocument.AFTER):
+    """
+    Set the given fields of one section with a single upsert.
+    Only the dotted paths that change are written; defaults for a new
+    document go behind $setOnInsert so parallel edits of other sections
+    are never overwritten. Returns the updated section (or the previous
+    one with ReturnDocument.BEFORE, None if the document was just created).
+    """
+    now = datetime.utcnow()
+    set_fields = {f"{section}.{key}": value for key, value in fields.items()}
+    set_fields["updated_at"] = now
+    
+    defaults = DEFAULTS.on_insert(owner_id, exclude=("updated_at",))
+    section_defaults = defaults.pop(section)
+    for key, value in section_defaults.items():
+        if key not in fields:
+            defaults[f"{section}.{key}"] = value
+    
+    data = await db.access_and_locks.find_one_and_update(
+        {"owner_id": owner_id},
+        {"$set": set_fields, "$setOnInsert": defaults},
+        projection={"_id": 0, section: 1},
+        upsert=True,
+        return_document=return_document
+    )
+    await section_cache.invalidate("access_and_locks", owner_id)
+    
+    return data[section] if data else None
+
 @router.put("/owners/{owner_id}/access-locks/primary-access")
 async def update_primary_access(owner_id: str, update_data: PrimaryAccessUpdate):
     """
     Update primary access information
     """
     try:
-        # Get or create access locks data
-        data = await db.access_and_locks.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not data:
-            # Create new data
-            new_data = AccessAndLocksData(owner_id=owner_id)
-            data = new_data.dict()
-        
-        # Update primary_access fields
-        update_dict = update_data.dict(exclude_unset=True)
-        for key, value in update_dict.items():
-            data["primary_access"][key] = value
-        
-        data["updated_at"] = datetime.utcnow()
-        
-        # Upsert document
-        await db.access_and_locks.update_one(
-            {"owner_id": owner_id},
-            {"$set": data},
-            upsert=True
-        )
-        
-        return data["primary_access"]
+        return await upsert_section(owner_id, "primary_access", update_data.dict(exclude_unset=True))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update primary access: {str(e)}")
 
@@ -91,25 +110,7 @@ async def update_backup_access(owner_id: str, update_data: BackupAccessUpdate):
     Update backup access information
     """
     try:
-        data = await db.access_and_locks.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not data:
-            new_data = AccessAndLocksData(owner_id=owner_id)
-            data = new_data.dict()
-        
-        update_dict = update_data.dict(exclude_unset=True)
-        for key, value in update_dict.items():
-            data["backup_access"][key] = value
-        
-        data["updated_at"] = datetime.utcnow()
-        
-        await db.access_and_locks.update_one(
-            {"owner_id": owner_id},
-            {"$set": data},
-            upsert=True
-        )
-        
-        return data["backup_access"]
+        return await upsert_section(owner_id, "backup_access", update_data.dict(exclude_unset=True))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update backup access: {str(e)}")
 
@@ -119,25 +120,7 @@ async def update_emergency_protocol(owner_id: str, update_data: EmergencyProtoco
     Update emergency protocol information
     """
     try:
-        data = await db.access_and_locks.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not data:
-            new_data = AccessAndLocksData(owner_id=owner_id)
-            data = new_data.dict()
-        
-        update_dict = update_data.dict(exclude_unset=True)
-        for key, value in update_dict.items():
-            data["emergency_protocol"][key] = value
-        
-        data["updated_at"] = datetime.utcnow()
-        
-        await db.access_and_locks.update_one(
-            {"owner_id": owner_id},
-            {"$set": data},
-            upsert=True
-        )
-        
-        return data["emergency_protocol"]
+        return await upsert_section(owner_id, "emergency_protocol", update_data.dict(exclude_unset=True))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update emergency protocol: {str(e)}")
 
@@ -147,25 +130,7 @@ async def update_navigation(owner_id: str, update_data: NavigationFromStreetUpda
     Update navigation from street information
     """
     try:
-        data = await db.access_and_locks.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not data:
-            new_data = AccessAndLocksData(owner_id=owner_id)
-            data = new_data.dict()
-        
-        update_dict = update_data.dict(exclude_unset=True)
-        for key, value in update_dict.items():
-            data["navigation_from_street"][key] = value
-        
-        data["updated_at"] = datetime.utcnow()
-        
-        await db.access_and_locks.update_one(
-            {"owner_id": owner_id},
-            {"$set": data},
-            upsert=True
-        )
-        
-        return data["navigation_from_street"]
+        return await upsert_section(owner_id, "navigation_from_street", update_data.dict(exclude_unset=True))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update navigation: {str(e)}")
 
@@ -175,25 +140,7 @@ async def update_room_walkthrough(owner_id: str, update_data: RoomWalkthroughUpd
     Update room walkthrough information
     """
     try:
-        data = await db.access_and_locks.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not data:
-            new_data = AccessAndLocksData(owner_id=owner_id)
-            data = new_data.dict()
-        
-        update_dict = update_data.dict(exclude_unset=True)
-        for key, value in update_dict.items():
-            data["room_walkthrough"][key] = value
-        
-        data["updated_at"] = datetime.utcnow()
-        
-        await db.access_and_locks.update_one(
-            {"owner_id": owner_id},
-            {"$set": data},
-            upsert=True
-        )
-        
-        return data["room_walkthrough"]
+        return await upsert_section(owner_id, "room_walkthrough", update_data.dict(exclude_unset=True))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update room walkthrough: {str(e)}")
 
@@ -203,80 +150,105 @@ async def update_parking_info(owner_id: str, update_data: ParkingInfoUpdate):
     Update parking information
     """
     try:
-        data = await db.access_and_locks.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not data:
-            new_data = AccessAndLocksData(owner_id=owner_id)
-            data = new_data.dict()
-        
-        update_dict = update_data.dict(exclude_unset=True)
-        for key, value in update_dict.items():
-            data["parking_info"][key] = value
-        
-        data["updated_at"] = datetime.utcnow()
-        
-        await db.access_and_locks.update_one(
-            {"owner_id": owner_id},
-            {"$set": data},
-            upsert=True
-        )
-        
-        return data["parking_info"]
+        return await upsert_section(owner_id, "parking_info", update_data.dict(exclude_unset=True))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update parking info: {str(e)}")
 
+async def attach_video(owner_id: str, category: str, video_url: str):
+    """
+    Set a category's video and release the one it replaces
+    """
+    video_data = VideoData(
+        url=video_url,
+        uploaded_at=datetime.utcnow()
+    )
+    
+    try:
+        previous = await upsert_section(
+            owner_id, category, {"video": video_data.dict()}, return_document=ReturnDocument.BEFORE
+        )
+    except Exception:
+        # Not attached: drop the upload's reference so GC can collect the blob
+        await release_upload(video_url)
+        raise
+
+    if previous and previous.get("video"):
+        await release_upload(previous["video"].get("url"))
+    
+    return video_data.dict()
+
 @router.post("/owners/{owner_id}/access-locks/{category}/upload-video")
-async def upload_video(owner_id: str, category: str, file: UploadFile = File(...)):
+async def upload_video(owner_id: str, category: str, request: Request):
     """
-    Upload a video for a specific category
-    category can be: primary_access, navigation, room_walkthrough, parking
+    Upload a video for a specific category (multipart/form-data, field "file")
+    category can be: primary_access, navigation_from_street, room_walkthrough, parking_info
     """
     try:
-        # Validate file type
-        if not file.content_type.startswith('video/'):
-            raise HTTPException(status_code=400, detail="File must be a video")
-        
-        # Generate unique filename
-        file_ext = file.filename.split('.')[-1]
-        unique_filename = f"{uuid4()}.{file_ext}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Create video URL
-        video_url = f"/uploads/{unique_filename}"
+        if category not in SECTIONS:
+            raise HTTPException(status_code=400, detail=f"Invalid category: {category}")
         
-        # Create VideoData object
-        video_data = VideoData(
-            url=video_url,
-            uploaded_at=datetime.utcnow()
-        )
+        # Stream the file to disk, checking its type and size as it arrives
+        upload = await receive_upload(request, "video", ("video/",), "File must be a video")
         
-        # Update database
-        data = await db.access_and_locks.find_one({"owner_id": owner_id}, {"_id": 0})
+        return await attach_video(owner_id, category, upload.stored.url)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to upload video: {str(e)}")
+
+@router.post("/owners/{owner_id}/access-locks/{category}/video-uploads")
+async def create_video_upload(owner_id: str, category: str, upload: VideoUploadCreate):
+    """
+    Start a resumable video upload for a specific category.
+    Send the file with PATCH .../access-locks/video-uploads/{upload_id}
+    """
+    try:
+        if category not in SECTIONS:
+            raise HTTPException(status_code=400, detail=f"Invalid category: {category}")
         
-        if not data:
-            new_data = AccessAndLocksData(owner_id=owner_id)
-            data = new_data.dict()
+        session = await resumable_uploads.create_session(owner_id, category, upload.filename, upload.size)
         
-        # Update the specific category's video
-        if category in data:
-            data[category]["video"] = video_data.dict()
-        else:
-            raise HTTPException(status_code=400, detail=f"Invalid category: {category}")
+        return {"upload_id": session["id"], "offset": session["offset"], "size": session["size"]}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create video upload: {str(e)}")
+
+@router.get("/owners/{owner_id}/access-locks/video-uploads/{upload_id}")
+async def get_video_upload(owner_id: str, upload_id: str):
+    """
+    Get the current offset of a resumable video upload
+    """
+    try:
+        session = await resumable_uploads.get_session(upload_id, owner_id)
         
-        data["updated_at"] = datetime.utcnow()
+        return {"upload_id": session["id"], "offset": session["offset"], "size": session["size"]}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch video upload: {str(e)}")
+
+@router.patch("/owners/{owner_id}/access-locks/video-uploads/{upload_id}")
+async def upload_video_chunk(
+    owner_id: str,
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset")
+):
+    """
+    Append a chunk (raw request body) at Upload-Offset.
+    The video is attached to its category once the last byte arrives.
+    """
+    try:
+        session = await resumable_uploads.append_chunk(upload_id, owner_id, upload_offset, request.stream())
+        response = {"upload_id": session["id"], "offset": session["offset"], "size": session["size"]}
         
-        await db.access_and_locks.update_one(
-            {"owner_id": owner_id},
-            {"$set": data},
-            upsert=True
-        )
+        if session["offset"] == session["size"]:
+            stored = await resumable_uploads.complete_session(session)
+            response["video"] = await attach_video(owner_id, session["category"], stored.url)
         
-        return video_data.dict()
+        return response
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to upload video: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to upload video chunk: {str(e)}")
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException
+from responses import trusted_read
+from admin_stats import stats_cache
+from status_history import pipeline_stats
+from section_cache import section_cache
+
+router = APIRouter()
+
+@router.get("/admin/stats")
+async def get_admin_stats():
+    """
+    Lead and owner counts per status, conversion rates and weekly trends
+    Served from a short-lived cache; computed_at tells when the numbers were taken
+    """
+    try:
+        return trusted_read(await stats_cache.get())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to compute stats: {str(e)}")
+
+@router.get("/admin/owner-pipeline")
+async def get_owner_pipeline():
+    """
+    Owners currently in each status and time-in-stage percentiles (hours)
+    Read from the precomputed counters document
+    """
+    try:
+        return trusted_read(await pipeline_stats())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch owner pipeline: {str(e)}")
+
+@router.get("/admin/cache-stats")
+async def get_cache_stats():
+    """
+    Section cache metrics: hits, misses, hit rate, entries and stored bytes
+    """
+    return section_cache.stats()
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException
+from database import db
+from responses import trusted_read
+from routes.documentation import load_documentation
+from routes.access_locks import load_access_locks
+from routes.floor_plan import load_floor_plan
+from routes.furniture_equipment import load_furniture_equipment
+from routes.partners import load_partners
+from typing import Optional
+import asyncio
+
+router = APIRouter()
+
+# Section name -> loader(owner_id, size)
+SECTION_LOADERS = {
+    "documentation": load_documentation,
+    "access-locks": lambda owner_id, size: load_access_locks(owner_id),
+    "floor-plan": load_floor_plan,
+    "furniture-equipment": lambda owner_id, size: load_furniture_equipment(owner_id),
+    "partners": lambda owner_id, size: load_partners(owner_id),
+}
+
+@router.get("/owners/{owner_id}/bundle")
+async def get_owner_bundle(owner_id: str, sections: Optional[str] = None, size: Optional[str] = None):
+    """
+    Every property section of an owner in one response
+    sections is a comma-separated subset of the section names (default: all);
+    size selects an image derivative like on the section endpoints
+    """
+    try:
+        names = [name.strip() for name in sections.split(",") if name.strip()] if sections else list(SECTION_LOADERS)
+        unknown = [name for name in names if name not in SECTION_LOADERS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown sections: {unknown}. Must be among: {list(SECTION_LOADERS)}")
+        
+        # Section reads have no side effects, so the single owner check runs alongside them
+        owner, *results = await asyncio.gather(
+            db.owners.find_one({"id": owner_id}, {"_id": 1}),
+            *(SECTION_LOADERS[name](owner_id, size) for name in names)
+        )
+        if not owner:
+            raise HTTPException(status_code=404, detail="Owner not found")
+        
+        return trusted_read(dict(zip(names, results)))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch owner bundle: {str(e)}")
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import JSONResponse
 from models.property_documentation import (
     PropertyDocumentation, 
@@ -8,45 +8,117 @@ from models.property_documentation import (
     DocumentationImage,
     DocumentationFile
 )
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from database import db
+from responses import trusted_read
+from field_selection import parse_fields, projection, select_fields
+from pymongo import ReturnDocument
+from uploads import receive_upload, release_upload
+from image_derivatives import create_derivatives, pick_size, release_derivatives
+from jobs import enqueue, job_handler
+from section_defaults import SectionDefaults
+from section_cache import section_cache
+from typing import Optional
 from datetime import datetime
-from uuid import uuid4
-import shutil
-from pathlib import Path
 
 router = APIRouter()
 
-# MongoDB connection
-mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'digihome')]
+# Empty documentation, stored on first edit
+DEFAULTS = SectionDefaults("property_documentation", lambda: PropertyDocumentation(owner_id="").dict())
 
-# File upload directory
-UPLOAD_DIR = Path("/app/uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
+async def raise_item_not_found(owner_id: str):
+    """
+    Raise the right 404 after an item-scoped query matched nothing
+    """
+    if not await db.property_documentation.find_one({"owner_id": owner_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Documentation not found")
+    raise HTTPException(status_code=404, detail="Security system item not found")
+
+def apply_image_size(items, size: Optional[str]):
+    """
+    Point each image url at the requested derivative (thumbnail, medium, full)
+    """
+    if size:
+        for item in items:
+            for image in item.get("images", []):
+                if "url" in image:
+                    image["url"] = pick_size(image["url"], image.get("derivatives"), size)
+    return items
+
+@job_handler("documentation.image_derivatives")
+async def attach_image_derivatives(owner_id: str, item_id: str, image_id: str, image_url: str):
+    """
+    Background job: generate derivatives and record them on the image
+    """
+    derivatives = await create_derivatives(image_url)
+    if not derivatives:
+        return
+    
+    try:
+        result = await db.property_documentation.update_one(
+            {"owner_id": owner_id},
+            {"$set": {"security_systems.$[item].images.$[image].derivatives": derivatives}},
+            array_filters=[{"item.id": item_id}, {"image.id": image_id}]
+        )
+        await section_cache.invalidate("property_documentation", owner_id)
+    except Exception:
+        # The retried job stores its own derivatives
+        await release_derivatives(derivatives)
+        raise
+    
+    # The image was deleted while its derivatives were being generated, or a
+    # redelivered job stored the same derivatives again: drop the extra references
+    if result.modified_count == 0:
+        await release_derivatives(derivatives)
+
+def uploaded_urls(item):
+    """All stored file URLs referenced by a security system item"""
+    urls = []
+    for image in item.get("images", []):
+        urls.append(image.get("url"))
+        urls.extend((image.get("derivatives") or {}).values())
+    for document in item.get("documents", []):
+        urls.append(document.get("url"))
+    return urls
+
+async def fetch_documentation(owner_id: str):
+    """The stored documentation (None if never edited), through the section cache"""
+    return await section_cache.get(
+        "property_documentation", owner_id,
+        lambda: db.property_documentation.find_one({"owner_id": owner_id}, {"_id": 0})
+    )
+
+async def load_documentation(owner_id: str, size: Optional[str] = None, fields: Optional[list] = None):
+    """
+    Get the documentation of an existing owner,
+    or empty documentation if it has never been edited.
+    fields (parsed) limits the returned fields; such reads bypass the cache
+    """
+    if fields:
+        doc = await db.property_documentation.find_one({"owner_id": owner_id}, projection(fields))
+    else:
+        doc = await fetch_documentation(owner_id)
+    
+    if not doc:
+        return select_fields(DEFAULTS.document(owner_id), fields)
+    
+    apply_image_size(doc.get("security_systems", []), size)
+    return doc
 
 @router.get("/owners/{owner_id}/documentation")
-async def get_owner_documentation(owner_id: str):
+async def get_owner_documentation(owner_id: str, size: Optional[str] = None, fields: Optional[str] = None):
     """
     Get all documentation for an owner
+    fields selects the fields to return, e.g. security_systems.name,security_systems.images
     """
     try:
+        selected = parse_fields(fields, PropertyDocumentation)
+        
         # Check if owner exists
-        owner = await db.owners.find_one({"id": owner_id}, {"_id": 0})
+        owner = await db.owners.find_one({"id": owner_id}, {"_id": 1})
         if not owner:
             raise HTTPException(status_code=404, detail="Owner not found")
         
-        # Get or create documentation
-        doc = await db.property_documentation.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not doc:
-            # Create new documentation for owner
-            new_doc = PropertyDocumentation(owner_id=owner_id)
-            await db.property_documentation.insert_one(new_doc.dict())
-            return new_doc.dict()
-        
-        return doc
+        return trusted_read(await load_documentation(owner_id, size, selected))
     except HTTPException:
         raise
     except Exception as e:
@@ -58,68 +130,57 @@ async def create_security_system_item(owner_id: str, item: SecuritySystemItemCre
     Create a new security system item
     """
     try:
-        # Get or create documentation
-        doc = await db.property_documentation.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not doc:
-            # Create new documentation
-            new_doc = PropertyDocumentation(owner_id=owner_id)
-            doc = new_doc.dict()
-        
         # Create new item
         new_item = SecuritySystemItem(**item.dict())
+        now = datetime.utcnow()
         
-        # Add to security_systems array
-        if "security_systems" not in doc:
-            doc["security_systems"] = []
-        
-        doc["security_systems"].append(new_item.dict())
-        doc["updated_at"] = datetime.utcnow()
-        
-        # Upsert document
+        # Push onto security_systems, creating the documentation if needed
+        defaults = DEFAULTS.on_insert(owner_id, exclude=("security_systems", "updated_at"))
         await db.property_documentation.update_one(
             {"owner_id": owner_id},
-            {"$set": doc},
+            {
+                "$push": {"security_systems": new_item.dict()},
+                "$set": {"updated_at": now},
+                "$setOnInsert": defaults
+            },
             upsert=True
         )
+        await section_cache.invalidate("property_documentation", owner_id)
         
         return new_item.dict()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create security system item: {str(e)}")
 
 @router.get("/owners/{owner_id}/documentation/security-systems")
-async def get_security_systems(owner_id: str):
+async def get_security_systems(owner_id: str, size: Optional[str] = None):
     """
     Get all security system items for an owner
     """
     try:
-        doc = await db.property_documentation.find_one({"owner_id": owner_id}, {"_id": 0})
+        doc = await fetch_documentation(owner_id)
         
         if not doc:
             return []
         
-        return doc.get("security_systems", [])
+        return trusted_read(apply_image_size(doc.get("security_systems", []), size))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch security systems: {str(e)}")
 
 @router.get("/owners/{owner_id}/documentation/security-systems/{item_id}")
-async def get_security_system_item(owner_id: str, item_id: str):
+async def get_security_system_item(owner_id: str, item_id: str, size: Optional[str] = None):
     """
     Get a specific security system item
     """
     try:
-        doc = await db.property_documentation.find_one({"owner_id": owner_id}, {"_id": 0})
+        doc = await db.property_documentation.find_one(
+            {"owner_id": owner_id, "security_systems.id": item_id},
+            {"_id": 0, "security_systems.$": 1}
+        )
         
         if not doc:
-            raise HTTPException(status_code=404, detail="Documentation not found")
-        
-        items = doc.get("security_systems", [])
-        item = next((i for i in items if i["id"] == item_id), None)
+            await raise_item_not_found(owner_id)
         
-        if not item:
-            raise HTTPException(status_code=404, detail="Security system item not found")
-        
-        return item
+        return trusted_read(apply_image_size(doc["security_systems"], size)[0])
     except HTTPException:
         raise
     except Exception as e:
@@ -131,34 +192,26 @@ async def update_security_system_item(owner_id: str, item_id: str, update_data:
     Update a security system item
     """
     try:
-        doc = await db.property_documentation.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not doc:
-            raise HTTPException(status_code=404, detail="Documentation not found")
-        
-        items = doc.get("security_systems", [])
-        item_index = next((i for i, item in enumerate(items) if item["id"] == item_id), None)
-        
-        if item_index is None:
-            raise HTTPException(status_code=404, detail="Security system item not found")
+        now = datetime.utcnow()
         
-        # Update item fields
+        # Update only the changed fields of the matched item
         update_dict = update_data.dict(exclude_unset=True)
-        for key, value in update_dict.items():
-            items[item_index][key] = value
-        
-        items[item_index]["updated_at"] = datetime.utcnow()
-        
-        # Update document
-        await db.property_documentation.update_one(
-            {"owner_id": owner_id},
-            {"$set": {
-                "security_systems": items,
-                "updated_at": datetime.utcnow()
-            }}
+        set_fields = {f"security_systems.$.{key}": value for key, value in update_dict.items()}
+        set_fields["security_systems.$.updated_at"] = now
+        set_fields["updated_at"] = now
+        
+        doc = await db.property_documentation.find_one_and_update(
+            {"owner_id": owner_id, "security_systems.id": item_id},
+            {"$set": set_fields},
+            projection={"_id": 0, "security_systems.$": 1},
+            return_document=ReturnDocument.AFTER
         )
+        await section_cache.invalidate("property_documentation", owner_id)
         
-        return items[item_index]
+        if not doc:
+            await raise_item_not_found(owner_id)
+        
+        return doc["security_systems"][0]
     except HTTPException:
         raise
     except Exception as e:
@@ -170,22 +223,24 @@ async def delete_security_system_item(owner_id: str, item_id: str):
     Delete a security system item
     """
     try:
-        doc = await db.property_documentation.find_one({"owner_id": owner_id}, {"_id": 0})
+        doc = await db.property_documentation.find_one_and_update(
+            {"owner_id": owner_id, "security_systems.id": item_id},
+            {
+                "$pull": {"security_systems": {"id": item_id}},
+                "$set": {"updated_at": datetime.utcnow()}
+            },
+            projection={"_id": 0, "security_systems.$": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        await section_cache.invalidate("property_documentation", owner_id)
         
         if not doc:
-            raise HTTPException(status_code=404, detail="Documentation not found")
-        
-        items = doc.get("security_systems", [])
-        items = [item for item in items if item["id"] != item_id]
-        
-        # Update document
-        await db.property_documentation.update_one(
-            {"owner_id": owner_id},
-            {"$set": {
-                "security_systems": items,
-                "updated_at": datetime.utcnow()
-            }}
-        )
+            if not await db.property_documentation.find_one({"owner_id": owner_id}, {"_id": 1}):
+                raise HTTPException(status_code=404, detail="Documentation not found")
+        else:
+            # Release the item's stored files
+            for url in uploaded_urls(doc["security_systems"][0]):
+                await release_upload(url)
         
         return {"message": "Security system item deleted successfully"}
     except HTTPException:
@@ -194,60 +249,44 @@ async def delete_security_system_item(owner_id: str, item_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to delete security system item: {str(e)}")
 
 @router.post("/owners/{owner_id}/documentation/security-systems/{item_id}/upload-image")
-async def upload_image(owner_id: str, item_id: str, file: UploadFile = File(...), caption: str = Form(None)):
+async def upload_image(owner_id: str, item_id: str, request: Request):
     """
     Upload an image for a security system item
+    (multipart/form-data, field "file" and an optional "caption")
     """
     try:
-        # Validate file type
-        if not file.content_type.startswith('image/'):
-            raise HTTPException(status_code=400, detail="File must be an image")
-        
-        # Generate unique filename
-        file_ext = file.filename.split('.')[-1]
-        unique_filename = f"{uuid4()}.{file_ext}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Create image URL (relative path)
-        image_url = f"/uploads/{unique_filename}"
+        # Stream the file to disk, checking its type and size as it arrives
+        upload = await receive_upload(request, "image", ("image/",), "File must be an image")
+        stored = upload.stored
         
         # Create DocumentationImage object
         doc_image = DocumentationImage(
-            url=image_url,
-            caption=caption
+            url=stored.url,
+            caption=upload.fields.get("caption")
         )
         
-        # Update item in database
-        doc = await db.property_documentation.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not doc:
-            raise HTTPException(status_code=404, detail="Documentation not found")
-        
-        items = doc.get("security_systems", [])
-        item_index = next((i for i, item in enumerate(items) if item["id"] == item_id), None)
-        
-        if item_index is None:
-            raise HTTPException(status_code=404, detail="Security system item not found")
-        
-        # Add image to item
-        if "images" not in items[item_index]:
-            items[item_index]["images"] = []
+        # Append image to the item
+        now = datetime.utcnow()
+        result = await db.property_documentation.update_one(
+            {"owner_id": owner_id, "security_systems.id": item_id},
+            {
+                "$push": {"security_systems.$.images": doc_image.dict()},
+                "$set": {"security_systems.$.updated_at": now, "updated_at": now}
+            }
+        )
+        await section_cache.invalidate("property_documentation", owner_id)
         
-        items[item_index]["images"].append(doc_image.dict())
-        items[item_index]["updated_at"] = datetime.utcnow()
+        if result.matched_count == 0:
+            await release_upload(stored.url)
+            await raise_item_not_found(owner_id)
         
-        # Update document
-        await db.property_documentation.update_one(
-            {"owner_id": owner_id},
-            {"$set": {
-                "security_systems": items,
-                "updated_at": datetime.utcnow()
-            }}
-        )
+        # Resize off the request path
+        await enqueue("documentation.image_derivatives", {
+            "owner_id": owner_id,
+            "item_id": item_id,
+            "image_id": doc_image.id,
+            "image_url": stored.url
+        })
         
         return doc_image.dict()
     except HTTPException:
@@ -256,68 +295,40 @@ async def upload_image(owner_id: str, item_id: str, file: UploadFile = File(...)
         raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
 
 @router.post("/owners/{owner_id}/documentation/security-systems/{item_id}/upload-document")
-async def upload_document(owner_id: str, item_id: str, file: UploadFile = File(...)):
+async def upload_document(owner_id: str, item_id: str, request: Request):
     """
-    Upload a document (PDF) for a security system item
+    Upload a document (PDF) for a security system item (multipart/form-data, field "file")
     """
     try:
-        # Validate file type
         allowed_types = ['application/pdf', 'application/msword', 
                         'application/vnd.openxmlformats-officedocument.wordprocessingml.document']
         
-        if file.content_type not in allowed_types:
-            raise HTTPException(status_code=400, detail="File must be PDF or Word document")
-        
-        # Generate unique filename
-        file_ext = file.filename.split('.')[-1]
-        unique_filename = f"{uuid4()}.{file_ext}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Get file size
-        file_size = file_path.stat().st_size
-        
-        # Create document URL
-        doc_url = f"/uploads/{unique_filename}"
+        # Stream the file to disk, checking its type and size as it arrives
+        upload = await receive_upload(request, "document", allowed_types, "File must be PDF or Word document")
+        stored = upload.stored
         
         # Create DocumentationFile object
         doc_file = DocumentationFile(
-            url=doc_url,
-            filename=file.filename,
-            file_type=file_ext,
-            size=file_size
+            url=stored.url,
+            filename=upload.filename,
+            file_type=upload.filename.split('.')[-1],
+            size=stored.size
         )
         
-        # Update item in database
-        doc = await db.property_documentation.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not doc:
-            raise HTTPException(status_code=404, detail="Documentation not found")
-        
-        items = doc.get("security_systems", [])
-        item_index = next((i for i, item in enumerate(items) if item["id"] == item_id), None)
-        
-        if item_index is None:
-            raise HTTPException(status_code=404, detail="Security system item not found")
-        
-        # Add document to item
-        if "documents" not in items[item_index]:
-            items[item_index]["documents"] = []
-        
-        items[item_index]["documents"].append(doc_file.dict())
-        items[item_index]["updated_at"] = datetime.utcnow()
-        
-        # Update document
-        await db.property_documentation.update_one(
-            {"owner_id": owner_id},
-            {"$set": {
-                "security_systems": items,
-                "updated_at": datetime.utcnow()
-            }}
+        # Append document to the item
+        now = datetime.utcnow()
+        result = await db.property_documentation.update_one(
+            {"owner_id": owner_id, "security_systems.id": item_id},
+            {
+                "$push": {"security_systems.$.documents": doc_file.dict()},
+                "$set": {"security_systems.$.updated_at": now, "updated_at": now}
+            }
         )
+        await section_cache.invalidate("property_documentation", owner_id)
+        
+        if result.matched_count == 0:
+            await release_upload(stored.url)
+            await raise_item_not_found(owner_id)
         
         return doc_file.dict()
     except HTTPException:
@@ -331,31 +342,29 @@ async def delete_image(owner_id: str, item_id: str, image_id: str):
     Delete an image from a security system item
     """
     try:
-        doc = await db.property_documentation.find_one({"owner_id": owner_id}, {"_id": 0})
+        now = datetime.utcnow()
+        doc = await db.property_documentation.find_one_and_update(
+            {"owner_id": owner_id, "security_systems.id": item_id},
+            {
+                "$pull": {"security_systems.$[item].images": {"id": image_id}},
+                "$set": {"security_systems.$[item].updated_at": now, "updated_at": now}
+            },
+            array_filters=[{"item.id": item_id}],
+            projection={"_id": 0, "security_systems.$": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        await section_cache.invalidate("property_documentation", owner_id)
         
         if not doc:
-            raise HTTPException(status_code=404, detail="Documentation not found")
-        
-        items = doc.get("security_systems", [])
-        item_index = next((i for i, item in enumerate(items) if item["id"] == item_id), None)
-        
-        if item_index is None:
-            raise HTTPException(status_code=404, detail="Security system item not found")
-        
-        # Remove image
-        images = items[item_index].get("images", [])
-        images = [img for img in images if img["id"] != image_id]
-        items[item_index]["images"] = images
-        items[item_index]["updated_at"] = datetime.utcnow()
-        
-        # Update document
-        await db.property_documentation.update_one(
-            {"owner_id": owner_id},
-            {"$set": {
-                "security_systems": items,
-                "updated_at": datetime.utcnow()
-            }}
-        )
+            await raise_item_not_found(owner_id)
+        
+        # Release the removed image's file
+        images = doc["security_systems"][0].get("images", [])
+        image = next((img for img in images if img["id"] == image_id), None)
+        if image:
+            await release_upload(image.get("url"))
+            for url in (image.get("derivatives") or {}).values():
+                await release_upload(url)
         
         return {"message": "Image deleted successfully"}
     except HTTPException:
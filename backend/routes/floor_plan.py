@@ -1,49 +1,55 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, Request
 from models.floor_plan import (
     FloorPlanData,
     FloorPlanUpdate,
     AnnotationCreate,
     Annotation
 )
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from database import db
+from responses import trusted_read
+from pymongo import ReturnDocument
+from uploads import receive_upload, release_upload
+from image_derivatives import create_derivatives, pick_size, release_derivatives
+from jobs import enqueue, job_handler
+from section_defaults import SectionDefaults
+from section_cache import section_cache
+from typing import Optional
 from datetime import datetime
-from uuid import uuid4
-import shutil
-from pathlib import Path
 
 router = APIRouter()
 
-# MongoDB connection
-mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'digihome')]
+# Empty floor plan, stored on first edit
+DEFAULTS = SectionDefaults("floor_plans", lambda: FloorPlanData(owner_id="").dict())
 
-# File upload directory
-UPLOAD_DIR = Path("/app/uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
+async def load_floor_plan(owner_id: str, size: Optional[str] = None):
+    """
+    Get the floor plan data of an existing owner,
+    or an empty floor plan if it has never been edited
+    """
+    data = await section_cache.get(
+        "floor_plans", owner_id,
+        lambda: db.floor_plans.find_one({"owner_id": owner_id}, {"_id": 0})
+    )
+    
+    if not data:
+        return DEFAULTS.document(owner_id)
+    
+    data["image_url"] = pick_size(data.get("image_url"), data.get("image_derivatives"), size)
+    return data
 
 @router.get("/owners/{owner_id}/floor-plan")
-async def get_floor_plan(owner_id: str):
+async def get_floor_plan(owner_id: str, size: Optional[str] = None):
     """
-    Get floor plan data for an owner
+    Get floor plan data for an owner.
+    size (thumbnail, medium, full) selects an image derivative when available
     """
     try:
         # Check if owner exists
-        owner = await db.owners.find_one({"id": owner_id}, {"_id": 0})
+        owner = await db.owners.find_one({"id": owner_id}, {"_id": 1})
         if not owner:
             raise HTTPException(status_code=404, detail="Owner not found")
         
-        # Get or create floor plan data
-        data = await db.floor_plans.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not data:
-            # Create new floor plan data for owner
-            new_data = FloorPlanData(owner_id=owner_id)
-            await db.floor_plans.insert_one(new_data.dict())
-            return new_data.dict()
-        
-        return data
+        return trusted_read(await load_floor_plan(owner_id, size))
     except HTTPException:
         raise
     except Exception as e:
@@ -55,68 +61,80 @@ async def update_floor_plan(owner_id: str, update_data: FloorPlanUpdate):
     Update floor plan comment and annotations
     """
     try:
-        data = await db.floor_plans.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not data:
-            # Create new data
-            new_data = FloorPlanData(owner_id=owner_id)
-            data = new_data.dict()
+        # Update fields, creating the floor plan if needed
+        set_fields = update_data.dict(exclude_unset=True)
+        set_fields["updated_at"] = datetime.utcnow()
         
-        # Update fields
-        update_dict = update_data.dict(exclude_unset=True)
-        for key, value in update_dict.items():
-            data[key] = value
-        
-        data["updated_at"] = datetime.utcnow()
-        
-        # Upsert document
-        await db.floor_plans.update_one(
+        data = await db.floor_plans.find_one_and_update(
             {"owner_id": owner_id},
-            {"$set": data},
-            upsert=True
+            {"$set": set_fields, "$setOnInsert": DEFAULTS.on_insert(owner_id, exclude=set_fields)},
+            projection={"_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
         )
+        await section_cache.invalidate("floor_plans", owner_id)
         
         return data
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update floor plan: {str(e)}")
 
+@job_handler("floor_plan.image_derivatives")
+async def attach_floor_plan_derivatives(owner_id: str, image_url: str):
+    """
+    Background job: generate derivatives and record them on the floor plan
+    """
+    derivatives = await create_derivatives(image_url)
+    if not derivatives:
+        return
+    
+    try:
+        result = await db.floor_plans.update_one(
+            {"owner_id": owner_id, "image_url": image_url},
+            {"$set": {"image_derivatives": derivatives}}
+        )
+        await section_cache.invalidate("floor_plans", owner_id)
+    except Exception:
+        # The retried job stores its own derivatives
+        await release_derivatives(derivatives)
+        raise
+    
+    # The image was replaced while its derivatives were being generated, or a
+    # redelivered job stored the same derivatives again: drop the extra references
+    if result.modified_count == 0:
+        await release_derivatives(derivatives)
+
 @router.post("/owners/{owner_id}/floor-plan/upload-image")
-async def upload_floor_plan_image(owner_id: str, file: UploadFile = File(...)):
+async def upload_floor_plan_image(owner_id: str, request: Request):
     """
-    Upload floor plan image
+    Upload floor plan image (multipart/form-data, field "file")
     """
     try:
-        # Validate file type
-        if not file.content_type.startswith('image/'):
-            raise HTTPException(status_code=400, detail="File must be an image")
-        
-        # Generate unique filename
-        file_ext = file.filename.split('.')[-1]
-        unique_filename = f"floor_plan_{uuid4()}.{file_ext}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Create image URL
-        image_url = f"/uploads/{unique_filename}"
-        
-        # Update database
-        data = await db.floor_plans.find_one({"owner_id": owner_id}, {"_id": 0})
+        # Stream the file to disk, checking its type and size as it arrives
+        upload = await receive_upload(request, "image", ("image/",), "File must be an image")
+        image_url = upload.stored.url
         
-        if not data:
-            new_data = FloorPlanData(owner_id=owner_id)
-            data = new_data.dict()
-        
-        data["image_url"] = image_url
-        data["updated_at"] = datetime.utcnow()
-        
-        await db.floor_plans.update_one(
+        # Set the image, creating the floor plan if needed
+        defaults = DEFAULTS.on_insert(owner_id, exclude=("image_url", "image_derivatives", "updated_at"))
+        previous = await db.floor_plans.find_one_and_update(
             {"owner_id": owner_id},
-            {"$set": data},
-            upsert=True
+            {
+                "$set": {"image_url": image_url, "image_derivatives": None, "updated_at": datetime.utcnow()},
+                "$setOnInsert": defaults
+            },
+            projection={"_id": 0, "image_url": 1, "image_derivatives": 1},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
         )
+        await section_cache.invalidate("floor_plans", owner_id)
+        
+        # Release the replaced image's file
+        if previous and previous.get("image_url"):
+            await release_upload(previous["image_url"])
+            for url in (previous.get("image_derivatives") or {}).values():
+                await release_upload(url)
+        
+        # Resize off the request path
+        await enqueue("floor_plan.image_derivatives", {"owner_id": owner_id, "image_url": image_url})
         
         return {"image_url": image_url}
     except HTTPException:
@@ -130,28 +148,22 @@ async def add_annotation(owner_id: str, annotation: AnnotationCreate):
     Add an annotation to the floor plan
     """
     try:
-        data = await db.floor_plans.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not data:
-            raise HTTPException(status_code=404, detail="Floor plan not found")
-        
         # Create new annotation
         new_annotation = Annotation(**annotation.dict())
         
-        if "annotations" not in data:
-            data["annotations"] = []
-        
-        data["annotations"].append(new_annotation.dict())
-        data["updated_at"] = datetime.utcnow()
-        
+        # Push onto annotations, creating the floor plan if needed
         await db.floor_plans.update_one(
             {"owner_id": owner_id},
-            {"$set": data}
+            {
+                "$push": {"annotations": new_annotation.dict()},
+                "$set": {"updated_at": datetime.utcnow()},
+                "$setOnInsert": DEFAULTS.on_insert(owner_id, exclude=("annotations", "updated_at"))
+            },
+            upsert=True
         )
+        await section_cache.invalidate("floor_plans", owner_id)
         
         return new_annotation.dict()
-    except HTTPException:
-        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to add annotation: {str(e)}")
 
@@ -161,21 +173,17 @@ async def delete_annotation(owner_id: str, annotation_id: str):
     Delete an annotation from the floor plan
     """
     try:
-        data = await db.floor_plans.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not data:
-            raise HTTPException(status_code=404, detail="Floor plan not found")
-        
-        # Remove annotation
-        annotations = data.get("annotations", [])
-        annotations = [ann for ann in annotations if ann["id"] != annotation_id]
-        data["annotations"] = annotations
-        data["updated_at"] = datetime.utcnow()
-        
-        await db.floor_plans.update_one(
+        result = await db.floor_plans.update_one(
             {"owner_id": owner_id},
-            {"$set": data}
+            {
+                "$pull": {"annotations": {"id": annotation_id}},
+                "$set": {"updated_at": datetime.utcnow()}
+            }
         )
+        await section_cache.invalidate("floor_plans", owner_id)
+        
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Floor plan not found")
         
         return {"message": "Annotation deleted successfully"}
     except HTTPException:
@@ -189,32 +197,25 @@ async def update_annotation(owner_id: str, annotation_id: str, annotation_update
     Update an annotation
     """
     try:
-        data = await db.floor_plans.find_one({"owner_id": owner_id}, {"_id": 0})
+        # Update only the sent fields of the matched annotation
+        update_dict = annotation_update.dict(exclude_unset=True)
+        set_fields = {f"annotations.$.{key}": value for key, value in update_dict.items()}
+        set_fields["updated_at"] = datetime.utcnow()
+        
+        data = await db.floor_plans.find_one_and_update(
+            {"owner_id": owner_id, "annotations.id": annotation_id},
+            {"$set": set_fields},
+            projection={"_id": 0, "annotations.$": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        await section_cache.invalidate("floor_plans", owner_id)
         
         if not data:
-            raise HTTPException(status_code=404, detail="Floor plan not found")
-        
-        # Find and update annotation
-        annotations = data.get("annotations", [])
-        annotation_index = next((i for i, ann in enumerate(annotations) if ann["id"] == annotation_id), None)
-        
-        if annotation_index is None:
+            if not await db.floor_plans.find_one({"owner_id": owner_id}, {"_id": 1}):
+                raise HTTPException(status_code=404, detail="Floor plan not found")
             raise HTTPException(status_code=404, detail="Annotation not found")
         
-        # Update annotation fields
-        update_dict = annotation_update.dict(exclude_unset=True)
-        for key, value in update_dict.items():
-            annotations[annotation_index][key] = value
-        
-        data["annotations"] = annotations
-        data["updated_at"] = datetime.utcnow()
-        
-        await db.floor_plans.update_one(
-            {"owner_id": owner_id},
-            {"$set": data}
-        )
-        
-        return annotations[annotation_index]
+        return data["annotations"][0]
     except HTTPException:
         raise
     except Exception as e:
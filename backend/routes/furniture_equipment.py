@@ -4,19 +4,19 @@ from models.furniture_equipment import (
     FurnitureItem,
     FurnitureItemCreate,
     FurnitureItemUpdate,
-    FurnitureEquipmentUpdate
+    FurnitureEquipmentUpdate,
+    FurnitureBulkCheck
 )
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from database import db
+from responses import trusted_read
+from pymongo import ReturnDocument
+from section_defaults import SectionDefaults
+from section_cache import section_cache
 from datetime import datetime
+import uuid
 
 router = APIRouter()
 
-# MongoDB connection
-mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'digihome')]
-
 # Default items for each category
 DEFAULT_KITCHEN_ITEMS = [
     {"name": "Stekepanner (Non-stick, induksjon)", "quantity": "2", "comment": "medium + stor"},
@@ -66,12 +66,17 @@ DEFAULT_HOUSEHOLD_ITEMS = [
     {"name": "Bøtte", "quantity": "1", "comment": ""}
 ]
 
+def default_item_id(category: str, name: str) -> str:
+    """Default items have the same id for every owner, so edits of a virtual checklist find them"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"furniture_equipment/{category}/{name}"))
+
 def create_default_items():
     """Create default furniture items"""
     items = []
     
     for item_data in DEFAULT_KITCHEN_ITEMS:
         items.append(FurnitureItem(
+            id=default_item_id("kitchen", item_data["name"]),
             name=item_data["name"],
             quantity=item_data["quantity"],
             comment=item_data["comment"],
@@ -81,6 +86,7 @@ def create_default_items():
     
     for item_data in DEFAULT_TABLEWARE_ITEMS:
         items.append(FurnitureItem(
+            id=default_item_id("tableware", item_data["name"]),
             name=item_data["name"],
             quantity=item_data["quantity"],
             comment=item_data["comment"],
@@ -90,6 +96,7 @@ def create_default_items():
     
     for item_data in DEFAULT_HOUSEHOLD_ITEMS:
         items.append(FurnitureItem(
+            id=default_item_id("household", item_data["name"]),
             name=item_data["name"],
             quantity=item_data["quantity"],
             comment=item_data["comment"],
@@ -99,6 +106,27 @@ def create_default_items():
     
     return items
 
+# Checklist with the default items, stored on first edit
+DEFAULTS = SectionDefaults(
+    "furniture_equipment",
+    lambda: FurnitureEquipmentData(owner_id="", items=[item.dict() for item in create_default_items()]).dict()
+)
+
+async def load_furniture_equipment(owner_id: str):
+    """
+    Get the furniture equipment checklist of an existing owner,
+    or the default checklist if it has never been edited
+    """
+    data = await section_cache.get(
+        "furniture_equipment", owner_id,
+        lambda: db.furniture_equipment.find_one({"owner_id": owner_id}, {"_id": 0})
+    )
+    
+    if not data:
+        return DEFAULTS.document(owner_id)
+    
+    return data
+
 @router.get("/owners/{owner_id}/furniture-equipment")
 async def get_furniture_equipment(owner_id: str):
     """
@@ -106,23 +134,11 @@ async def get_furniture_equipment(owner_id: str):
     """
     try:
         # Check if owner exists
-        owner = await db.owners.find_one({"id": owner_id}, {"_id": 0})
+        owner = await db.owners.find_one({"id": owner_id}, {"_id": 1})
         if not owner:
             raise HTTPException(status_code=404, detail="Owner not found")
         
-        # Get or create furniture equipment data
-        data = await db.furniture_equipment.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not data:
-            # Create new data with default items
-            new_data = FurnitureEquipmentData(
-                owner_id=owner_id,
-                items=[item.dict() for item in create_default_items()]
-            )
-            await db.furniture_equipment.insert_one(new_data.dict())
-            return new_data.dict()
-        
-        return data
+        return trusted_read(await load_furniture_equipment(owner_id))
     except HTTPException:
         raise
     except Exception as e:
@@ -134,91 +150,134 @@ async def update_furniture_equipment(owner_id: str, update_data: FurnitureEquipm
     Update general comments and confirmation status
     """
     try:
-        data = await db.furniture_equipment.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not data:
-            raise HTTPException(status_code=404, detail="Furniture equipment data not found")
+        # Update fields, creating the checklist if needed
+        set_fields = update_data.dict(exclude_unset=True)
+        set_fields["updated_at"] = datetime.utcnow()
         
-        # Update fields
-        update_dict = update_data.dict(exclude_unset=True)
-        for key, value in update_dict.items():
-            data[key] = value
-        
-        data["updated_at"] = datetime.utcnow()
-        
-        await db.furniture_equipment.update_one(
+        data = await db.furniture_equipment.find_one_and_update(
             {"owner_id": owner_id},
-            {"$set": data}
+            {"$set": set_fields, "$setOnInsert": DEFAULTS.on_insert(owner_id, exclude=set_fields)},
+            projection={"_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
         )
+        await section_cache.invalidate("furniture_equipment", owner_id)
         
         return data
-    except HTTPException:
-        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update furniture equipment: {str(e)}")
 
+def summarize_items(items):
+    """Count checked/total items per category"""
+    summary = {}
+    for item in items:
+        counts = summary.setdefault(item.get("category", "other"), {"checked": 0, "total": 0})
+        counts["total"] += 1
+        if item.get("checked"):
+            counts["checked"] += 1
+    return {
+        "categories": summary,
+        "checked": sum(c["checked"] for c in summary.values()),
+        "total": sum(c["total"] for c in summary.values())
+    }
+
 @router.post("/owners/{owner_id}/furniture-equipment/items")
 async def create_furniture_item(owner_id: str, item: FurnitureItemCreate):
     """
     Add a new furniture item to the checklist
     """
     try:
-        data = await db.furniture_equipment.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not data:
-            raise HTTPException(status_code=404, detail="Furniture equipment data not found")
-        
         # Create new item
         new_item = FurnitureItem(**item.dict())
         
-        if "items" not in data:
-            data["items"] = []
-        
-        data["items"].append(new_item.dict())
-        data["updated_at"] = datetime.utcnow()
+        async def push():
+            return await db.furniture_equipment.update_one(
+                {"owner_id": owner_id},
+                {
+                    "$push": {"items": new_item.dict()},
+                    "$set": {"updated_at": datetime.utcnow()}
+                }
+            )
         
-        await db.furniture_equipment.update_one(
-            {"owner_id": owner_id},
-            {"$set": data}
-        )
+        # First edit of a default checklist: store it, then add the item
+        if (await push()).matched_count == 0:
+            await DEFAULTS.materialize(owner_id)
+            await push()
+        await section_cache.invalidate("furniture_equipment", owner_id)
         
         return new_item.dict()
-    except HTTPException:
-        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create furniture item: {str(e)}")
 
-@router.put("/owners/{owner_id}/furniture-equipment/items/{item_id}")
-async def update_furniture_item(owner_id: str, item_id: str, update_data: FurnitureItemUpdate):
+@router.post("/owners/{owner_id}/furniture-equipment/items/bulk-check")
+async def bulk_check_furniture_items(owner_id: str, bulk_data: FurnitureBulkCheck):
     """
-    Update a furniture item (e.g., check/uncheck, edit details)
+    Check or uncheck a list of items, or a whole category, in one update.
+    Returns checked/total counts per category.
     """
     try:
-        data = await db.furniture_equipment.find_one({"owner_id": owner_id}, {"_id": 0})
+        if (bulk_data.item_ids is None) == (bulk_data.category is None):
+            raise HTTPException(status_code=400, detail="Provide either item_ids or category")
         
-        if not data:
-            raise HTTPException(status_code=404, detail="Furniture equipment data not found")
+        if bulk_data.item_ids is not None:
+            array_filter = {"item.id": {"$in": bulk_data.item_ids}}
+        else:
+            array_filter = {"item.category": bulk_data.category}
         
-        items = data.get("items", [])
-        item_index = next((i for i, item in enumerate(items) if item["id"] == item_id), None)
+        async def check():
+            return await db.furniture_equipment.find_one_and_update(
+                {"owner_id": owner_id},
+                {"$set": {
+                    "items.$[item].checked": bulk_data.checked,
+                    "updated_at": datetime.utcnow()
+                }},
+                array_filters=[array_filter],
+                projection={"_id": 0, "items.category": 1, "items.checked": 1},
+                return_document=ReturnDocument.AFTER
+            )
         
-        if item_index is None:
-            raise HTTPException(status_code=404, detail="Furniture item not found")
+        data = await check()
+        if not data:
+            await DEFAULTS.materialize(owner_id)
+            data = await check()
+        await section_cache.invalidate("furniture_equipment", owner_id)
         
-        # Update item fields
+        return summarize_items(data.get("items", []))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update furniture items: {str(e)}")
+
+@router.put("/owners/{owner_id}/furniture-equipment/items/{item_id}")
+async def update_furniture_item(owner_id: str, item_id: str, update_data: FurnitureItemUpdate):
+    """
+    Update a furniture item (e.g., check/uncheck, edit details)
+    """
+    try:
+        # Update only the sent fields of the matched item
         update_dict = update_data.dict(exclude_unset=True)
-        for key, value in update_dict.items():
-            items[item_index][key] = value
+        set_fields = {f"items.$.{key}": value for key, value in update_dict.items()}
+        set_fields["updated_at"] = datetime.utcnow()
         
-        data["items"] = items
-        data["updated_at"] = datetime.utcnow()
+        async def update():
+            return await db.furniture_equipment.find_one_and_update(
+                {"owner_id": owner_id, "items.id": item_id},
+                {"$set": set_fields},
+                projection={"_id": 0, "items.$": 1},
+                return_document=ReturnDocument.AFTER
+            )
         
-        await db.furniture_equipment.update_one(
-            {"owner_id": owner_id},
-            {"$set": data}
-        )
+        data = await update()
+        # The item may be a default item of a checklist that is not stored yet.
+        # Retry even if materialize() lost the race: the checklist exists either way.
+        if not data:
+            await DEFAULTS.materialize(owner_id)
+            data = await update()
+        await section_cache.invalidate("furniture_equipment", owner_id)
+        if not data:
+            raise HTTPException(status_code=404, detail="Furniture item not found")
         
-        return items[item_index]
+        return data["items"][0]
     except HTTPException:
         raise
     except Exception as e:
@@ -230,24 +289,20 @@ async def delete_furniture_item(owner_id: str, item_id: str):
     Delete a furniture item from the checklist
     """
     try:
-        data = await db.furniture_equipment.find_one({"owner_id": owner_id}, {"_id": 0})
-        
-        if not data:
-            raise HTTPException(status_code=404, detail="Furniture equipment data not found")
-        
-        items = data.get("items", [])
-        items = [item for item in items if item["id"] != item_id]
+        async def pull():
+            return await db.furniture_equipment.update_one(
+                {"owner_id": owner_id},
+                {
+                    "$pull": {"items": {"id": item_id}},
+                    "$set": {"updated_at": datetime.utcnow()}
+                }
+            )
         
-        data["items"] = items
-        data["updated_at"] = datetime.utcnow()
-        
-        await db.furniture_equipment.update_one(
-            {"owner_id": owner_id},
-            {"$set": data}
-        )
+        if (await pull()).matched_count == 0:
+            await DEFAULTS.materialize(owner_id)
+            await pull()
+        await section_cache.invalidate("furniture_equipment", owner_id)
         
         return {"message": "Furniture item deleted successfully"}
-    except HTTPException:
-        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete furniture item: {str(e)}")
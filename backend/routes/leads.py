@@ -1,15 +1,50 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from models.lead import Lead, LeadCreate
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from database import db
+from responses import trusted_read
+from field_selection import parse_fields, projection
+from jobs import enqueue, job_handler
+from admin_stats import invalidate_stats
+from pagination import MAX_PAGE_SIZE, created_range, list_page, parse_sort, search_filter
+from exports import export_columns, export_response
+from lead_import import detect_format, import_leads, lead_upsert
+from typing import Optional
+import logging
 from datetime import datetime
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# MongoDB connection
-mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'digihome')]
+SORT_FIELDS = ("created_at", "name")
+LEAD_UPSERT_ATTEMPTS = 2
+
+def lead_filter(status: Optional[str] = None, converted: Optional[bool] = None,
+                created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                q: Optional[str] = None) -> dict:
+    """
+    Build the Mongo filter for the lead list. An explicit status wins over converted.
+    q is a word search over name, email, phone and address, or a prefix of name, email or phone
+    """
+    query = created_range(created_from, created_to)
+    if status:
+        query["status"] = status
+    elif converted is not None:
+        query["status"] = "converted" if converted else {"$ne": "converted"}
+    if q and q.strip():
+        query.update(search_filter(q))
+    return query
+
+@job_handler("send_admin_notification")
+async def send_admin_notification(lead_id: str):
+    """
+    Notify the admin team about a new lead.
+    No e-mail provider is configured yet, so the notification is logged.
+    """
+    lead = await db.leads.find_one({"id": lead_id}, {"_id": 0})
+    if lead:
+        logger.info(f"New lead: {lead['name']} <{lead['email']}>, {lead['address']}")
 
 @router.post("/leads", response_model=Lead)
 async def create_lead(lead_data: LeadCreate):
@@ -18,49 +53,110 @@ async def create_lead(lead_data: LeadCreate):
     This triggers when user fills address, name, phone, email
     """
     try:
-        # Create lead object
-        lead = Lead(**lead_data.dict())
+        # One atomic upsert keyed on email (unique index): concurrent submissions
+        # of the same email end up as one lead, keeping its original id and created_at
+        for attempt in range(LEAD_UPSERT_ATTEMPTS):
+            try:
+                lead = await db.leads.find_one_and_update(
+                    {"email": lead_data.email},
+                    lead_upsert(lead_data),
+                    projection={"_id": 0},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+                break
+            except DuplicateKeyError:
+                # Lost an insert race on the unique index; the retry updates the winner
+                if attempt == LEAD_UPSERT_ATTEMPTS - 1:
+                    raise
+        invalidate_stats()
         
-        # Check if lead with this email already exists
-        existing_lead = await db.leads.find_one({"email": lead.email}, {"_id": 0})
-        if existing_lead:
-            # Update existing lead
-            await db.leads.update_one(
-                {"email": lead.email},
-                {"$set": lead.dict()}
-            )
-        else:
-            # Insert new lead
-            await db.leads.insert_one(lead.dict())
+        # Notify admin in the background
+        await enqueue("send_admin_notification", {"lead_id": lead["id"]})
         
-        # TODO: Send email notification to admin
-        # send_admin_notification(lead)
-        
-        return lead
+        return Lead(**lead)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create lead: {str(e)}")
 
+@router.post("/leads/import")
+async def import_leads_file(request: Request, format: Optional[str] = None):
+    """
+    Bulk import leads from a CSV (with header row) or NDJSON request body
+    The format is taken from the format parameter or the Content-Type header.
+    Leads are upserted by email; returns counts and per-row errors
+    """
+    try:
+        file_format = format or detect_format(request.headers.get("content-type"))
+        if not file_format:
+            raise HTTPException(status_code=400, detail="Unknown format. Pass format=csv or format=ndjson")
+        report = await import_leads(request.stream(), file_format.lower())
+        if report["inserted"] or report["updated"]:
+            invalidate_stats()
+        return report
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to import leads: {str(e)}")
+
 @router.get("/leads")
-async def get_all_leads(skip: int = 0, limit: int = 100):
+async def get_all_leads(response: Response, skip: int = Query(0, ge=0),
+                        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+                        status: Optional[str] = None, converted: Optional[bool] = None,
+                        created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                        q: Optional[str] = None, sort: str = "-created_at", fields: Optional[str] = None):
     """
-    Get all leads (for admin dashboard)
+    Get all leads (for admin dashboard), filtered and sorted server-side
+    sort is created_at or name, prefixed with - for descending.
+    fields is a comma-separated list of fields to return (default: all).
+    The number of matching leads is sent in the X-Total-Count header.
+    Pass cursor (empty for the first page) for keyset pagination;
+    the response is then {"items": [...], "next_cursor": ..., "total": ...}
     """
     try:
-        leads = await db.leads.find({}, {"_id": 0}).skip(skip).limit(limit).to_list(limit)
-        return leads
+        query = lead_filter(status, converted, created_from, created_to, q)
+        selected = projection(parse_fields(fields, Lead))
+        page, total = await list_page(db.leads, query, selected, parse_sort(sort, SORT_FIELDS), skip, limit, cursor)
+        
+        response.headers["X-Total-Count"] = str(total)
+        if cursor is not None:
+            page["total"] = total
+        return trusted_read(page, response)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch leads: {str(e)}")
 
+@router.get("/leads/export")
+async def export_leads(format: str = "ndjson", status: Optional[str] = None, converted: Optional[bool] = None,
+                       created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                       q: Optional[str] = None, sort: str = "-created_at", fields: Optional[str] = None):
+    """
+    Export all matching leads as NDJSON or CSV (format=ndjson|csv), streamed from the database
+    Takes the same filters and sort as the list endpoint.
+    fields selects the exported fields (default: all).
+    """
+    try:
+        query = lead_filter(status, converted, created_from, created_to, q)
+        selected_fields = parse_fields(fields, Lead)
+        return export_response(
+            db.leads, query, projection(selected_fields), parse_sort(sort, SORT_FIELDS),
+            format, export_columns(selected_fields, Lead), "leads"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export leads: {str(e)}")
+
 @router.get("/leads/{lead_id}")
-async def get_lead(lead_id: str):
+async def get_lead(lead_id: str, fields: Optional[str] = None):
     """
     Get a specific lead by ID
     """
     try:
-        lead = await db.leads.find_one({"id": lead_id}, {"_id": 0})
+        lead = await db.leads.find_one({"id": lead_id}, projection(parse_fields(fields, Lead)))
         if not lead:
             raise HTTPException(status_code=404, detail="Lead not found")
-        return lead
+        return trusted_read(lead)
     except HTTPException:
         raise
     except Exception as e:
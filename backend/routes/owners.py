@@ -1,16 +1,52 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
 from models.owner import Owner, OwnerCreate, OwnerResponse, OnboardingData
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
-from passlib.hash import bcrypt
+from database import db
+from responses import trusted_read
+from field_selection import SENSITIVE_FIELDS, parse_fields, projection
+from jobs import enqueue, job_handler
+from admin_stats import invalidate_stats
+from status_history import change_status, record_created
+from pagination import MAX_PAGE_SIZE, created_range, list_page, parse_sort, search_filter
+from exports import export_columns, export_response
+from pymongo.errors import DuplicateKeyError
+from typing import Optional
+import logging
+from passwords import hash_password, verify_password
 from datetime import datetime
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# MongoDB connection
-mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'digihome')]
+SORT_FIELDS = ("created_at", "name")
+STATUS_UPDATE_ATTEMPTS = 3
+
+def owner_filter(status: Optional[str] = None, converted: Optional[bool] = None,
+                 created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                 q: Optional[str] = None) -> dict:
+    """
+    Build the Mongo filter for the owner list.
+    converted selects owners with (or without) a linked lead.
+    q is a word search over name, email, phone and address, or a prefix of name, email or phone
+    """
+    query = created_range(created_from, created_to)
+    if status:
+        # Owners created before statuses existed count as "Ringt"
+        query["status"] = {"$in": [status, None]} if status == "Ringt" else status
+    if converted is not None:
+        query["lead_id"] = {"$ne": None} if converted else None
+    if q and q.strip():
+        query.update(search_filter(q))
+    return query
+
+@job_handler("send_welcome_email")
+async def send_welcome_email(owner_id: str):
+    """
+    Send the welcome e-mail to a new owner.
+    No e-mail provider is configured yet, so the e-mail is logged.
+    """
+    owner = await db.owners.find_one({"id": owner_id}, {"_id": 0, "name": 1, "email": 1})
+    if owner:
+        logger.info(f"Welcome e-mail for {owner['name']} <{owner['email']}>")
 
 @router.post("/owner-portal", response_model=OwnerResponse)
 async def create_owner_portal(owner_data: OwnerCreate):
@@ -25,7 +61,7 @@ async def create_owner_portal(owner_data: OwnerCreate):
             raise HTTPException(status_code=400, detail="Owner portal already exists for this email")
         
         # Hash the password
-        password_hash = bcrypt.hash(owner_data.password)
+        password_hash = await hash_password(owner_data.password)
         
         # Create owner object
         owner_dict = owner_data.dict()
@@ -33,22 +69,30 @@ async def create_owner_portal(owner_data: OwnerCreate):
         owner_dict['password_hash'] = password_hash
         
         owner = Owner(**owner_dict)
+        owner.status_changed_at = owner.created_at
         
         # Find corresponding lead and link it
-        lead = await db.leads.find_one({"email": owner_data.email}, {"_id": 0})
+        lead = await db.leads.find_one({"email": owner_data.email}, {"_id": 0, "id": 1})
         if lead:
             owner.lead_id = lead.get('id')
-            # Update lead status
+        
+        # Insert owner into database; the unique email index settles concurrent registrations
+        try:
+            await db.owners.insert_one(owner.dict())
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="Owner portal already exists for this email")
+        
+        # Update lead status once the owner exists
+        if lead:
             await db.leads.update_one(
-                {"email": owner_data.email},
+                {"id": lead['id']},
                 {"$set": {"status": "converted"}}
             )
+        await record_created(owner.dict())
+        invalidate_stats()
         
-        # Insert owner into database
-        await db.owners.insert_one(owner.dict())
-        
-        # TODO: Send welcome email to owner
-        # send_welcome_email(owner)
+        # Send welcome email in the background
+        await enqueue("send_welcome_email", {"owner_id": owner.id})
         
         # Return owner response (without password hash)
         return OwnerResponse(
@@ -68,30 +112,67 @@ async def create_owner_portal(owner_data: OwnerCreate):
 
 @router.get("/owner-portal/all")
 @router.get("/owners")
-async def get_all_owners(skip: int = 0, limit: int = 100):
+async def get_all_owners(response: Response, skip: int = Query(0, ge=0),
+                         limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+                         status: Optional[str] = None, converted: Optional[bool] = None,
+                         created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                         q: Optional[str] = None, sort: str = "-created_at", fields: Optional[str] = None):
     """
-    Get all owners (for admin dashboard)
+    Get all owners (for admin dashboard), filtered and sorted server-side
+    sort is created_at or name, prefixed with - for descending.
+    fields is a comma-separated list of fields to return (default: all but the password hash).
+    The number of matching owners is sent in the X-Total-Count header.
+    Pass cursor (empty for the first page) for keyset pagination;
+    the response is then {"items": [...], "next_cursor": ..., "total": ...}
     """
     try:
-        owners = await db.owners.find({}, {"_id": 0}).skip(skip).limit(limit).to_list(limit)
-        # Remove password hashes from response
-        for owner in owners:
-            owner.pop('password_hash', None)
-        return owners
+        query = owner_filter(status, converted, created_from, created_to, q)
+        sensitive = SENSITIVE_FIELDS["owners"]
+        selected = projection(parse_fields(fields, Owner, sensitive), sensitive)
+        page, total = await list_page(db.owners, query, selected, parse_sort(sort, SORT_FIELDS), skip, limit, cursor)
+        
+        response.headers["X-Total-Count"] = str(total)
+        if cursor is not None:
+            page["total"] = total
+        return trusted_read(page, response)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch owners: {str(e)}")
 
+@router.get("/owners/export")
+async def export_owners(format: str = "ndjson", status: Optional[str] = None, converted: Optional[bool] = None,
+                        created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                        q: Optional[str] = None, sort: str = "-created_at", fields: Optional[str] = None):
+    """
+    Export all matching owners as NDJSON or CSV (format=ndjson|csv), streamed from the database
+    Takes the same filters and sort as the list endpoint.
+    fields selects the exported fields (default: all but the password hash).
+    """
+    try:
+        query = owner_filter(status, converted, created_from, created_to, q)
+        sensitive = SENSITIVE_FIELDS["owners"]
+        selected_fields = parse_fields(fields, Owner, sensitive)
+        return export_response(
+            db.owners, query, projection(selected_fields, sensitive), parse_sort(sort, SORT_FIELDS),
+            format, export_columns(selected_fields, Owner, sensitive), "owners"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export owners: {str(e)}")
+
 @router.get("/owners/{owner_id}")
-async def get_owner(owner_id: str):
+async def get_owner(owner_id: str, fields: Optional[str] = None):
     """
     Get a specific owner by ID
     """
     try:
-        owner = await db.owners.find_one({"id": owner_id}, {"_id": 0})
+        sensitive = SENSITIVE_FIELDS["owners"]
+        owner = await db.owners.find_one({"id": owner_id}, projection(parse_fields(fields, Owner, sensitive), sensitive))
         if not owner:
             raise HTTPException(status_code=404, detail="Owner not found")
-        owner.pop('password_hash', None)
-        return owner
+        return trusted_read(owner)
     except HTTPException:
         raise
     except Exception as e:
@@ -125,7 +206,8 @@ async def update_onboarding(owner_id: str, onboarding_data: OnboardingData):
 @router.post("/owners/login")
 async def owner_login(email_data: dict):
     """
-    Login endpoint - checks if owner exists with given email
+    Login endpoint - checks if owner exists with given email.
+    When a password is sent it is verified as well.
     """
     try:
         email = email_data.get("email")
@@ -137,6 +219,19 @@ async def owner_login(email_data: dict):
         if not owner:
             raise HTTPException(status_code=404, detail="Ingen eierportal funnet. Vennligst registrer deg først.")
         
+        password = email_data.get("password")
+        if password is not None:
+            valid, new_hash = await verify_password(password, owner.get("password_hash", ""))
+            if not valid:
+                raise HTTPException(status_code=401, detail="Feil e-post eller passord")
+            
+            # Upgrade the stored hash when the configured cost has changed
+            if new_hash:
+                await db.owners.update_one(
+                    {"id": owner["id"], "password_hash": owner["password_hash"]},
+                    {"$set": {"password_hash": new_hash}}
+                )
+        
         # Return owner data (without password hash)
         owner.pop('password_hash', None)
         return owner
@@ -149,25 +244,45 @@ async def owner_login(email_data: dict):
 async def update_owner_status(owner_id: str, status: dict):
     """
     Update owner status
+    The transition is appended to the status history and the stage counters
     """
     try:
-        owner = await db.owners.find_one({"id": owner_id}, {"_id": 0})
-        if not owner:
-            raise HTTPException(status_code=404, detail="Owner not found")
-        
         valid_statuses = ["Ringt", "Sendt tilbud", "Onboarding", "Kontrakt", "Lost"]
         new_status = status.get("status")
         
         if new_status not in valid_statuses:
             raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {valid_statuses}")
         
-        await db.owners.update_one(
-            {"id": owner_id},
-            {"$set": {"status": new_status}}
-        )
+        status_fields = {"_id": 0, "id": 1, "status": 1, "status_changed_at": 1, "created_at": 1}
+        for _ in range(STATUS_UPDATE_ATTEMPTS):
+            owner = await db.owners.find_one({"id": owner_id}, status_fields)
+            if not owner:
+                raise HTTPException(status_code=404, detail="Owner not found")
+            if await change_status(owner, new_status):
+                break
+        else:
+            raise HTTPException(status_code=409, detail="Status was changed concurrently, please retry")
+        invalidate_stats()
         
         return {"message": "Status updated successfully", "owner_id": owner_id, "status": new_status}
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update status: {str(e)}")
+
+@router.get("/owners/{owner_id}/status-history")
+async def get_owner_status_history(owner_id: str):
+    """
+    Status transitions for an owner, oldest first
+    """
+    try:
+        history = await db.owner_status_history.find(
+            {"owner_id": owner_id}, {"_id": 0}
+        ).sort("changed_at", 1).to_list(1000)
+        if not history and not await db.owners.find_one({"id": owner_id}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Owner not found")
+        return trusted_read(history)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch status history: {str(e)}")
@@ -1,24 +1,36 @@
 from fastapi import APIRouter, HTTPException
-from typing import List
+from typing import List, Optional
 from uuid import uuid4
 from datetime import datetime, timezone
 from models.partner import Partner, PartnerCreate, PartnerUpdate
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from database import db
+from responses import ORJSONResponse, trusted_read
+from field_selection import parse_fields, projection
+from section_cache import section_cache
 
 router = APIRouter()
 
-# MongoDB connection
-mongo_url = os.environ.get('MONGO_URL')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'digihome')]
+async def load_partners(owner_id: str):
+    """Partners of an owner, as stored, through the section cache"""
+    return await section_cache.get(
+        "partners", owner_id,
+        lambda: db.partners.find({"owner_id": owner_id}, {"_id": 0}).to_list(1000)
+    )
 
 @router.get("/api/partners/{owner_id}", response_model=List[Partner])
-async def get_partners(owner_id: str):
-    """Get all partners for an owner"""
+async def get_partners(owner_id: str, fields: Optional[str] = None):
+    """Get all partners for an owner; fields selects the fields to return"""
     try:
-        partners = await db.partners.find({"owner_id": owner_id}, {"_id": 0}).to_list(1000)
-        return partners
+        selected = parse_fields(fields, Partner)
+        if selected:
+            # Sparse documents do not match response_model, so they bypass it
+            partners = await db.partners.find({"owner_id": owner_id}, projection(selected)).to_list(1000)
+            return ORJSONResponse(partners)
+        
+        partners = await load_partners(owner_id)
+        return trusted_read(partners)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -33,6 +45,7 @@ async def create_partner(owner_id: str, partner: PartnerCreate):
         partner_dict["updated_at"] = datetime.now(timezone.utc).isoformat()
         
         await db.partners.insert_one(partner_dict)
+        await section_cache.invalidate("partners", owner_id)
         return partner_dict
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -50,6 +63,7 @@ async def update_partner(owner_id: str, partner_id: str, partner_update: Partner
             return_document=True,
             projection={"_id": 0}
         )
+        await section_cache.invalidate("partners", owner_id)
         
         if not result:
             raise HTTPException(status_code=404, detail="Partner not found")
@@ -65,6 +79,7 @@ async def delete_partner(owner_id: str, partner_id: str):
     """Delete a partner"""
     try:
         result = await db.partners.delete_one({"id": partner_id, "owner_id": owner_id})
+        await section_cache.invalidate("partners", owner_id)
         
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Partner not found")
@@ -0,0 +1,233 @@
+"""
+Read cache for the per-owner section documents (documentation, access and
+locks, floor plan, furniture and equipment, partners).
+
+Entries are keyed by (collection, owner_id). They expire after
+SECTION_CACHE_TTL_SECONDS, and every handler that writes a section
+invalidates its entry. Values are stored pickled, so each reader gets its
+own copy and the stored size is known exactly.
+
+Each key has a generation that every invalidation bumps. A reader notes
+the generation before loading from Mongo and the value is stored with it,
+so a load that overlapped a write is never served afterwards.
+
+Backends:
+- SharedBackend: any store with the async get / set(ex=) / delete / incr /
+  expire / mget API of redis.asyncio, shared by every process. The
+  generations live in the store too, so a write in one process hides
+  loads that overlapped it in every other. Set SECTION_CACHE_URL to use
+  Redis (needs the optional redis package). LocalSharedStore is an
+  in-process stand-in for tests and benchmarks.
+- MemoryBackend: per-process LRU. An invalidation only reaches the
+  process that made the write. With several uvicorn workers, or a
+  standalone job worker, another process keeps serving its copy for up
+  to SECTION_CACHE_TTL_SECONDS after an edit.
+
+The cache is on by default only when SECTION_CACHE_URL is set. Set
+SECTION_CACHE_ENABLED=true to use the memory backend, which is only
+safe when a single process serves and writes the sections.
+"""
+from collections import OrderedDict
+import logging
+import os
+import pickle
+import time
+
+logger = logging.getLogger(__name__)
+
+SECTION_CACHE_URL = os.environ.get('SECTION_CACHE_URL')
+SECTION_CACHE_ENABLED = os.environ.get('SECTION_CACHE_ENABLED', 'true' if SECTION_CACHE_URL else 'false').lower() == 'true'
+SECTION_CACHE_MAX_ENTRIES = int(os.environ.get('SECTION_CACHE_MAX_ENTRIES', '10000'))
+SECTION_CACHE_TTL_SECONDS = float(os.environ.get('SECTION_CACHE_TTL_SECONDS', '60'))
+
+# Generations must outlive any load that started before the write that bumped them
+GENERATION_TTL_SECONDS = 24 * 3600
+
+
+class MemoryBackend:
+    """LRU with per-entry expiry, in this process"""
+
+    def __init__(self, max_entries: int = SECTION_CACHE_MAX_ENTRIES, ttl: float = SECTION_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires_at, blob)
+        self.bytes = 0
+        self.evictions = 0
+        # One generation for every key: an invalidation skips all loads in flight
+        self.generation = 0
+
+    async def get(self, key: str):
+        """(blob or None, generation to pass to set)"""
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] < time.monotonic():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            return None, self.generation
+        self.entries.move_to_end(key)
+        return entry[1], self.generation
+
+    async def set(self, key: str, blob: bytes, generation: int):
+        if generation != self.generation:
+            return
+        self._remove(key)
+        self.entries[key] = (time.monotonic() + self.ttl, blob)
+        self.bytes += len(blob)
+        while len(self.entries) > self.max_entries:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.bytes -= len(evicted)
+            self.evictions += 1
+
+    async def delete(self, key: str):
+        self.generation += 1
+        self._remove(key)
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry[1])
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "entries": len(self.entries), "bytes": self.bytes, "evictions": self.evictions}
+
+
+class SharedBackend:
+    """
+    Wraps a shared store client with the redis.asyncio API. Values are
+    stored as b"{generation}:{blob}" and only served while the key's
+    generation is unchanged.
+    """
+
+    def __init__(self, client, ttl: float = SECTION_CACHE_TTL_SECONDS, prefix: str = "section-cache:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str):
+        """(blob or None, generation to pass to set)"""
+        value, generation = await self.client.mget(self.prefix + key, self.prefix + "generation:" + key)
+        generation = generation or b"0"
+        if value is None:
+            return None, generation
+        value_generation, _, blob = value.partition(b":")
+        if value_generation != generation:
+            return None, generation
+        return blob, generation
+
+    async def set(self, key: str, blob: bytes, generation: bytes):
+        await self.client.set(self.prefix + key, generation + b":" + blob, ex=max(int(self.ttl), 1))
+
+    async def delete(self, key: str):
+        generation_key = self.prefix + "generation:" + key
+        await self.client.incr(generation_key)
+        await self.client.expire(generation_key, GENERATION_TTL_SECONDS)
+        await self.client.delete(self.prefix + key)
+
+    def stats(self) -> dict:
+        return {"backend": "shared"}
+
+
+class LocalSharedStore:
+    """In-process stand-in for a Redis client (get / set(ex=) / delete / incr / expire / mget)"""
+
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        value = self.values.get(key)
+        if value is None or value[0] < time.monotonic():
+            return None
+        return value[1]
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = (time.monotonic() + ex if ex else float("inf"), value)
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+    async def incr(self, key):
+        value = int(await self.get(key) or 0) + 1
+        expires_at = self.values[key][0] if key in self.values else float("inf")
+        self.values[key] = (expires_at, str(value).encode())
+        return value
+
+    async def expire(self, key, seconds):
+        if key in self.values:
+            self.values[key] = (time.monotonic() + seconds, self.values[key][1])
+
+    async def mget(self, *keys):
+        return [await self.get(key) for key in keys]
+
+
+class SectionCache:
+    def __init__(self, backend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(collection: str, owner_id: str) -> str:
+        return f"{collection}:{owner_id}"
+
+    async def get(self, collection: str, owner_id: str, load):
+        """
+        Return the cached value for (collection, owner_id), or await load()
+        and cache its result. None results are cached too.
+        """
+        if not self.enabled:
+            return await load()
+
+        key = self.key(collection, owner_id)
+        try:
+            blob, generation = await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Section cache read failed: {str(e)}")
+            blob, generation = None, None
+        if blob is not None:
+            self.hits += 1
+            return pickle.loads(blob)
+
+        self.misses += 1
+        value = await load()
+        # Stored under the generation read before loading: if a write bumped
+        # it meanwhile, the value may predate the write and is never served
+        if generation is not None:
+            try:
+                await self.backend.set(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), generation)
+            except Exception as e:
+                logger.warning(f"Section cache write failed: {str(e)}")
+        return value
+
+    async def invalidate(self, collection: str, owner_id: str):
+        """Called by every handler after it writes a section"""
+        self.invalidations += 1
+        if not self.enabled:
+            return
+        try:
+            await self.backend.delete(self.key(collection, owner_id))
+        except Exception as e:
+            logger.warning(f"Section cache invalidation failed: {str(e)}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            **self.backend.stats()
+        }
+
+
+def create_backend():
+    if SECTION_CACHE_URL:
+        import redis.asyncio
+
+        return SharedBackend(redis.asyncio.from_url(SECTION_CACHE_URL))
+    return MemoryBackend()
+
+
+section_cache = SectionCache(create_backend(), enabled=SECTION_CACHE_ENABLED)
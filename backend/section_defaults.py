@@ -0,0 +1,65 @@
+"""
+Default documents for the per-owner sections (documentation, access and
+locks, floor plan, furniture and equipment).
+
+An owner who has never edited a section has no document for it. GETs
+return a virtual default document built from a template. The template is
+built and pickled once, and unpickling yields an independent copy
+quickly. Nothing is written on read. The stored document is created by an
+upsert on the first mutation, so concurrent first edits cannot create
+duplicates.
+
+The id of a section document is derived from the collection and owner, so
+the virtual document and the one later stored share the same id.
+"""
+from pymongo.errors import DuplicateKeyError
+from database import db
+from datetime import datetime
+import pickle
+import uuid
+
+OWNER_FIELDS = ("id", "owner_id", "created_at", "updated_at")
+
+
+class SectionDefaults:
+    def __init__(self, collection: str, build):
+        """build() returns the default document as a dict (owner-specific fields are replaced)"""
+        self.collection = collection
+        template = build()
+        for field in OWNER_FIELDS:
+            template.pop(field, None)
+        self._template = pickle.dumps(template, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def section_id(self, owner_id: str) -> str:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{self.collection}/{owner_id}"))
+
+    def document(self, owner_id: str) -> dict:
+        """A fresh default document for owner_id"""
+        now = datetime.utcnow()
+        doc = {"id": self.section_id(owner_id), "owner_id": owner_id}
+        doc.update(pickle.loads(self._template))
+        doc["created_at"] = now
+        doc["updated_at"] = now
+        return doc
+
+    def on_insert(self, owner_id: str, exclude=()) -> dict:
+        """
+        Default fields for $setOnInsert, without owner_id (set by the filter)
+        and without the top-level fields in exclude (set by the update itself)
+        """
+        doc = self.document(owner_id)
+        for field in ("owner_id", *exclude):
+            doc.pop(field, None)
+        return doc
+
+    async def materialize(self, owner_id: str) -> bool:
+        """Store the default document if none exists; True if it was created"""
+        try:
+            result = await db[self.collection].update_one(
+                {"owner_id": owner_id},
+                {"$setOnInsert": self.on_insert(owner_id)},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False  # created concurrently
+        return result.upserted_id is not None
@@ -1,16 +1,29 @@
 from fastapi import FastAPI, APIRouter
-from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List
 import uuid
 from datetime import datetime, timezone
 
+# Load .env before the local imports below: several modules read their settings at import time
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from database import mongo, db
+from indexes import ensure_indexes, missing_required_indexes
+from uploads import UPLOAD_DIR, garbage_collection_loop
+from upload_files import UploadFiles
+from image_derivatives import shutdown_pool
+from jobs import JobWorker
+from responses import ORJSONResponse
+from status_history import ensure_counters
+
 # Import routes
 from routes.leads import router as leads_router
 from routes.owners import router as owners_router
@@ -19,18 +32,40 @@ from routes.access_locks import router as access_locks_router
 from routes.floor_plan import router as floor_plan_router
 from routes.furniture_equipment import router as furniture_equipment_router
 from routes.partners import router as partners_router
-
-
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
-
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'digihome')]
+from routes.admin import router as admin_router
+from routes.bundle import router as bundle_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One MongoDB client (and connection pool) shared by every router
+    await mongo.connect()
+    if os.environ.get('MONGO_ENSURE_INDEXES', 'true').lower() == 'true':
+        for error in await ensure_indexes(mongo.db):
+            logger.error(f"Index build failed: {error}")
+    missing = await missing_required_indexes(mongo.db)
+    if missing:
+        mongo.close()
+        raise RuntimeError(f"Required indexes missing: {missing}. "
+                           "Build them with: python indexes.py (--merge-duplicate-leads if lead emails are duplicated)")
+    try:
+        await ensure_counters(mongo.db)
+    except Exception as e:
+        logger.error(f"Owner status counters unavailable: {str(e)}")
+    upload_gc = asyncio.create_task(garbage_collection_loop())
+    job_worker = None
+    if os.environ.get('JOB_WORKER_INLINE', 'true').lower() == 'true':
+        job_worker = JobWorker()
+        job_worker.start()
+    yield
+    if job_worker:
+        await job_worker.stop()
+    upload_gc.cancel()
+    shutdown_pool()
+    mongo.close()
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -84,14 +119,14 @@ api_router.include_router(access_locks_router, tags=["access-locks"])
 api_router.include_router(floor_plan_router, tags=["floor-plan"])
 api_router.include_router(furniture_equipment_router, tags=["furniture-equipment"])
 api_router.include_router(partners_router, tags=["partners"])
+api_router.include_router(admin_router, tags=["admin"])
+api_router.include_router(bundle_router, tags=["bundle"])
 
 # Include the router in the main app
 app.include_router(api_router)
 
 # Mount uploads directory for static file serving
-UPLOAD_DIR = Path("/app/uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+app.mount("/uploads", UploadFiles(directory=str(UPLOAD_DIR)), name="uploads")
 
 app.add_middleware(
     CORSMiddleware,
@@ -99,6 +134,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "Content-Disposition"],
 )
 
 # Configure logging
@@ -107,7 +143,3 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""
+Owner status transitions and the precomputed pipeline counters.
+
+Every status change is appended to owner_status_history. In the same write
+path, the owner_status counters document is updated with $inc. It holds:
+- counts: owners currently in each status
+- time_in_stage: per status, a histogram of how long owners stayed
+  before leaving it
+
+Counts and time-in-stage percentiles are read from that one document, so
+neither needs a scan. The owner update is a compare-and-set on the
+previous status. Each transition is therefore recorded exactly once, even
+with concurrent updates.
+
+Rebuild the counters from the source collections with:
+
+    python status_history.py --rebuild
+"""
+from pymongo.errors import DuplicateKeyError
+from database import db
+from datetime import datetime
+from uuid import uuid4
+import asyncio
+import sys
+
+COUNTERS_ID = "owner_status"
+DEFAULT_STATUS = "Ringt"
+
+# Upper bounds (hours) of the time-in-stage histogram buckets; the last bucket is open-ended
+BUCKET_HOURS = [1, 4, 12, 24, 48, 72, 120, 168, 336, 504, 720, 1440, 2160, 4320, 8760]
+
+
+def bucket_index(seconds: float) -> int:
+    hours = seconds / 3600
+    for i, bound in enumerate(BUCKET_HOURS):
+        if hours <= bound:
+            return i
+    return len(BUCKET_HOURS)
+
+
+def histogram_percentile(histogram: dict, pct: float):
+    """
+    Percentile in hours from a {bucket_index: count} histogram, linearly
+    interpolated within the bucket. Returns None for an empty histogram.
+    """
+    counts = [histogram.get(str(i), 0) for i in range(len(BUCKET_HOURS) + 1)]
+    total = sum(counts)
+    if not total:
+        return None
+
+    rank = pct / 100 * total
+    seen = 0
+    for i, count in enumerate(counts):
+        if count and seen + count >= rank:
+            lower = BUCKET_HOURS[i - 1] if i else 0
+            if i == len(BUCKET_HOURS):
+                return float(lower)
+            return lower + (BUCKET_HOURS[i] - lower) * (rank - seen) / count
+        seen += count
+    return float(BUCKET_HOURS[-1])
+
+
+async def record_created(owner: dict):
+    """Count a new owner in its initial status"""
+    status = owner.get("status") or DEFAULT_STATUS
+    await db.owner_status_history.insert_one({
+        "id": str(uuid4()),
+        "owner_id": owner["id"],
+        "from_status": None,
+        "to_status": status,
+        "changed_at": owner["created_at"],
+        "seconds_in_previous": None
+    })
+    await db.counters.update_one(
+        {"_id": COUNTERS_ID},
+        {"$inc": {f"counts.{status}": 1}},
+        upsert=True
+    )
+
+
+async def change_status(owner: dict, new_status: str) -> bool:
+    """
+    Move owner (as read by the caller) to new_status.
+    Returns False if the owner changed status concurrently; re-read and retry.
+    """
+    old_status = owner.get("status") or DEFAULT_STATUS
+    if old_status == new_status:
+        return True
+
+    now = datetime.utcnow()
+    result = await db.owners.update_one(
+        {"id": owner["id"], "status": owner.get("status"), "status_changed_at": owner.get("status_changed_at")},
+        {"$set": {"status": new_status, "status_changed_at": now}}
+    )
+    if not result.modified_count:
+        return False
+
+    entered_at = owner.get("status_changed_at") or owner.get("created_at") or now
+    seconds = max((now - entered_at).total_seconds(), 0)
+    await db.owner_status_history.insert_one({
+        "id": str(uuid4()),
+        "owner_id": owner["id"],
+        "from_status": old_status,
+        "to_status": new_status,
+        "changed_at": now,
+        "seconds_in_previous": seconds
+    })
+    await db.counters.update_one(
+        {"_id": COUNTERS_ID},
+        {"$inc": {
+            f"counts.{old_status}": -1,
+            f"counts.{new_status}": 1,
+            f"time_in_stage.{old_status}.{bucket_index(seconds)}": 1
+        }},
+        upsert=True
+    )
+    return True
+
+
+async def pipeline_stats(percentiles=(50, 75, 90)) -> dict:
+    """Current counts and time-in-stage percentiles (hours) per status"""
+    counters = await db.counters.find_one({"_id": COUNTERS_ID}) or {}
+    counts = counters.get("counts", {})
+    time_in_stage = counters.get("time_in_stage", {})
+
+    stages = {}
+    for status in sorted(set(counts) | set(time_in_stage)):
+        histogram = time_in_stage.get(status, {})
+        stages[status] = {
+            "current": counts.get(status, 0),
+            "exited": sum(histogram.values()),
+            "hours_in_stage": {f"p{pct}": histogram_percentile(histogram, pct) for pct in percentiles}
+        }
+    return stages
+
+
+async def rebuild_counters(database=db):
+    """
+    Recompute the counters document from owners and the history.
+    Scans both collections; meant for first deployment and repairs.
+    """
+    counts = {}
+    async for row in database.owners.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+        status = row["_id"] or DEFAULT_STATUS
+        counts[status] = counts.get(status, 0) + row["count"]
+
+    time_in_stage = {}
+    async for row in database.owner_status_history.find(
+        {"from_status": {"$ne": None}},
+        {"_id": 0, "from_status": 1, "seconds_in_previous": 1}
+    ):
+        histogram = time_in_stage.setdefault(row["from_status"], {})
+        bucket = str(bucket_index(row["seconds_in_previous"]))
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+
+    await database.counters.replace_one(
+        {"_id": COUNTERS_ID},
+        {"counts": counts, "time_in_stage": time_in_stage, "rebuilt_at": datetime.utcnow()},
+        upsert=True
+    )
+
+
+async def ensure_counters(database=db):
+    """Build the counters document once if it does not exist yet"""
+    if await database.counters.find_one({"_id": COUNTERS_ID}, {"_id": 1}):
+        return
+    try:
+        await database.counters.insert_one({"_id": COUNTERS_ID, "counts": {}, "time_in_stage": {}})
+    except DuplicateKeyError:
+        return  # another worker is building it
+    await rebuild_counters(database)
+
+
+async def main():
+    from database import mongo
+
+    await mongo.connect()
+    try:
+        await rebuild_counters(mongo.db)
+        print("✅ Owner status counters rebuilt")
+    finally:
+        mongo.close()
+
+
+if __name__ == "__main__":
+    from pathlib import Path
+    from dotenv import load_dotenv
+
+    load_dotenv(Path(__file__).parent / '.env')
+    if "--rebuild" not in sys.argv[1:]:
+        print("Usage: python status_history.py --rebuild")
+        exit(1)
+    asyncio.run(main())
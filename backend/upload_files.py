@@ -0,0 +1,193 @@
+"""
+Static file serving for /uploads.
+
+Like StaticFiles, plus:
+- byte-range requests (single range), so video seeking works
+- strong ETags and If-None-Match / If-Range handling
+- Cache-Control: immutable for content-addressed ({sha256}.{ext}) names
+- file metadata (size, mtime, content type) cached in memory (LRU), so
+  a hot file is not stat-ed on every request
+- hidden paths (any component starting with ".") are never served, so
+  partial uploads in the staging directory stay private
+"""
+from fastapi.staticfiles import StaticFiles
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.concurrency import run_in_threadpool
+from collections import OrderedDict
+from email.utils import formatdate
+from functools import partial
+from pathlib import PurePath
+import mimetypes
+import os
+import re
+import stat
+
+CHUNK_SIZE = 256 * 1024
+METADATA_CACHE_SIZE = int(os.environ.get('UPLOAD_METADATA_CACHE_SIZE', '10000'))
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=86400"
+
+CONTENT_ADDRESSED_NAME = re.compile(r"^([0-9a-f]{64})\.[A-Za-z0-9]+$")
+RANGE_HEADER = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class FileMetadata:
+    __slots__ = ("full_path", "size", "last_modified", "content_type", "etag", "cache_control")
+
+    def __init__(self, full_path, stat_result, name):
+        self.full_path = full_path
+        self.size = stat_result.st_size
+        self.last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        self.content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+        content_hash = CONTENT_ADDRESSED_NAME.match(name)
+        if content_hash:
+            self.etag = f'"{content_hash.group(1)}"'
+            self.cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            self.etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+            self.cache_control = DEFAULT_CACHE_CONTROL
+
+
+class UploadFileResponse(Response):
+    """
+    Sends a whole file (200) or one byte range of it (206).
+    The file is opened before headers are sent, so a blob removed since its
+    metadata was cached still turns into a clean 404.
+    """
+
+    def __init__(self, metadata: FileMetadata, start: int, end: int, status_code: int, on_missing=None):
+        super().__init__(status_code=status_code, media_type=metadata.content_type)
+        self.metadata = metadata
+        self.start = start
+        self.end = end
+        self.on_missing = on_missing
+        self.headers.update(base_headers(metadata))
+        self.headers["content-length"] = str(end - start + 1 if metadata.size else 0)
+        if status_code == 206:
+            self.headers["content-range"] = f"bytes {start}-{end}/{metadata.size}"
+
+    async def __call__(self, scope, receive, send):
+        try:
+            file = await run_in_threadpool(open, self.metadata.full_path, "rb")
+        except FileNotFoundError:
+            if self.on_missing:
+                self.on_missing()
+            await Response("Not Found", status_code=404)(scope, receive, send)
+            return
+
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if scope["method"].upper() == "HEAD" or not self.metadata.size:
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            await run_in_threadpool(file.seek, self.start)
+            remaining = self.end - self.start + 1
+            while remaining > 0:
+                chunk = await run_in_threadpool(file.read, min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            await run_in_threadpool(file.close)
+
+
+def base_headers(metadata: FileMetadata):
+    return {
+        "accept-ranges": "bytes",
+        "etag": metadata.etag,
+        "last-modified": metadata.last_modified,
+        "cache-control": metadata.cache_control,
+    }
+
+
+def parse_range(header: str, size: int):
+    """
+    Parse a single "bytes=start-end" range. Returns (start, end), None when
+    the header should be ignored, or raises 416 when it cannot be satisfied.
+    """
+    match = RANGE_HEADER.match(header.strip())
+    if not match:
+        return None  # Multi-range and other units: serve the whole file
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise HTTPException(status_code=416)
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPException(status_code=416)
+    return start, end
+
+
+class UploadFiles(StaticFiles):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metadata_cache = OrderedDict()
+
+    async def get_metadata(self, path: str):
+        metadata = self.metadata_cache.get(path)
+        if metadata is not None:
+            self.metadata_cache.move_to_end(path)
+            return metadata
+
+        if any(part.startswith(".") for part in PurePath(path).parts):
+            raise HTTPException(status_code=404)
+
+        try:
+            full_path, stat_result = await run_in_threadpool(self.lookup_path, path)
+        except PermissionError:
+            raise HTTPException(status_code=401)
+        if not stat_result or not stat.S_ISREG(stat_result.st_mode):
+            raise HTTPException(status_code=404)
+
+        metadata = FileMetadata(full_path, stat_result, os.path.basename(path))
+        self.metadata_cache[path] = metadata
+        if len(self.metadata_cache) > METADATA_CACHE_SIZE:
+            self.metadata_cache.popitem(last=False)
+        return metadata
+
+    def forget(self, path: str):
+        self.metadata_cache.pop(path, None)
+
+    async def get_response(self, path: str, scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        metadata = await self.get_metadata(path)
+        headers = dict((k.decode("latin-1"), v.decode("latin-1")) for k, v in scope["headers"])
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and metadata.etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=base_headers(metadata))
+
+        on_missing = partial(self.forget, path)
+        last_byte = max(metadata.size - 1, 0)
+
+        range_header = headers.get("range")
+        if_range = headers.get("if-range")
+        if range_header and metadata.size and (not if_range or if_range == metadata.etag):
+            try:
+                byte_range = parse_range(range_header, metadata.size)
+            except HTTPException:
+                return Response(
+                    status_code=416,
+                    headers={**base_headers(metadata), "content-range": f"bytes */{metadata.size}"}
+                )
+            if byte_range:
+                return UploadFileResponse(metadata, *byte_range, status_code=206, on_missing=on_missing)
+
+        return UploadFileResponse(metadata, 0, last_byte, status_code=200, on_missing=on_missing)
@@ -0,0 +1,331 @@
+"""
+Shared upload pipeline for every route that stores user files.
+
+The multipart request body is parsed as it arrives and the file part is
+written in chunks straight to the upload directory, without a spooled
+temp file and without blocking the event loop. Size and SHA-256 are
+computed while writing, and per-type size limits are enforced from
+Content-Length and again on every chunk.
+
+Stored files are content addressed ({sha256}.{ext}), so identical uploads
+share one blob. Every blob has a reference count in the upload_blobs
+collection. Routes release their reference when an upload is removed or
+replaced, and collect_garbage() deletes unreferenced blobs in batches.
+"""
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from typing import Dict
+from database import db
+from datetime import datetime, timedelta
+from pathlib import Path
+from uuid import uuid4
+import asyncio
+import hashlib
+import logging
+import os
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+    from python_multipart.exceptions import MultipartParseError
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+    from multipart.exceptions import MultipartParseError
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = Path(os.environ.get('UPLOAD_DIR', '/app/uploads'))
+UPLOAD_DIR.mkdir(exist_ok=True)
+
+# In-progress and to-be-deleted files. Inside UPLOAD_DIR so moving a file
+# into the store is a rename on the same filesystem; UploadFiles never
+# serves hidden paths, so partial uploads are not downloadable.
+STAGING_DIR = UPLOAD_DIR / ".staging"
+STAGING_DIR.mkdir(exist_ok=True)
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+MB = 1024 * 1024
+MAX_UPLOAD_SIZES = {
+    "image": int(os.environ.get('MAX_IMAGE_UPLOAD_MB', '25')) * MB,
+    "document": int(os.environ.get('MAX_DOCUMENT_UPLOAD_MB', '50')) * MB,
+    "video": int(os.environ.get('MAX_VIDEO_UPLOAD_MB', '1024')) * MB,
+}
+
+# Room for boundaries, part headers and small form fields (e.g. a caption)
+MAX_FORM_OVERHEAD = 64 * 1024
+
+# Unreferenced blobs are kept this long before garbage collection
+GC_GRACE_PERIOD = timedelta(seconds=int(os.environ.get('UPLOAD_GC_GRACE_SECONDS', '3600')))
+GC_INTERVAL_SECONDS = int(os.environ.get('UPLOAD_GC_INTERVAL_SECONDS', '600'))
+GC_BATCH_SIZE = int(os.environ.get('UPLOAD_GC_BATCH_SIZE', '100'))
+
+
+class StoredUpload(BaseModel):
+    filename: str
+    url: str
+    size: int
+    sha256: str
+
+
+def too_large(kind: str):
+    limit_mb = MAX_UPLOAD_SIZES[kind] // MB
+    return HTTPException(status_code=413, detail=f"File is too large. Maximum {kind} size is {limit_mb} MB")
+
+
+class ReceivedUpload(BaseModel):
+    stored: StoredUpload
+    filename: str
+    content_type: str
+    fields: Dict[str, str] = {}
+
+
+class FormEvents:
+    """
+    MultipartParser callbacks. The parser calls them synchronously, so they
+    only queue events; receive_upload() handles them between reads.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.header_field = b""
+        self.header_value = b""
+
+    def on_part_begin(self):
+        self.events.append(("begin", None))
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        self.events.append(("data", data[start:end]))
+
+    def on_part_end(self):
+        self.events.append(("end", None))
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self.header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self.header_value += data[start:end]
+
+    def on_header_end(self):
+        self.events.append(("header", (self.header_field.lower(), self.header_value)))
+        self.header_field = b""
+        self.header_value = b""
+
+    def on_headers_finished(self):
+        self.events.append(("headers", None))
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+
+def type_allowed(content_type: str, allowed_types) -> bool:
+    """allowed_types holds exact types and prefixes ending in '/' (e.g. 'image/')"""
+    return any(
+        content_type.startswith(allowed) if allowed.endswith("/") else content_type == allowed
+        for allowed in allowed_types
+    )
+
+
+async def receive_upload(request: Request, kind: str, allowed_types, type_error: str, field: str = "file") -> ReceivedUpload:
+    """
+    Stream a multipart/form-data request body straight into STAGING_DIR and
+    take a reference to the file's blob. The body is parsed as it arrives,
+    so the file is written once, without a spooled temp file. kind selects
+    the size limit (image, document or video); the request is rejected as
+    soon as Content-Length or the bytes received exceed it, or the file's
+    content type is not in allowed_types. Other form fields are returned
+    in fields.
+    """
+    limit = MAX_UPLOAD_SIZES[kind]
+
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > limit + MAX_FORM_OVERHEAD:
+        raise too_large(kind)
+
+    form_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if form_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data body")
+
+    form = FormEvents()
+    parser = MultipartParser(params[b"boundary"], form.callbacks())
+
+    fields = {}
+    headers = {}
+    name = None
+    in_file = False
+    received = None
+    partial_path = None
+    buffer = None
+    digest = hashlib.sha256()
+    size = 0
+    form_size = 0
+
+    def write_chunk(buffer, chunk):
+        # hashlib releases the GIL for large buffers, so hash in the worker thread too
+        digest.update(chunk)
+        buffer.write(chunk)
+
+    try:
+        async for body_chunk in request.stream():
+            try:
+                parser.write(body_chunk)
+            except MultipartParseError:
+                raise HTTPException(status_code=400, detail="Malformed multipart body")
+
+            events, form.events = form.events, []
+            for event, value in events:
+                if event == "begin":
+                    headers = {}
+                elif event == "header":
+                    headers[value[0]] = value[1]
+                elif event == "headers":
+                    _, disposition = parse_options_header(headers.get(b"content-disposition", b""))
+                    name = disposition.get(b"name", b"").decode("latin-1")
+                    filename = disposition.get(b"filename")
+                    in_file = name == field and filename is not None and received is None
+                    if in_file:
+                        content_type = headers.get(b"content-type", b"").decode("latin-1")
+                        if not type_allowed(content_type, allowed_types):
+                            raise HTTPException(status_code=400, detail=type_error)
+                        received = (filename.decode("utf-8", "replace"), content_type)
+                        partial_path = STAGING_DIR / f"{uuid4()}.part"
+                        buffer = await run_in_threadpool(open, partial_path, "wb")
+                    else:
+                        fields[name] = b""
+                elif event == "data" and in_file:
+                    size += len(value)
+                    if size > limit:
+                        raise too_large(kind)
+                    await run_in_threadpool(write_chunk, buffer, value)
+                elif event == "data":
+                    form_size += len(value)
+                    if form_size > MAX_FORM_OVERHEAD:
+                        raise HTTPException(status_code=413, detail="Form fields are too large")
+                    fields[name] += value
+                elif event == "end" and in_file:
+                    await run_in_threadpool(buffer.close)
+                    in_file = False
+        parser.finalize()
+
+        if in_file:
+            raise HTTPException(status_code=400, detail="Incomplete multipart body")
+        if received is None:
+            raise HTTPException(status_code=400, detail=f"Missing file field '{field}'")
+
+        filename, content_type = received
+        file_ext = filename.split('.')[-1].lower()
+        stored = await store_blob(partial_path, digest.hexdigest(), size, file_ext)
+        return ReceivedUpload(
+            stored=stored,
+            filename=filename,
+            content_type=content_type,
+            fields={name: value.decode("utf-8", "replace") for name, value in fields.items()}
+        )
+    except BaseException:
+        if buffer is not None:
+            await run_in_threadpool(buffer.close)
+            await run_in_threadpool(partial_path.unlink, True)
+        raise
+
+
+async def store_blob(path: Path, sha256: str, size: int, file_ext: str) -> StoredUpload:
+    """
+    Move a fully written file into the content-addressed store and take a
+    reference to its blob.
+    """
+    filename = f"{sha256}.{file_ext}"
+
+    # Take the reference before the blob is (re)placed so a concurrent
+    # garbage collection run cannot delete it underneath us
+    now = datetime.utcnow()
+    await db.upload_blobs.update_one(
+        {"_id": filename},
+        {
+            "$inc": {"refcount": 1},
+            "$set": {"updated_at": now, "zero_since": None},
+            "$setOnInsert": {"sha256": sha256, "size": size, "created_at": now}
+        },
+        upsert=True
+    )
+    # Identical content, so replacing an existing blob is harmless
+    await run_in_threadpool(os.replace, path, UPLOAD_DIR / filename)
+
+    return StoredUpload(
+        filename=filename,
+        url=f"/uploads/{filename}",
+        size=size,
+        sha256=sha256
+    )
+
+
+async def release_upload(url: str):
+    """
+    Drop one reference to the blob behind an /uploads URL.
+    Blobs that reach zero references become eligible for garbage collection.
+    """
+    if not url or not url.startswith("/uploads/"):
+        return
+    await db.upload_blobs.update_one(
+        {"_id": url[len("/uploads/"):]},
+        [
+            {"$set": {"refcount": {"$add": ["$refcount", -1]}, "updated_at": "$$NOW"}},
+            {"$set": {"zero_since": {"$cond": [{"$lte": ["$refcount", 0]}, "$$NOW", None]}}}
+        ]
+    )
+
+
+async def collect_garbage(batch_size: int = GC_BATCH_SIZE) -> int:
+    """
+    Delete up to batch_size blobs that have been unreferenced for longer
+    than the grace period. Uses the zero_since index instead of scanning
+    UPLOAD_DIR. Returns the number of blobs removed.
+    """
+    cutoff = datetime.utcnow() - GC_GRACE_PERIOD
+    candidates = await db.upload_blobs.find(
+        {"zero_since": {"$lte": cutoff}},
+        {"_id": 1}
+    ).limit(batch_size).to_list(batch_size)
+
+    removed = 0
+    for blob in candidates:
+        path = UPLOAD_DIR / blob["_id"]
+        trash_path = STAGING_DIR / f"{blob['_id']}.gc"
+
+        # Move the file aside first; put it back if the blob was re-referenced
+        try:
+            await run_in_threadpool(os.replace, path, trash_path)
+        except FileNotFoundError:
+            trash_path = None
+
+        result = await db.upload_blobs.delete_one(
+            {"_id": blob["_id"], "refcount": {"$lte": 0}, "zero_since": {"$lte": cutoff}}
+        )
+        if trash_path is None:
+            removed += result.deleted_count
+        elif result.deleted_count:
+            await run_in_threadpool(trash_path.unlink, True)
+            removed += 1
+        else:
+            await run_in_threadpool(os.replace, trash_path, path)
+
+    if removed:
+        logger.info(f"Upload garbage collection removed {removed} blob(s)")
+    return removed
+
+
+async def garbage_collection_loop():
+    """Run collect_garbage() every GC_INTERVAL_SECONDS until cancelled"""
+    while True:
+        await asyncio.sleep(GC_INTERVAL_SECONDS)
+        try:
+            await collect_garbage()
+        except Exception as e:
+            logger.error(f"Upload garbage collection failed: {str(e)}")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Admin stats benchmark
+Seeds 1M leads (and 10% as owners) in a benchmark database, times the
+aggregation pipelines behind /admin/stats once, then measures cached
+StatsCache.get() latency while lead writes keep invalidating it.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'digihome_bench')
+
+import admin_stats  # noqa: E402
+from database import mongo  # noqa: E402
+from _common import percentile  # noqa: E402
+
+LEADS = int(os.environ.get('BENCH_LEADS', '1000000'))
+READS = int(os.environ.get('BENCH_READS', '20000'))
+WRITE_EVERY = int(os.environ.get('BENCH_WRITE_EVERY', '50'))
+LEAD_STATUSES = ["new", "contacted", "converted", "rejected"]
+OWNER_STATUSES = ["Ringt", "Sendt tilbud", "Onboarding", "Kontrakt", "Lost"]
+
+
+async def seed(db):
+    if await db.leads.estimated_document_count() >= LEADS:
+        return
+    await db.leads.delete_many({})
+    await db.owners.delete_many({})
+    start = datetime.utcnow() - timedelta(days=365)
+    for offset in range(0, LEADS, 10000):
+        leads, owners = [], []
+        for i in range(offset, min(offset + 10000, LEADS)):
+            lead = {
+                "id": str(uuid.uuid4()),
+                "address": f"Benchmarkveien {i}",
+                "name": f"Lead {i}",
+                "phone": "+47 00000000",
+                "email": f"lead{i}@bench.example.no",
+                "created_at": start + timedelta(seconds=i * 365 * 86400 // LEADS),
+                "status": random.choice(LEAD_STATUSES),
+            }
+            leads.append(lead)
+            if lead["status"] == "converted" or i % 10 == 0:
+                owners.append({
+                    "id": str(uuid.uuid4()),
+                    "lead_id": lead["id"] if lead["status"] == "converted" else None,
+                    "name": lead["name"],
+                    "email": lead["email"],
+                    "created_at": lead["created_at"],
+                    "status": random.choice(OWNER_STATUSES),
+                })
+        await db.leads.insert_many(leads, ordered=False)
+        if owners:
+            await db.owners.insert_many(owners, ordered=False)
+
+
+async def main():
+    await mongo.connect()
+    db = mongo.db
+    try:
+        await seed(db)
+        print(f"Leads: {await db.leads.estimated_document_count()}, owners: {await db.owners.estimated_document_count()}")
+
+        start = time.perf_counter()
+        await admin_stats.compute_stats()
+        print(f"Aggregation pipelines (uncached): {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        cache = admin_stats.StatsCache(admin_stats.compute_stats, admin_stats.STATS_CACHE_TTL_SECONDS)
+        await cache.get()
+        latencies = []
+        for i in range(READS):
+            if i % WRITE_EVERY == 0:
+                cache.invalidate()
+            start = time.perf_counter()
+            await cache.get()
+            latencies.append((time.perf_counter() - start) * 1000)
+        if cache.refresh_task:
+            await cache.refresh_task
+        print(f"Cached reads ({READS}, invalidated every {WRITE_EVERY}): "
+              f"p50 {percentile(latencies, 50):.3f} ms, p99 {percentile(latencies, 99):.3f} ms, "
+              f"max {max(latencies):.3f} ms")
+    finally:
+        mongo.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
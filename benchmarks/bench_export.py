@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Lead export benchmark
+Seeds a leads collection with 1M rows (if not already present), then
+streams GET /api/leads/export as NDJSON and CSV. Reports time to first
+byte, total time, rows/sec and MB/s. Set BENCH_SERVER_PID to the uvicorn
+process id to also sample its resident memory during the export, which
+should stay flat.
+"""
+
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import requests
+from pymongo import MongoClient
+
+BACKEND_URL = os.environ.get('REACT_APP_BACKEND_URL', 'http://localhost:8001')
+API_BASE = f"{BACKEND_URL}/api"
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.environ.get('DB_NAME', 'digihome')
+LEADS = int(os.environ.get('BENCH_LEADS', '1000000'))
+SERVER_PID = os.environ.get('BENCH_SERVER_PID')
+
+
+def seed(db):
+    existing = db.leads.estimated_document_count()
+    if existing >= LEADS:
+        return
+    start = datetime.utcnow() - timedelta(days=365)
+    batch = []
+    for i in range(existing, LEADS):
+        batch.append({
+            "id": str(uuid.uuid4()),
+            "address": f"Benchmarkveien {i}",
+            "name": f"Lead {i}",
+            "phone": "+47 00000000",
+            "email": f"lead{i}@bench.example.no",
+            "created_at": start + timedelta(seconds=i * 30),
+            "status": "new",
+            "notes": None,
+        })
+        if len(batch) == 10000:
+            db.leads.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db.leads.insert_many(batch, ordered=False)
+
+
+def rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class MemorySampler(threading.Thread):
+    def __init__(self, pid, interval=0.2):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self.running = True
+
+    def run(self):
+        while self.running:
+            self.samples.append(rss_mb(self.pid))
+            time.sleep(self.interval)
+
+
+def export(file_format):
+    start = time.perf_counter()
+    first_byte = None
+    size = 0
+    lines = 0
+    with requests.get(f"{API_BASE}/leads/export", params={"format": file_format}, stream=True) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            size += len(chunk)
+            lines += chunk.count(b"\n")
+    rows = lines - 1 if file_format == "csv" else lines  # CSV header
+    return first_byte or 0.0, time.perf_counter() - start, rows, size
+
+
+if __name__ == "__main__":
+    db = MongoClient(MONGO_URL)[DB_NAME]
+    seed(db)
+    print(f"Leads: {db.leads.estimated_document_count()}")
+    print(" format | first byte (ms) | seconds |  rows/sec |  MB/s | rows" + (" | server RSS MB (start/max)" if SERVER_PID else ""))
+
+    for file_format in ("ndjson", "csv"):
+        sampler = None
+        if SERVER_PID:
+            sampler = MemorySampler(SERVER_PID)
+            sampler.start()
+        first_byte, elapsed, rows, size = export(file_format)
+        line = (f" {file_format:<6} | {first_byte * 1000:>15.1f} | {elapsed:>7.1f} | {rows / elapsed:>9.0f} |"
+                f" {size / 1024 / 1024 / elapsed:>5.1f} | {rows}")
+        if sampler:
+            sampler.running = False
+            sampler.join()
+            line += f" | {sampler.samples[0]:.0f}/{max(sampler.samples):.0f}"
+        print(line)
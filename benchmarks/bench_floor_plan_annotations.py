@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Floor plan annotation edit benchmark
+Seeds floor plans with a growing number of annotations directly in MongoDB
+and measures PUT /api/owners/{owner_id}/floor-plan/annotations/{id} latency.
+Latency per edit should stay flat as the plan grows.
+"""
+
+import os
+import time
+import uuid
+from datetime import datetime
+
+import requests
+from pymongo import MongoClient
+
+from _common import percentile
+
+BACKEND_URL = os.environ.get('REACT_APP_BACKEND_URL', 'http://localhost:8001')
+API_BASE = f"{BACKEND_URL}/api"
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.environ.get('DB_NAME', 'digihome')
+PLAN_SIZES = [10, 100, 1000, 5000]
+EDITS = int(os.environ.get('BENCH_EDITS', '200'))
+
+
+def seed_floor_plan(db, size):
+    owner_id = f"bench-{uuid.uuid4()}"
+    annotations = [
+        {
+            "id": str(uuid.uuid4()),
+            "type": "marker",
+            "x": i % 100,
+            "y": i // 100,
+            "text": f"Marker {i}",
+            "width": None,
+            "height": None,
+            "color": "#000000",
+            "created_at": datetime.utcnow(),
+        }
+        for i in range(size)
+    ]
+    db.floor_plans.insert_one({
+        "id": str(uuid.uuid4()),
+        "owner_id": owner_id,
+        "image_url": None,
+        "comment": None,
+        "annotations": annotations,
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+    })
+    return owner_id, [a["id"] for a in annotations]
+
+
+def run(db, session, size):
+    owner_id, annotation_ids = seed_floor_plan(db, size)
+    latencies = []
+    try:
+        for i in range(EDITS):
+            annotation_id = annotation_ids[i % len(annotation_ids)]
+            start = time.perf_counter()
+            response = session.put(
+                f"{API_BASE}/owners/{owner_id}/floor-plan/annotations/{annotation_id}",
+                json={"type": "marker", "x": i % 100, "y": 50},
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+    finally:
+        db.floor_plans.delete_one({"owner_id": owner_id})
+
+    mean = sum(latencies) / len(latencies)
+    print(f"{size:>11} | {mean:>9.2f} | {percentile(latencies, 99):>8.2f}")
+
+
+if __name__ == "__main__":
+    db = MongoClient(MONGO_URL)[DB_NAME]
+    session = requests.Session()
+    print(f"Edits per plan size: {EDITS}")
+    print("annotations | mean (ms) | p99 (ms)")
+    for plan_size in PLAN_SIZES:
+        run(db, session, plan_size)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Dashboard image bytes benchmark
+Seeds one owner with camera-sized security system images and a floor plan,
+waits for derivatives, then compares the bytes an owner dashboard load
+downloads with full-resolution images against ?size=thumbnail.
+"""
+
+import io
+import os
+import time
+import uuid
+
+import requests
+from PIL import Image
+
+BACKEND_URL = os.environ.get('REACT_APP_BACKEND_URL', 'http://localhost:8001')
+API_BASE = f"{BACKEND_URL}/api"
+IMAGES = int(os.environ.get('BENCH_IMAGES', '12'))
+CAMERA_SIZE = (4032, 3024)
+
+
+def camera_jpeg():
+    """Noisy 12 MP JPEG, roughly the size of a phone photo"""
+    image = Image.effect_noise(CAMERA_SIZE, 64).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=92)
+    return buffer.getvalue()
+
+
+def dashboard_bytes(session, owner_id, size=None):
+    """JSON plus every image the documentation and floor plan views show"""
+    params = {"size": size} if size else {}
+    total = 0
+    documentation = session.get(f"{API_BASE}/owners/{owner_id}/documentation", params=params)
+    floor_plan = session.get(f"{API_BASE}/owners/{owner_id}/floor-plan", params=params)
+    total += len(documentation.content) + len(floor_plan.content)
+
+    urls = [image["url"] for item in documentation.json()["security_systems"] for image in item["images"]]
+    if floor_plan.json().get("image_url"):
+        urls.append(floor_plan.json()["image_url"])
+    for url in urls:
+        total += len(session.get(f"{BACKEND_URL}{url}").content)
+    return total
+
+
+if __name__ == "__main__":
+    session = requests.Session()
+    owner = session.post(f"{API_BASE}/owner-portal", json={
+        "address": "Benchmark gate 1",
+        "name": "Benchmark Owner",
+        "phone": "+47 00000000",
+        "email": f"bench.{uuid.uuid4().hex[:8]}@example.no",
+        "password": "benchmark",
+    }).json()
+    owner_id = owner["id"]
+
+    item = session.post(
+        f"{API_BASE}/owners/{owner_id}/documentation/security-systems",
+        json={"name": "Sikringsskap (Hoved)", "location": "Gang", "system_type": "Sikringsskap"},
+    ).json()
+    for i in range(IMAGES):
+        session.post(
+            f"{API_BASE}/owners/{owner_id}/documentation/security-systems/{item['id']}/upload-image",
+            files={"file": (f"photo_{i}.jpg", camera_jpeg(), "image/jpeg")},
+        )
+    session.post(
+        f"{API_BASE}/owners/{owner_id}/floor-plan/upload-image",
+        files={"file": ("plan.jpg", camera_jpeg(), "image/jpeg")},
+    )
+
+    # Wait for background derivative generation
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        images = session.get(f"{API_BASE}/owners/{owner_id}/documentation/security-systems/{item['id']}").json()["images"]
+        plan = session.get(f"{API_BASE}/owners/{owner_id}/floor-plan").json()
+        if all(image.get("derivatives") for image in images) and plan.get("image_derivatives"):
+            break
+        time.sleep(1)
+
+    full = dashboard_bytes(session, owner_id)
+    print(f"Images per dashboard: {IMAGES + 1}")
+    print(f"{'original':<10} | {full / 1024 / 1024:>8.2f} MB")
+    for size in ("thumbnail", "medium"):
+        resized = dashboard_bytes(session, owner_id, size)
+        print(f"{size:<10} | {resized / 1024 / 1024:>8.2f} MB | {100 * resized / full:>5.1f}% of original")
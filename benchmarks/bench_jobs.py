@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Background job throughput benchmark
+Enqueues no-op jobs against a local mongod and measures jobs/sec for a
+range of worker concurrencies and worker process counts.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from multiprocessing import Process
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'digihome_bench')
+os.environ.setdefault('JOB_POLL_INTERVAL_SECONDS', '0.05')
+
+import jobs  # noqa: E402
+from database import mongo  # noqa: E402
+
+JOBS = int(os.environ.get('BENCH_JOBS', '20000'))
+CONCURRENCIES = [1, 4, 16, 64]
+PROCESS_COUNTS = [1, 2, 4]
+PROCESS_CONCURRENCY = 16
+
+
+@jobs.job_handler("bench.noop")
+async def noop(index: int):
+    return index
+
+
+async def fill_queue():
+    await mongo.db.jobs.delete_many({"type": "bench.noop"})
+    batch = []
+    for i in range(JOBS):
+        batch.append(jobs.enqueue("bench.noop", {"index": i}))
+        if len(batch) == 500:
+            await asyncio.gather(*batch)
+            batch = []
+    await asyncio.gather(*batch)
+
+
+async def pending():
+    return await mongo.db.jobs.count_documents({"type": "bench.noop", "status": {"$ne": "done"}})
+
+
+async def drain(concurrency):
+    worker = jobs.JobWorker(concurrency)
+    worker.start()
+    while await pending():
+        await asyncio.sleep(0.05)
+    await worker.stop()
+
+
+def run_process(concurrency):
+    async def main():
+        await mongo.connect()
+        await drain(concurrency)
+        mongo.close()
+    asyncio.run(main())
+
+
+async def bench_in_process(concurrency):
+    await fill_queue()
+    start = time.perf_counter()
+    await drain(concurrency)
+    elapsed = time.perf_counter() - start
+    print(f"{'1 process':<12} | concurrency {concurrency:>3} | {JOBS / elapsed:>8.0f} jobs/s")
+
+
+def bench_processes(count):
+    async def setup():
+        await mongo.connect()
+        await fill_queue()
+        mongo.close()
+    asyncio.run(setup())
+
+    start = time.perf_counter()
+    processes = [Process(target=run_process, args=(PROCESS_CONCURRENCY,)) for _ in range(count)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+    print(f"{f'{count} processes':<12} | concurrency {PROCESS_CONCURRENCY:>3} | {JOBS / elapsed:>8.0f} jobs/s")
+
+
+async def main():
+    await mongo.connect()
+    try:
+        for concurrency in CONCURRENCIES:
+            await bench_in_process(concurrency)
+    finally:
+        mongo.close()
+
+
+if __name__ == "__main__":
+    print(f"Jobs per run: {JOBS}")
+    asyncio.run(main())
+    for process_count in PROCESS_COUNTS:
+        bench_processes(process_count)
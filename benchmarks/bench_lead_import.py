@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Bulk lead import benchmark
+Writes a 1M-row CSV and NDJSON file, streams each to POST /api/leads/import
+twice (first run inserts, second run updates the same emails) and reports
+leads/sec. For comparison, a sample of leads is sent one by one to
+POST /api/leads. Imported leads are deleted afterwards.
+"""
+
+import json
+import os
+import tempfile
+import time
+
+import requests
+from pymongo import MongoClient
+
+BACKEND_URL = os.environ.get('REACT_APP_BACKEND_URL', 'http://localhost:8001')
+API_BASE = f"{BACKEND_URL}/api"
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.environ.get('DB_NAME', 'digihome')
+ROWS = int(os.environ.get('BENCH_IMPORT_ROWS', '1000000'))
+INVALID_EVERY = 1000  # one row in INVALID_EVERY has a bad email
+SINGLE_SAMPLE = 500
+EMAIL_DOMAIN = "import.bench.example.no"
+
+
+def lead(i):
+    email = f"import{i}@{EMAIL_DOMAIN}" if i % INVALID_EVERY else f"not-an-email-{i}"
+    return {"address": f"Importveien {i}, 0150 Oslo", "name": f"Import Lead {i}", "phone": "+47 00000000", "email": email}
+
+
+def write_csv(path):
+    with open(path, "w") as f:
+        f.write("address,name,phone,email\n")
+        for i in range(ROWS):
+            row = lead(i)
+            f.write(f"\"{row['address']}\",{row['name']},{row['phone']},{row['email']}\n")
+
+
+def write_ndjson(path):
+    with open(path, "w") as f:
+        for i in range(ROWS):
+            f.write(json.dumps(lead(i)) + "\n")
+
+
+def run_import(path, file_format):
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        response = requests.post(f"{API_BASE}/leads/import", params={"format": file_format}, data=f)
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return elapsed, response.json()
+
+
+def run_single(session):
+    start = time.perf_counter()
+    for i in range(SINGLE_SAMPLE):
+        row = lead(i + 1)
+        row["email"] = f"single{i}@{EMAIL_DOMAIN}"
+        session.post(f"{API_BASE}/leads", json=row).raise_for_status()
+    return SINGLE_SAMPLE / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    db = MongoClient(MONGO_URL)[DB_NAME]
+    cleanup = {"email": {"$regex": f"@{EMAIL_DOMAIN.replace('.', '[.]')}$"}}
+    db.leads.delete_many(cleanup)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = {"csv": os.path.join(tmp, "leads.csv"), "ndjson": os.path.join(tmp, "leads.ndjson")}
+        write_csv(files["csv"])
+        write_ndjson(files["ndjson"])
+
+        print(f"Rows per file: {ROWS} (1 in {INVALID_EVERY} invalid)")
+        print(" format | run    | seconds | leads/sec | inserted | updated | failed")
+        try:
+            for file_format, path in files.items():
+                size_mb = os.path.getsize(path) / 1024 / 1024
+                for run in ("insert", "update"):
+                    elapsed, report = run_import(path, file_format)
+                    print(f" {file_format:<6} | {run:<6} | {elapsed:>7.1f} | {report['processed'] / elapsed:>9.0f} |"
+                          f" {report['inserted']:>8} | {report['updated']:>7} | {report['failed']:>6}")
+                print(f"          ({size_mb:.0f} MB file)")
+                db.leads.delete_many(cleanup)
+
+            print(f" single POST /leads: {run_single(requests.Session()):.0f} leads/sec ({SINGLE_SAMPLE} requests)")
+        finally:
+            db.leads.delete_many(cleanup)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+MongoDB connection pool benchmark
+Starts the backend with an increasing number of uvicorn workers, drives
+concurrent GET /api/leads traffic and reports the number of open MongoDB
+connections together with p50/p99 latency.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from pymongo import MongoClient
+
+from _common import percentile
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+PORT = int(os.environ.get('BENCH_PORT', '8123'))
+WORKER_COUNTS = [int(w) for w in os.environ.get('BENCH_WORKERS', '1,2,4,8').split(',')]
+REQUESTS_PER_RUN = int(os.environ.get('BENCH_REQUESTS', '2000'))
+CONCURRENCY = int(os.environ.get('BENCH_CONCURRENCY', '64'))
+
+
+def wait_for_api(base_url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/api/").status_code == 200:
+                return True
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def timed_get(session, url):
+    start = time.perf_counter()
+    session.get(url)
+    return (time.perf_counter() - start) * 1000
+
+
+def run(workers):
+    base_url = f"http://127.0.0.1:{PORT}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(PORT), "--workers", str(workers)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not wait_for_api(base_url):
+            print(f"❌ Backend did not start with {workers} worker(s)")
+            return
+
+        session = requests.Session()
+        url = f"{base_url}/api/leads?limit=20"
+        with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+            latencies = list(pool.map(lambda _: timed_get(session, url), range(REQUESTS_PER_RUN)))
+
+        status = MongoClient(MONGO_URL).admin.command('serverStatus')
+        connections = status['connections']['current']
+        print(f"{workers:>7} | {connections:>11} | {percentile(latencies, 50):>8.1f} | {percentile(latencies, 99):>8.1f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    print(f"Requests per run: {REQUESTS_PER_RUN}, concurrency: {CONCURRENCY}")
+    print("workers | connections | p50 (ms) | p99 (ms)")
+    for worker_count in WORKER_COUNTS:
+        run(worker_count)
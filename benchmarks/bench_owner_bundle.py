@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Owner bundle benchmark
+Compares loading a property page through the five section endpoints
+(sequentially and in parallel, like a browser) with one
+GET /api/owners/{owner_id}/bundle request.
+"""
+
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from _common import percentile
+
+BACKEND_URL = os.environ.get('REACT_APP_BACKEND_URL', 'http://localhost:8001')
+API_BASE = f"{BACKEND_URL}/api"
+SAMPLES = int(os.environ.get('BENCH_SAMPLES', '200'))
+
+SECTION_PATHS = [
+    "/owners/{owner_id}/documentation",
+    "/owners/{owner_id}/access-locks",
+    "/owners/{owner_id}/floor-plan",
+    "/owners/{owner_id}/furniture-equipment",
+    "/api/partners/{owner_id}",
+]
+
+
+def create_owner(session):
+    suffix = uuid.uuid4().hex[:8]
+    response = session.post(f"{API_BASE}/owner-portal", json={
+        "address": "Benchmarkveien 1",
+        "name": f"Bundle Bench {suffix}",
+        "phone": "+47 00000000",
+        "email": f"bundle-{suffix}@bench.example.no",
+        "password": "benchmark",
+    })
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+def sequential(session, owner_id):
+    for path in SECTION_PATHS:
+        session.get(API_BASE + path.format(owner_id=owner_id)).raise_for_status()
+
+
+def parallel(pool, sessions, owner_id):
+    futures = [
+        pool.submit(lambda s, p: s.get(API_BASE + p.format(owner_id=owner_id)).raise_for_status(), s, p)
+        for s, p in zip(sessions, SECTION_PATHS)
+    ]
+    for future in futures:
+        future.result()
+
+
+def bundle(session, owner_id):
+    session.get(f"{API_BASE}/owners/{owner_id}/bundle").raise_for_status()
+
+
+def measure(func):
+    latencies = []
+    for _ in range(SAMPLES):
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+if __name__ == "__main__":
+    session = requests.Session()
+    owner_id = create_owner(session)
+    bundle(session, owner_id)  # create the section documents before measuring
+
+    sessions = [requests.Session() for _ in SECTION_PATHS]
+    with ThreadPoolExecutor(max_workers=len(SECTION_PATHS)) as pool:
+        results = {
+            "5 requests, sequential": measure(lambda: sequential(session, owner_id)),
+            "5 requests, parallel": measure(lambda: parallel(pool, sessions, owner_id)),
+            "bundle": measure(lambda: bundle(session, owner_id)),
+        }
+
+    print(f"{'mode':<24} | p50 (ms) | p99 (ms)")
+    for mode, latencies in results.items():
+        print(f"{mode:<24} | {percentile(latencies, 50):>8.1f} | {percentile(latencies, 99):>8.1f}")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Lead pagination benchmark
+Seeds a leads collection with 1M rows (if not already present), then
+compares the latency of page N via skip/limit against keyset cursors.
+"""
+
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import requests
+from pymongo import MongoClient
+
+BACKEND_URL = os.environ.get('REACT_APP_BACKEND_URL', 'http://localhost:8001')
+API_BASE = f"{BACKEND_URL}/api"
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.environ.get('DB_NAME', 'digihome')
+LEADS = int(os.environ.get('BENCH_LEADS', '1000000'))
+PAGE_SIZE = 100
+PAGES = [1, 10, 100, 1000]
+SAMPLES = 5
+
+
+def seed(db):
+    existing = db.leads.estimated_document_count()
+    if existing >= LEADS:
+        return
+    start = datetime.utcnow() - timedelta(days=365)
+    batch = []
+    for i in range(existing, LEADS):
+        batch.append({
+            "id": str(uuid.uuid4()),
+            "address": f"Benchmarkveien {i}",
+            "name": f"Lead {i}",
+            "phone": "+47 00000000",
+            "email": f"lead{i}@bench.example.no",
+            "created_at": start + timedelta(seconds=i * 30),
+            "status": "new",
+            "notes": None,
+        })
+        if len(batch) == 10000:
+            db.leads.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db.leads.insert_many(batch, ordered=False)
+
+
+def timed(session, params):
+    start = time.perf_counter()
+    response = session.get(f"{API_BASE}/leads", params=params)
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, response.json()
+
+
+if __name__ == "__main__":
+    db = MongoClient(MONGO_URL)[DB_NAME]
+    seed(db)
+    session = requests.Session()
+    print(f"Leads: {db.leads.estimated_document_count()}, page size {PAGE_SIZE}")
+    print(" page | skip (ms) | cursor (ms)")
+
+    # Walk the cursor chain once, remembering the cursor that starts each page
+    cursors = {1: ""}
+    cursor = ""
+    for page in range(1, max(PAGES)):
+        _, body = timed(session, {"limit": PAGE_SIZE, "cursor": cursor})
+        cursor = body["next_cursor"]
+        cursors[page + 1] = cursor
+
+    for page in PAGES:
+        skip_ms = min(timed(session, {"limit": PAGE_SIZE, "skip": (page - 1) * PAGE_SIZE})[0] for _ in range(SAMPLES))
+        cursor_ms = min(timed(session, {"limit": PAGE_SIZE, "cursor": cursors[page]})[0] for _ in range(SAMPLES))
+        print(f"{page:>5} | {skip_ms:>9.1f} | {cursor_ms:>11.1f}")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Password hashing benchmark
+1. Time per bcrypt hash for a range of cost factors
+2. Event-loop latency during a burst of signups, hashing inline on the
+   loop versus through passwords.hash_password (bounded thread pool)
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from passlib.hash import bcrypt  # noqa: E402
+import passwords  # noqa: E402
+from _common import percentile  # noqa: E402
+
+COSTS = [10, 11, 12, 13, 14]
+SIGNUPS = int(os.environ.get('BENCH_SIGNUPS', '20'))
+
+
+async def probe_loop(stop, latencies):
+    """Measure how late a 5 ms sleep wakes up"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        latencies.append((time.perf_counter() - start - 0.005) * 1000)
+
+
+async def burst(label, hash_one):
+    latencies = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_loop(stop, latencies))
+    start = time.perf_counter()
+    await asyncio.gather(*(hash_one(f"password-{i}") for i in range(SIGNUPS)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    print(
+        f"{label:<10} | {elapsed:>6.2f} s | loop lag p50 {percentile(latencies, 50):>7.1f} ms | "
+        f"p99 {percentile(latencies, 99):>7.1f} ms | max {max(latencies):>7.1f} ms"
+    )
+
+
+async def inline_hash(password):
+    return passwords._hasher.hash(password)
+
+
+async def main():
+    print("cost | ms per hash")
+    for cost in COSTS:
+        hasher = bcrypt.using(rounds=cost)
+        start = time.perf_counter()
+        hasher.hash("benchmark")
+        print(f"{cost:>4} | {(time.perf_counter() - start) * 1000:>8.1f}")
+
+    print(f"\nBurst of {SIGNUPS} signups at cost {passwords.BCRYPT_ROUNDS}, "
+          f"{passwords.PASSWORD_HASH_WORKERS} hash workers")
+    await burst("inline", inline_hash)
+    await burst("executor", passwords.hash_password)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Section cache benchmark
+Seeds section documents for a set of owners, then measures section read
+throughput (the loaders behind the GET endpoints and the bundle) with the
+cache disabled, with the in-process LRU, and with the shared backend on
+the local stand-in store. Reports reads/sec, hit rate and cached bytes.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'digihome_bench')
+
+import section_cache  # noqa: E402
+from database import mongo  # noqa: E402
+from routes.bundle import SECTION_LOADERS  # noqa: E402
+from routes.furniture_equipment import DEFAULTS as FURNITURE_DEFAULTS  # noqa: E402
+
+OWNERS = int(os.environ.get('BENCH_OWNERS', '1000'))
+READS = int(os.environ.get('BENCH_READS', '50000'))
+CONCURRENCY = int(os.environ.get('BENCH_CONCURRENCY', '32'))
+WRITE_RATIO = float(os.environ.get('BENCH_WRITE_RATIO', '0.01'))
+
+
+async def seed(db, owner_ids):
+    await db.furniture_equipment.delete_many({"owner_id": {"$regex": "^cache-bench-"}})
+    await db.furniture_equipment.insert_many([FURNITURE_DEFAULTS.document(owner_id) for owner_id in owner_ids])
+
+
+async def run(cache, owner_ids):
+    section_cache.section_cache = cache
+    # The routers imported the module-level instance; point them at this one
+    for module in ("routes.documentation", "routes.access_locks", "routes.floor_plan",
+                   "routes.furniture_equipment", "routes.partners"):
+        sys.modules[module].section_cache = cache
+
+    names = list(SECTION_LOADERS)
+    remaining = READS
+
+    async def reader():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            owner_id = random.choice(owner_ids)
+            if random.random() < WRITE_RATIO:
+                await cache.invalidate("furniture_equipment", owner_id)
+            name = random.choice(names)
+            await SECTION_LOADERS[name](owner_id, None)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(reader() for _ in range(CONCURRENCY)))
+    return READS / (time.perf_counter() - start)
+
+
+async def main():
+    await mongo.connect()
+    try:
+        owner_ids = [f"cache-bench-{i}" for i in range(OWNERS)]
+        await seed(mongo.db, owner_ids)
+
+        configurations = {
+            "off": section_cache.SectionCache(section_cache.MemoryBackend(), enabled=False),
+            "memory LRU": section_cache.SectionCache(section_cache.MemoryBackend(max_entries=OWNERS * 5)),
+            "shared (local store)": section_cache.SectionCache(
+                section_cache.SharedBackend(section_cache.LocalSharedStore())
+            ),
+        }
+        print(f"{READS} section reads over {OWNERS} owners, {CONCURRENCY} concurrent, {WRITE_RATIO:.0%} invalidations")
+        print(f"{'cache':<22} | reads/sec | hit rate | cached bytes")
+        for label, cache in configurations.items():
+            throughput = await run(cache, owner_ids)
+            stats = cache.stats()
+            print(f"{label:<22} | {throughput:>9.0f} | {stats['hit_rate']:>8.1%} | {stats.get('bytes', '-'):>12}")
+    finally:
+        await mongo.db.furniture_equipment.delete_many({"owner_id": {"$regex": "^cache-bench-"}})
+        mongo.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
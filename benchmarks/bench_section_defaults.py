@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Section first-open benchmark
+Creates fresh owners directly in MongoDB, opens each of the four section
+tabs once and reports first-open latency and the number of writes the
+reads caused (serverStatus opcounters). Also times building the default
+furniture checklist from pydantic models vs the pre-serialized template.
+"""
+
+import os
+import sys
+import time
+import timeit
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import requests
+from pymongo import MongoClient
+
+from _common import percentile
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+BACKEND_URL = os.environ.get('REACT_APP_BACKEND_URL', 'http://localhost:8001')
+API_BASE = f"{BACKEND_URL}/api"
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+DB_NAME = os.environ.get('DB_NAME', 'digihome')
+OWNERS = int(os.environ.get('BENCH_OWNERS', '200'))
+
+SECTIONS = ["documentation", "access-locks", "floor-plan", "furniture-equipment"]
+
+
+def writes(client):
+    counters = client.admin.command("serverStatus")["opcounters"]
+    return counters["insert"] + counters["update"]
+
+
+def first_opens(client, db):
+    session = requests.Session()
+    owner_ids = [f"bench-{uuid.uuid4()}" for _ in range(OWNERS)]
+    db.owners.insert_many([
+        {"id": owner_id, "name": "Bench", "email": f"{owner_id}@bench.example.no", "created_at": datetime.utcnow()}
+        for owner_id in owner_ids
+    ])
+
+    latencies = {section: [] for section in SECTIONS}
+    before = writes(client)
+    for owner_id in owner_ids:
+        for section in SECTIONS:
+            start = time.perf_counter()
+            session.get(f"{API_BASE}/owners/{owner_id}/{section}").raise_for_status()
+            latencies[section].append((time.perf_counter() - start) * 1000)
+    caused = writes(client) - before
+
+    print(f"First open of {len(SECTIONS)} tabs for {OWNERS} new owners")
+    print(f"{'section':<22} | p50 (ms) | p99 (ms)")
+    for section, values in latencies.items():
+        print(f"{section:<22} | {percentile(values, 50):>8.2f} | {percentile(values, 99):>8.2f}")
+    print(f"Writes caused by reads: {caused}")
+
+    db.owners.delete_many({"id": {"$in": owner_ids}})
+
+
+def default_building():
+    from models.furniture_equipment import FurnitureEquipmentData
+    from routes.furniture_equipment import DEFAULTS, create_default_items
+
+    runs = 2000
+    models = timeit.timeit(
+        lambda: FurnitureEquipmentData(owner_id="x", items=[item.dict() for item in create_default_items()]).dict(),
+        number=runs
+    )
+    template = timeit.timeit(lambda: DEFAULTS.document("x"), number=runs)
+    print(f"Default furniture checklist: pydantic {models / runs * 1e6:.0f} µs, template {template / runs * 1e6:.0f} µs")
+
+
+if __name__ == "__main__":
+    client = MongoClient(MONGO_URL)
+    first_opens(client, client[DB_NAME])
+    default_building()
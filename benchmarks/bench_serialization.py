@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Response serialization microbenchmark
+For representative payloads of each read endpoint, compares the default
+FastAPI path (response_model validation or jsonable_encoder, then
+json.dumps) with the trusted orjson path. Reports time per response and
+peak allocated memory (tracemalloc).
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from models.partner import Partner  # noqa: E402
+from models.property_documentation import PropertyDocumentation, SecuritySystemItem, DocumentationImage  # noqa: E402
+from responses import ORJSONResponse  # noqa: E402
+from routes.furniture_equipment import DEFAULTS as FURNITURE_DEFAULTS  # noqa: E402
+
+RUNS = int(os.environ.get('BENCH_RUNS', '200'))
+
+
+def partners_payload(count=1000):
+    now = datetime.utcnow().isoformat()
+    return [
+        {
+            "id": str(uuid.uuid4()), "owner_id": "owner", "category": "daglig-drift", "name": f"Partner {i}",
+            "service": "Rengjøring", "phone": "+47 00000000", "email": f"partner{i}@example.no",
+            "additional_info": None, "notes": "Notat " * 10, "is_certified": i % 2 == 0, "status": "Aktiv",
+            "created_at": now, "updated_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+def owners_payload(count=100):
+    return [
+        {
+            "id": str(uuid.uuid4()), "lead_id": None, "address": f"Gate {i}", "name": f"Eier {i}",
+            "phone": "+47 00000000", "email": f"eier{i}@example.no", "created_at": datetime.utcnow(),
+            "is_active": True, "properties": [], "onboarding_completed": True, "status": "Ringt",
+            "onboarding_data": {
+                "address": f"Gate {i}", "city": "Oslo", "property_type": "apartment", "ownership_type": "selveier",
+                "rental_strategy": "short", "start_date": "2025-01-01",
+                "rooms": {"living": ["sofa", "tv"] * 10, "bedroom": ["seng"] * 10, "bathroom": ["dusj"] * 5},
+                "facilities": ["balkong", "heis"], "parking": "free", "photography": "professional", "cleaning": "service",
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def documentation_payload(items=50, images=5):
+    systems = [
+        SecuritySystemItem(
+            name=f"System {i}", location="Gang", system_type="alarm",
+            images=[DocumentationImage(url=f"/uploads/{uuid.uuid4().hex}.jpg").dict() for _ in range(images)]
+        ).dict()
+        for i in range(items)
+    ]
+    return PropertyDocumentation(owner_id="owner", security_systems=systems).dict()
+
+
+def before(content, model=None):
+    if model is not None:
+        adapter = TypeAdapter(model)
+        content = adapter.dump_python(adapter.validate_python(content), mode="json")
+    else:
+        content = jsonable_encoder(content)
+    return JSONResponse(content).body
+
+
+def after(content, model=None):
+    return ORJSONResponse(content).body
+
+
+def measure(func, content, model):
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        func(content, model)
+    elapsed = (time.perf_counter() - start) / RUNS * 1000
+
+    tracemalloc.start()
+    func(content, model)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024
+
+
+if __name__ == "__main__":
+    furniture = FURNITURE_DEFAULTS.document("owner")
+    documentation = documentation_payload()
+    partners = partners_payload()
+    endpoints = {
+        "GET /furniture-equipment": (furniture, None),
+        "GET /documentation": (documentation, None),
+        "GET /partners (1000)": (partners, List[Partner]),
+        "GET /owners (100)": (owners_payload(), None),
+        "GET /bundle": ({"documentation": documentation, "furniture-equipment": furniture, "partners": partners}, None),
+    }
+
+    print(f"{'endpoint':<26} | before ms | after ms | before KiB | after KiB")
+    for name, (content, model) in endpoints.items():
+        before_ms, before_kib = measure(before, content, model)
+        after_ms, after_kib = measure(after, content, model)
+        print(f"{name:<26} | {before_ms:>9.3f} | {after_ms:>8.3f} | {before_kib:>10.0f} | {after_kib:>9.0f}")
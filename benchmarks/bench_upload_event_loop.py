@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Upload event-loop latency benchmark
+Streams a large video to POST /api/owners/{owner_id}/access-locks/room_walkthrough/upload-video
+while probing GET /api/ on the same worker. Probe latency shows how long
+the event loop is blocked by the upload. Run it against the backend before
+and after a change to compare.
+"""
+
+import os
+import threading
+import time
+import uuid
+
+import requests
+
+from _common import percentile
+
+BACKEND_URL = os.environ.get('REACT_APP_BACKEND_URL', 'http://localhost:8001')
+API_BASE = f"{BACKEND_URL}/api"
+UPLOAD_MB = int(os.environ.get('BENCH_UPLOAD_MB', '500'))
+CHUNK = b"\0" * (1024 * 1024)
+BOUNDARY = uuid.uuid4().hex
+
+
+def multipart_body():
+    """Multipart body generated on the fly so the client never holds the file in memory"""
+    yield (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="walkthrough.mp4"\r\n'
+        "Content-Type: video/mp4\r\n\r\n"
+    ).encode()
+    for _ in range(UPLOAD_MB):
+        yield CHUNK
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def upload(owner_id, result):
+    start = time.perf_counter()
+    response = requests.post(
+        f"{API_BASE}/owners/{owner_id}/access-locks/room_walkthrough/upload-video",
+        data=multipart_body(),
+        headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+    result["status"] = response.status_code
+    result["seconds"] = time.perf_counter() - start
+
+
+def probe(stop, latencies):
+    session = requests.Session()
+    while not stop.is_set():
+        start = time.perf_counter()
+        session.get(f"{API_BASE}/")
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.01)
+
+
+if __name__ == "__main__":
+    owner_id = f"bench-{uuid.uuid4()}"
+    latencies = []
+    result = {}
+    stop = threading.Event()
+
+    prober = threading.Thread(target=probe, args=(stop, latencies))
+    uploader = threading.Thread(target=upload, args=(owner_id, result))
+    prober.start()
+    uploader.start()
+    uploader.join()
+    stop.set()
+    prober.join()
+
+    print(f"Upload: {UPLOAD_MB} MB, status {result['status']}, {result['seconds']:.1f} s")
+    print(f"Event-loop probe during upload ({len(latencies)} samples):")
+    print(f"  p50 {percentile(latencies, 50):.1f} ms | p99 {percentile(latencies, 99):.1f} ms | max {max(latencies):.1f} ms")
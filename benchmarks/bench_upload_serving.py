@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Upload serving benchmark
+1. Repeated fetches of one image, with and without If-None-Match revalidation
+2. Seek-heavy video playback: random 1 MB byte-range requests into one video
+Reports requests/sec, p50/p99 latency and bytes transferred.
+"""
+
+import os
+import random
+import time
+import uuid
+
+import requests
+
+from _common import percentile
+
+BACKEND_URL = os.environ.get('REACT_APP_BACKEND_URL', 'http://localhost:8001')
+API_BASE = f"{BACKEND_URL}/api"
+REQUESTS = int(os.environ.get('BENCH_REQUESTS', '500'))
+IMAGE_KB = int(os.environ.get('BENCH_IMAGE_KB', '2048'))
+VIDEO_MB = int(os.environ.get('BENCH_VIDEO_MB', '100'))
+SEEK_BYTES = 1024 * 1024
+
+
+def report(label, latencies, transferred, elapsed):
+    print(
+        f"{label:<28} | {len(latencies) / elapsed:>8.0f} req/s | "
+        f"p50 {percentile(latencies, 50):>6.2f} ms | p99 {percentile(latencies, 99):>6.2f} ms | "
+        f"{transferred / 1024 / 1024:>8.1f} MB"
+    )
+
+
+def run(label, session, url, headers_for_request):
+    latencies = []
+    transferred = 0
+    started = time.perf_counter()
+    for i in range(REQUESTS):
+        start = time.perf_counter()
+        response = session.get(url, headers=headers_for_request(i))
+        latencies.append((time.perf_counter() - start) * 1000)
+        transferred += len(response.content)
+    report(label, latencies, transferred, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    owner_id = f"bench-{uuid.uuid4()}"
+    session = requests.Session()
+
+    image = os.urandom(IMAGE_KB * 1024)
+    image_url = session.post(
+        f"{API_BASE}/owners/{owner_id}/floor-plan/upload-image",
+        files={"file": ("plan.jpg", image, "image/jpeg")},
+    ).json()["image_url"]
+
+    video = os.urandom(VIDEO_MB * 1024 * 1024)
+    video_url = session.post(
+        f"{API_BASE}/owners/{owner_id}/access-locks/room_walkthrough/upload-video",
+        files={"file": ("walkthrough.mp4", video, "video/mp4")},
+    ).json()["url"]
+
+    image_url = f"{BACKEND_URL}{image_url}"
+    video_url = f"{BACKEND_URL}{video_url}"
+    etag = session.head(image_url).headers.get("etag")
+    print(f"Image: {IMAGE_KB} KB, video: {VIDEO_MB} MB, {REQUESTS} requests per run")
+    print(f"Image Cache-Control: {session.head(image_url).headers.get('cache-control')}")
+
+    run("image full fetch", session, image_url, lambda i: {})
+    run("image revalidate (304)", session, image_url, lambda i: {"If-None-Match": etag} if etag else {})
+
+    video_size = len(video)
+
+    def seek(i):
+        start = random.randrange(0, video_size - SEEK_BYTES)
+        return {"Range": f"bytes={start}-{start + SEEK_BYTES - 1}"}
+
+    run("video random seek (1 MB)", session, video_url, seek)
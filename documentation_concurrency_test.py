@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+DigiHome Documentation Concurrency Testing
+Uploads 50 images in parallel to one security system item and verifies
+that no write is lost
+"""
+
+import requests
+import uuid
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv('/app/frontend/.env')
+
+# Get backend URL from environment
+BACKEND_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://bolig-dashboard.preview.emergentagent.com')
+API_BASE = f"{BACKEND_URL}/api"
+
+PARALLEL_UPLOADS = 50
+
+# Smallest valid PNG (1x1 transparent pixel)
+PNG_BYTES = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000b49444154789c6360000200000500017a5eab3f0000000049454e44ae426082"
+)
+
+print(f"Testing DigiHome Documentation Concurrency at: {API_BASE}")
+print("=" * 70)
+
+class TestResults:
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+    
+    def add_pass(self, test_name):
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+    
+    def add_fail(self, test_name, error):
+        self.failed += 1
+        self.errors.append(f"{test_name}: {error}")
+        print(f"❌ FAIL: {test_name} - {error}")
+    
+    def summary(self):
+        print("\n" + "=" * 70)
+        print(f"CONCURRENCY TEST SUMMARY: {self.passed} passed, {self.failed} failed")
+        if self.errors:
+            print("\nFAILED TESTS:")
+            for error in self.errors:
+                print(f"  - {error}")
+        return self.failed == 0
+
+results = TestResults()
+
+def upload_image(owner_id, item_id, index):
+    response = requests.post(
+        f"{API_BASE}/owners/{owner_id}/documentation/security-systems/{item_id}/upload-image",
+        files={"file": (f"image_{index}.png", PNG_BYTES, "image/png")},
+        data={"caption": f"Image {index}"}
+    )
+    return response.status_code
+
+def test_parallel_image_uploads():
+    """
+    Test: 50 parallel image uploads to one owner
+    1. Create a security system item for a fresh owner id
+    2. Upload 50 images concurrently
+    3. Verify the item holds exactly 50 images
+    """
+    owner_id = str(uuid.uuid4())
+    
+    try:
+        item_response = requests.post(
+            f"{API_BASE}/owners/{owner_id}/documentation/security-systems",
+            json={"name": "Sikringsskap (Hoved)", "location": "Gang", "system_type": "Sikringsskap"}
+        )
+        if item_response.status_code != 200:
+            results.add_fail("Create security system item", f"Status code: {item_response.status_code}")
+            return False
+        item_id = item_response.json()["id"]
+        
+        with ThreadPoolExecutor(max_workers=PARALLEL_UPLOADS) as pool:
+            status_codes = list(pool.map(lambda i: upload_image(owner_id, item_id, i), range(PARALLEL_UPLOADS)))
+        
+        failed_uploads = [code for code in status_codes if code != 200]
+        if failed_uploads:
+            results.add_fail("Parallel uploads", f"{len(failed_uploads)} uploads failed: {failed_uploads[:5]}")
+            return False
+        results.add_pass(f"{PARALLEL_UPLOADS} parallel uploads accepted")
+        
+        get_response = requests.get(f"{API_BASE}/owners/{owner_id}/documentation/security-systems/{item_id}")
+        images = get_response.json().get("images", [])
+        
+        if len(images) != PARALLEL_UPLOADS:
+            results.add_fail("No lost writes", f"Expected {PARALLEL_UPLOADS} images, found {len(images)}")
+            return False
+        
+        results.add_pass("No lost writes")
+        return True
+    except Exception as e:
+        results.add_fail("Parallel uploads - Exception", f"Error: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    test_parallel_image_uploads()
+    success = results.summary()
+    exit(0 if success else 1)
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Link } from 'react-router-dom';
 import { Users, Home, TrendingUp, Mail, Phone, MapPin, Calendar, ArrowLeft, Search, Filter, X } from 'lucide-react';
 import axios from 'axios';
@@ -6,13 +6,31 @@ import axios from 'axios';
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+const PAGE_SIZE = 50;
+const LEAD_STATUSES = ["new", "contacted", "converted", "rejected"];
+const OWNER_STATUSES = ["Ringt", "Sendt tilbud", "Onboarding", "Kontrakt", "Lost"];
+const SORT_OPTIONS = [
+  { value: '-created_at', label: 'Nyeste først' },
+  { value: 'created_at', label: 'Eldste først' },
+  { value: 'name', label: 'Navn A–Å' },
+  { value: '-name', label: 'Navn Å–A' },
+];
+const EMPTY_PAGE = { items: [], nextCursor: null, total: 0 };
+
+const totalCount = (response) => parseInt(response.headers['x-total-count'], 10) || 0;
+
 const AdminDashboard = () => {
-  const [leads, setLeads] = useState([]);
-  const [owners, setOwners] = useState([]);
+  const [leads, setLeads] = useState(EMPTY_PAGE);
+  const [owners, setOwners] = useState(EMPTY_PAGE);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [activeTab, setActiveTab] = useState('leads'); // 'leads' or 'owners'
   const [searchTerm, setSearchTerm] = useState('');
+  const [query, setQuery] = useState('');
+  const [statusFilter, setStatusFilter] = useState('');
+  const [sort, setSort] = useState('-created_at');
   const [selectedOwner, setSelectedOwner] = useState(null);
+  const latestRequest = useRef(0);
   const [stats, setStats] = useState({
     totalLeads: 0,
     totalOwners: 0,
@@ -22,11 +40,14 @@ const AdminDashboard = () => {
 
   const handleStatusChange = async (ownerId, newStatus) => {
     try {
-      await axios.put(`${API_URL}/api/owners/${ownerId}/status`, { status: newStatus });
+      await axios.put(`${API}/owners/${ownerId}/status`, { status: newStatus });
       // Update local state
-      setOwners(owners.map(owner => 
-        owner.id === ownerId ? { ...owner, status: newStatus } : owner
-      ));
+      setOwners(page => ({
+        ...page,
+        items: page.items.map(owner =>
+          owner.id === ownerId ? { ...owner, status: newStatus } : owner
+        )
+      }));
     } catch (error) {
       console.error('Failed to update status:', error);
       alert('Kunne ikke oppdatere status');
@@ -34,52 +55,81 @@ const AdminDashboard = () => {
   };
 
   useEffect(() => {
-    fetchData();
+    fetchStats();
   }, []);
 
-  const fetchData = async () => {
-    try {
-      setLoading(true);
-      const [leadsRes, ownersRes] = await Promise.all([
-        axios.get(`${API}/leads`),
-        axios.get(`${API}/owner-portal/all`)
-      ]);
-
-      const leadsData = leadsRes.data || [];
-      const ownersData = ownersRes.data || [];
+  // Search on the server once typing pauses
+  useEffect(() => {
+    const timer = setTimeout(() => setQuery(searchTerm.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
 
-      setLeads(leadsData);
-      setOwners(ownersData);
+  useEffect(() => {
+    fetchPage(activeTab, null);
+  }, [activeTab, query, statusFilter, sort]);
 
-      // Calculate stats
-      const today = new Date().toISOString().split('T')[0];
-      const todayLeads = leadsData.filter(l => l.created_at?.startsWith(today)).length;
-      const todayOwners = ownersData.filter(o => o.created_at?.startsWith(today)).length;
+  // Totals come from X-Total-Count, so only one row per count is fetched
+  const fetchStats = async () => {
+    try {
+      const today = new Date();
+      today.setHours(0, 0, 0, 0);
+      const sinceToday = { limit: 1, fields: 'id', created_from: today.toISOString() };
+      const [leadsRes, ownersRes, todayLeadsRes, todayOwnersRes] = await Promise.all([
+        axios.get(`${API}/leads`, { params: { limit: 1, fields: 'id' } }),
+        axios.get(`${API}/owners`, { params: { limit: 1, fields: 'id' } }),
+        axios.get(`${API}/leads`, { params: sinceToday }),
+        axios.get(`${API}/owners`, { params: sinceToday }),
+      ]);
 
       setStats({
-        totalLeads: leadsData.length,
-        totalOwners: ownersData.length,
-        todayLeads,
-        todayOwners,
+        totalLeads: totalCount(leadsRes),
+        totalOwners: totalCount(ownersRes),
+        todayLeads: totalCount(todayLeadsRes),
+        todayOwners: totalCount(todayOwnersRes),
       });
+    } catch (err) {
+      console.error('Failed to fetch stats:', err);
+    }
+  };
+
+  // Filtering, sorting and paging happen on the server; cursor null loads the first page
+  const fetchPage = async (tab, cursor) => {
+    const setPage = tab === 'leads' ? setLeads : setOwners;
+    const request = ++latestRequest.current;
+    try {
+      cursor ? setLoadingMore(true) : setLoading(true);
+      const params = { limit: PAGE_SIZE, cursor: cursor || '', sort };
+      if (query) params.q = query;
+      if (statusFilter) params.status = statusFilter;
+
+      const response = await axios.get(`${API}/${tab}`, { params });
+      // Ignore responses overtaken by a newer search, filter or tab
+      if (request !== latestRequest.current) return;
+      const { items, next_cursor: nextCursor } = response.data;
+      setPage(page => ({
+        items: cursor ? [...page.items, ...items] : items,
+        nextCursor,
+        total: totalCount(response),
+      }));
     } catch (err) {
       console.error('Failed to fetch data:', err);
+      if (!cursor && request === latestRequest.current) setPage(EMPTY_PAGE);
     } finally {
-      setLoading(false);
+      if (request === latestRequest.current) {
+        setLoading(false);
+        setLoadingMore(false);
+      }
     }
   };
 
-  const filteredLeads = leads.filter(lead =>
-    lead.name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    lead.email?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    lead.address?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
+  const switchTab = (tab) => {
+    if (tab === activeTab) return;
+    setStatusFilter('');
+    setActiveTab(tab);
+  };
 
-  const filteredOwners = owners.filter(owner =>
-    owner.name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    owner.email?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    owner.address?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
+  const currentPage = activeTab === 'leads' ? leads : owners;
+  const statusOptions = activeTab === 'leads' ? LEAD_STATUSES : OWNER_STATUSES;
 
   const formatDate = (dateString) => {
     if (!dateString) return 'N/A';
@@ -170,40 +220,62 @@ const AdminDashboard = () => {
           <div className="border-b border-gray-200">
             <div className="flex">
               <button
-                onClick={() => setActiveTab('leads')}
+                onClick={() => switchTab('leads')}
                 className={`px-6 py-4 font-medium transition-colors ${
                   activeTab === 'leads'
                     ? 'text-blue-600 border-b-2 border-blue-600'
                     : 'text-gray-600 hover:text-gray-900'
                 }`}
               >
-                Leads ({leads.length})
+                Leads ({activeTab === 'leads' ? leads.total : stats.totalLeads})
               </button>
               <button
-                onClick={() => setActiveTab('owners')}
+                onClick={() => switchTab('owners')}
                 className={`px-6 py-4 font-medium transition-colors ${
                   activeTab === 'owners'
                     ? 'text-emerald-600 border-b-2 border-emerald-600'
                     : 'text-gray-600 hover:text-gray-900'
                 }`}
               >
-                Eierportaler ({owners.length})
+                Eierportaler ({activeTab === 'owners' ? owners.total : stats.totalOwners})
               </button>
             </div>
           </div>
 
-          {/* Search */}
-          <div className="p-4 border-b border-gray-200">
-            <div className="relative">
+          {/* Search, filter and sort */}
+          <div className="p-4 border-b border-gray-200 flex flex-col sm:flex-row gap-3">
+            <div className="relative flex-1">
               <Search className="absolute left-3 top-1/2 transform -translate-y-1/2 text-gray-400 w-5 h-5" />
               <input
                 type="text"
-                placeholder="Søk etter navn, e-post eller adresse..."
+                placeholder="Søk etter navn, e-post, telefon eller adresse..."
                 value={searchTerm}
                 onChange={(e) => setSearchTerm(e.target.value)}
                 className="w-full pl-10 pr-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-transparent"
               />
             </div>
+            <div className="relative">
+              <Filter className="absolute left-3 top-1/2 transform -translate-y-1/2 text-gray-400 w-4 h-4" />
+              <select
+                value={statusFilter}
+                onChange={(e) => setStatusFilter(e.target.value)}
+                className="pl-9 pr-4 py-2 border border-gray-300 rounded-lg text-sm focus:ring-2 focus:ring-blue-500 focus:border-transparent"
+              >
+                <option value="">Alle statuser</option>
+                {statusOptions.map(status => (
+                  <option key={status} value={status}>{status}</option>
+                ))}
+              </select>
+            </div>
+            <select
+              value={sort}
+              onChange={(e) => setSort(e.target.value)}
+              className="px-4 py-2 border border-gray-300 rounded-lg text-sm focus:ring-2 focus:ring-blue-500 focus:border-transparent"
+            >
+              {SORT_OPTIONS.map(option => (
+                <option key={option.value} value={option.value}>{option.label}</option>
+              ))}
+            </select>
           </div>
 
           {/* Content */}
@@ -225,14 +297,14 @@ const AdminDashboard = () => {
                   </tr>
                 </thead>
                 <tbody className="bg-white divide-y divide-gray-200">
-                  {filteredLeads.length === 0 ? (
+                  {leads.items.length === 0 ? (
                     <tr>
                       <td colSpan="5" className="px-6 py-12 text-center text-gray-500">
                         Ingen leads funnet
                       </td>
                     </tr>
                   ) : (
-                    filteredLeads.map((lead) => (
+                    leads.items.map((lead) => (
                       <tr key={lead.id} className="hover:bg-gray-50">
                         <td className="px-6 py-4 whitespace-nowrap">
                           <div className="flex items-center">
@@ -285,14 +357,14 @@ const AdminDashboard = () => {
                   </tr>
                 </thead>
                 <tbody className="bg-white divide-y divide-gray-200">
-                  {filteredOwners.length === 0 ? (
+                  {owners.items.length === 0 ? (
                     <tr>
                       <td colSpan="6" className="px-6 py-12 text-center text-gray-500">
                         Ingen eierportaler funnet
                       </td>
                     </tr>
                   ) : (
-                    filteredOwners.map((owner) => (
+                    owners.items.map((owner) => (
                       <tr 
                         key={owner.id} 
                         className="hover:bg-gray-50 cursor-pointer"
@@ -356,6 +428,22 @@ const AdminDashboard = () => {
               </table>
             )}
           </div>
+
+          {/* Paging */}
+          {!loading && currentPage.items.length > 0 && (
+            <div className="p-4 border-t border-gray-200 flex items-center justify-between text-sm text-gray-500">
+              <span>Viser {currentPage.items.length} av {currentPage.total}</span>
+              {currentPage.nextCursor && (
+                <button
+                  onClick={() => fetchPage(activeTab, currentPage.nextCursor)}
+                  disabled={loadingMore}
+                  className="px-4 py-2 border border-gray-300 rounded-lg font-medium text-gray-700 hover:bg-gray-50 disabled:opacity-50"
+                >
+                  {loadingMore ? 'Laster...' : 'Vis flere'}
+                </button>
+              )}
+            </div>
+          )}
         </div>
       </main>
 
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+DigiHome Furniture Bulk Check Testing
+Checks and unchecks furniture items by id and by category, in parallel on
+a checklist that is not stored yet, and verifies the stored items and the
+per-category counts
+"""
+
+import requests
+import uuid
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv('/app/frontend/.env')
+
+# Get backend URL from environment
+BACKEND_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://bolig-dashboard.preview.emergentagent.com')
+API_BASE = f"{BACKEND_URL}/api"
+
+print(f"Testing DigiHome Furniture Bulk Check at: {API_BASE}")
+print("=" * 70)
+
+class TestResults:
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name):
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name, error):
+        self.failed += 1
+        self.errors.append(f"{test_name}: {error}")
+        print(f"❌ FAIL: {test_name} - {error}")
+
+    def summary(self):
+        print("\n" + "=" * 70)
+        print(f"BULK CHECK TEST SUMMARY: {self.passed} passed, {self.failed} failed")
+        if self.errors:
+            print("\nFAILED TESTS:")
+            for error in self.errors:
+                print(f"  - {error}")
+        return self.failed == 0
+
+results = TestResults()
+
+def create_owner():
+    response = requests.post(f"{API_BASE}/owner-portal", json={
+        "address": "Storgata 15, 0155 Oslo, Norway",
+        "name": "Erik Nordahl",
+        "phone": "+47 987 65 432",
+        "email": f"erik.nordahl.{uuid.uuid4().hex[:12]}@example.no",
+        "password": "SikkertPassord123!"
+    })
+    if response.status_code != 200:
+        raise Exception(f"Create owner failed with status {response.status_code}: {response.text}")
+    return response.json()["id"]
+
+def get_items(owner_id):
+    response = requests.get(f"{API_BASE}/owners/{owner_id}/furniture-equipment")
+    if response.status_code != 200:
+        raise Exception(f"Get furniture equipment failed with status {response.status_code}")
+    return response.json().get("items", [])
+
+def bulk_check(owner_id, data):
+    response = requests.post(f"{API_BASE}/owners/{owner_id}/furniture-equipment/items/bulk-check", json=data)
+    return response.status_code, response.json() if response.status_code == 200 else response.text
+
+def test_parallel_bulk_checks():
+    """
+    Test: bulk checks by category and by item ids in parallel on a checklist that is not stored yet
+    1. Create an owner and read the default checklist
+    2. Check the kitchen category and two tableware items in parallel
+    3. Verify exactly those items are checked and the counts match
+    """
+    try:
+        owner_id = create_owner()
+        items = get_items(owner_id)
+        tableware_ids = [item["id"] for item in items if item["category"] == "tableware"][:2]
+        kitchen_count = sum(1 for item in items if item["category"] == "kitchen")
+        if not kitchen_count or len(tableware_ids) != 2:
+            results.add_fail("Default checklist", f"Expected kitchen and tableware items, got {len(items)} items")
+            return False
+
+        requests_data = [
+            {"checked": True, "category": "kitchen"},
+            {"checked": True, "item_ids": tableware_ids}
+        ]
+        with ThreadPoolExecutor(max_workers=len(requests_data)) as pool:
+            responses = list(pool.map(lambda data: bulk_check(owner_id, data), requests_data))
+
+        failed = [body for code, body in responses if code != 200]
+        if failed:
+            results.add_fail("Parallel bulk checks", f"{len(failed)} requests failed: {failed}")
+            return False
+        results.add_pass("Parallel bulk checks accepted")
+
+        checked = {item["id"] for item in get_items(owner_id) if item["checked"]}
+        expected = {item["id"] for item in items if item["category"] == "kitchen"} | set(tableware_ids)
+        if checked != expected:
+            results.add_fail("Both bulk checks persist", f"Expected {len(expected)} checked items, found {len(checked)}")
+            return False
+        results.add_pass("Both bulk checks persist")
+
+        code, summary = bulk_check(owner_id, {"checked": False, "item_ids": tableware_ids[:1]})
+        categories = summary.get("categories", {}) if code == 200 else {}
+        if (code != 200 or categories.get("kitchen") != {"checked": kitchen_count, "total": kitchen_count}
+                or categories.get("tableware", {}).get("checked") != 1 or summary.get("checked") != kitchen_count + 1):
+            results.add_fail("Bulk check counts", f"Status {code}: {summary}")
+            return False
+        results.add_pass("Per-category counts after unchecking an item")
+        return True
+    except Exception as e:
+        results.add_fail("Parallel bulk checks - Exception", f"Error: {str(e)}")
+        return False
+
+def test_bulk_check_validation():
+    """Test: exactly one of item_ids and category must be given"""
+    try:
+        owner_id = create_owner()
+        for data in ({"checked": True}, {"checked": True, "item_ids": [], "category": "kitchen"}):
+            code, body = bulk_check(owner_id, data)
+            if code != 400:
+                results.add_fail("Bulk check validation", f"{data}: status {code}")
+                return False
+        results.add_pass("Bulk check without exactly one selector rejected with 400")
+        return True
+    except Exception as e:
+        results.add_fail("Bulk check validation - Exception", f"Error: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    test_parallel_bulk_checks()
+    test_bulk_check_validation()
+    success = results.summary()
+    exit(0 if success else 1)
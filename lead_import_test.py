@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+DigiHome Lead Import Parsing Testing
+Checks the streaming CSV / NDJSON parsers in backend/lead_import.py
+directly: quoted newlines, escaped quotes, records without a trailing
+newline, malformed lines and chunk boundaries
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+
+from fastapi import HTTPException  # noqa: E402
+from lead_import import MAX_LINE_LENGTH, csv_rows, iter_lines, ndjson_rows  # noqa: E402
+
+print("Testing DigiHome lead import parsers")
+print("=" * 70)
+
+class TestResults:
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name):
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name, error):
+        self.failed += 1
+        self.errors.append(f"{test_name}: {error}")
+        print(f"❌ FAIL: {test_name} - {error}")
+
+    def summary(self):
+        print("\n" + "=" * 70)
+        print(f"LEAD IMPORT TEST SUMMARY: {self.passed} passed, {self.failed} failed")
+        if self.errors:
+            print("\nFAILED TESTS:")
+            for error in self.errors:
+                print(f"  - {error}")
+        return self.failed == 0
+
+results = TestResults()
+
+HEADER = "address,name,phone,email\n"
+
+async def body(data: bytes, chunk_size: int):
+    for i in range(0, len(data), chunk_size):
+        yield data[i:i + chunk_size]
+
+def parse(parser, text: str, chunk_size: int = 7):
+    """Parse text sent in chunks of chunk_size bytes; errors are returned as strings"""
+    async def collect():
+        return [(row, str(value) if isinstance(value, Exception) else value)
+                async for row, value in parser(iter_lines(body(text.encode(), chunk_size)))]
+    return asyncio.run(collect())
+
+def check(test_name, actual, expected):
+    if actual != expected:
+        results.add_fail(test_name, f"Expected {expected}, got {actual}")
+        return False
+    results.add_pass(test_name)
+    return True
+
+def lead(address="Storgata 15", name="Erik Nordahl", phone="+47 987 65 432", email="erik@example.no"):
+    return {"address": address, "name": name, "phone": phone, "email": email}
+
+def test_csv_quoted_newline():
+    """Test: a quoted field may contain newlines (LF and CRLF files)"""
+    try:
+        text = HEADER + '"Storgata 15\n0155 Oslo",Erik Nordahl,+47 987 65 432,erik@example.no\nB,C,D,e@example.no\n'
+        expected = [(1, lead(address="Storgata 15\n0155 Oslo")), (2, lead("B", "C", "D", "e@example.no"))]
+        return (check("CSV quoted newline", parse(csv_rows, text), expected) and
+                check("CSV quoted newline (CRLF)", parse(csv_rows, text.replace("\n", "\r\n")), expected))
+    except Exception as e:
+        results.add_fail("CSV quoted newline - Exception", f"Error: {str(e)}")
+        return False
+
+def test_csv_escaped_quotes():
+    """Test: "" inside a quoted field is a literal quote, also right before a line break"""
+    try:
+        text = (HEADER +
+                '"Storgata ""15""",Erik Nordahl,+47 987 65 432,erik@example.no\n'
+                '"Gate ""A\n""B""",Erik Nordahl,+47 987 65 432,erik@example.no\n')
+        expected = [(1, lead(address='Storgata "15"')), (2, lead(address='Gate "A\n"B"'))]
+        return check("CSV escaped quotes", parse(csv_rows, text), expected)
+    except Exception as e:
+        results.add_fail("CSV escaped quotes - Exception", f"Error: {str(e)}")
+        return False
+
+def test_csv_literal_quote():
+    """Test: a quote inside an unquoted field is literal and does not swallow the next row"""
+    try:
+        text = HEADER + 'Storgata 15,Erik 5" Nordahl,+47 987 65 432,erik@example.no\nB,C,D,e@example.no\n'
+        expected = [(1, lead(name='Erik 5" Nordahl')), (2, lead("B", "C", "D", "e@example.no"))]
+        return check("CSV literal quote in unquoted field", parse(csv_rows, text), expected)
+    except Exception as e:
+        results.add_fail("CSV literal quote - Exception", f"Error: {str(e)}")
+        return False
+
+def test_csv_trailing_record():
+    """Test: the last record is parsed without a trailing newline, quoted or not"""
+    try:
+        plain = HEADER + "Storgata 15,Erik Nordahl,+47 987 65 432,erik@example.no"
+        quoted = HEADER + 'Storgata 15,Erik Nordahl,+47 987 65 432,"erik@example.no"'
+        return (check("CSV trailing record", parse(csv_rows, plain), [(1, lead())]) and
+                check("CSV trailing quoted record", parse(csv_rows, quoted), [(1, lead())]))
+    except Exception as e:
+        results.add_fail("CSV trailing record - Exception", f"Error: {str(e)}")
+        return False
+
+def test_csv_malformed():
+    """Test: extra fields and an unterminated quote are reported with their row number"""
+    try:
+        text = (HEADER +
+                "Storgata 15,Erik Nordahl,+47 987 65 432,erik@example.no,extra\n"
+                "\n"
+                'Storgata 15,"Erik Nordahl,+47 987 65 432,erik@example.no\n'
+                "B,C,D,e@example.no\n")
+        expected = [(1, "Expected 4 fields, got 5"), (3, "Unterminated quoted field")]
+        return check("CSV malformed rows", parse(csv_rows, text), expected)
+    except Exception as e:
+        results.add_fail("CSV malformed rows - Exception", f"Error: {str(e)}")
+        return False
+
+def test_ndjson_rows():
+    """Test: NDJSON rows keep their line numbers; bad lines are reported, blank lines skipped"""
+    try:
+        text = ('{"name": "Erik"}\n'
+                '\n'
+                '{"name": "Erik",\n'
+                '[1, 2]\r\n'
+                '{"name": "Ærlig Øyvind"}')
+        rows = parse(ndjson_rows, text, chunk_size=3)
+        if [row for row, _ in rows] != [1, 3, 4, 5]:
+            results.add_fail("NDJSON rows", f"Row numbers {[row for row, _ in rows]}")
+            return False
+        if rows[0][1] != {"name": "Erik"} or rows[3][1] != {"name": "Ærlig Øyvind"}:
+            results.add_fail("NDJSON rows", f"Rows {rows}")
+            return False
+        if not str(rows[1][1]).startswith("Invalid JSON"):
+            results.add_fail("NDJSON malformed line", f"Got {rows[1][1]}")
+            return False
+        if rows[2][1] != [1, 2]:
+            results.add_fail("NDJSON non-object line", f"Got {rows[2][1]}")
+            return False
+        results.add_pass("NDJSON rows, malformed lines and trailing line")
+        return True
+    except Exception as e:
+        results.add_fail("NDJSON rows - Exception", f"Error: {str(e)}")
+        return False
+
+def test_chunk_boundaries():
+    """Test: a BOM and multi-byte characters split across chunks decode correctly"""
+    try:
+        text = "﻿" + HEADER + "Åsveien 1,Øyvind Ærø,+47 987 65 432,oyvind@example.no\n"
+        expected = [(1, lead("Åsveien 1", "Øyvind Ærø", email="oyvind@example.no"))]
+        for chunk_size in (1, 2, 3, 5):
+            if parse(csv_rows, text, chunk_size) != expected:
+                results.add_fail("Chunk boundaries", f"Chunk size {chunk_size}: {parse(csv_rows, text, chunk_size)}")
+                return False
+        results.add_pass("BOM and multi-byte characters across chunk boundaries")
+        return True
+    except Exception as e:
+        results.add_fail("Chunk boundaries - Exception", f"Error: {str(e)}")
+        return False
+
+def test_line_too_long():
+    """Test: a line longer than MAX_LINE_LENGTH is rejected with 400 instead of buffered"""
+    try:
+        try:
+            parse(ndjson_rows, "x" * (MAX_LINE_LENGTH + 10), chunk_size=4096)
+        except HTTPException as e:
+            return check("Over-long line rejected", e.status_code, 400)
+        results.add_fail("Over-long line rejected", "Line was accepted")
+        return False
+    except Exception as e:
+        results.add_fail("Over-long line - Exception", f"Error: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    test_csv_quoted_newline()
+    test_csv_escaped_quotes()
+    test_csv_literal_quote()
+    test_csv_trailing_record()
+    test_csv_malformed()
+    test_ndjson_rows()
+    test_chunk_boundaries()
+    test_line_too_long()
+    success = results.summary()
+    exit(0 if success else 1)
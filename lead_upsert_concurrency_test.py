@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+DigiHome Lead Upsert Concurrency Testing
+Submits the lead form 100 times in parallel with the same email and
+verifies that exactly one lead exists, and that a later submission keeps
+its id and creation time
+"""
+
+import requests
+import uuid
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv('/app/frontend/.env')
+
+# Get backend URL from environment
+BACKEND_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://bolig-dashboard.preview.emergentagent.com')
+API_BASE = f"{BACKEND_URL}/api"
+
+PARALLEL_SUBMISSIONS = 100
+
+print(f"Testing DigiHome Lead Upsert Concurrency at: {API_BASE}")
+print("=" * 70)
+
+class TestResults:
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name):
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name, error):
+        self.failed += 1
+        self.errors.append(f"{test_name}: {error}")
+        print(f"❌ FAIL: {test_name} - {error}")
+
+    def summary(self):
+        print("\n" + "=" * 70)
+        print(f"CONCURRENCY TEST SUMMARY: {self.passed} passed, {self.failed} failed")
+        if self.errors:
+            print("\nFAILED TESTS:")
+            for error in self.errors:
+                print(f"  - {error}")
+        return self.failed == 0
+
+results = TestResults()
+
+# A unique word in the name lets the admin search find this run's leads
+search_token = f"Samtidig{uuid.uuid4().hex}"
+lead_data = {
+    "address": "Storgata 15, 0155 Oslo, Norway",
+    "name": f"Erik Nordahl {search_token}",
+    "phone": "+47 987 65 432",
+    "email": f"erik.nordahl.{uuid.uuid4().hex[:12]}@example.no"
+}
+
+def submit_lead(data):
+    response = requests.post(f"{API_BASE}/leads", json=data)
+    return response.status_code, response.json() if response.status_code == 200 else response.text
+
+def find_leads():
+    response = requests.get(f"{API_BASE}/leads", params={"q": search_token, "limit": 1000})
+    return [lead for lead in response.json() if lead["email"] == lead_data["email"]]
+
+def test_parallel_lead_submissions():
+    """
+    Test: 100 parallel submissions of the same email
+    1. Submit the lead form 100 times concurrently
+    2. Verify every submission succeeded with the same lead id and created_at
+    3. Verify exactly one lead with that email exists
+    """
+    try:
+        with ThreadPoolExecutor(max_workers=PARALLEL_SUBMISSIONS) as pool:
+            responses = list(pool.map(lambda i: submit_lead(lead_data), range(PARALLEL_SUBMISSIONS)))
+
+        failed_submissions = [body for code, body in responses if code != 200]
+        if failed_submissions:
+            results.add_fail("Parallel submissions", f"{len(failed_submissions)} submissions failed: {failed_submissions[:3]}")
+            return False
+        results.add_pass(f"{PARALLEL_SUBMISSIONS} parallel submissions accepted")
+
+        lead_ids = {body["id"] for _, body in responses}
+        created_ats = {body["created_at"] for _, body in responses}
+        if len(lead_ids) != 1 or len(created_ats) != 1:
+            results.add_fail("Same lead returned", f"{len(lead_ids)} ids, {len(created_ats)} creation times")
+            return False
+        results.add_pass("Every submission returned the same lead")
+
+        leads = find_leads()
+        if len(leads) != 1:
+            results.add_fail("Exactly one lead", f"Expected 1 lead for {lead_data['email']}, found {len(leads)}")
+            return False
+        if leads[0]["id"] not in lead_ids:
+            results.add_fail("Exactly one lead", f"Stored id {leads[0]['id']} differs from returned id")
+            return False
+
+        results.add_pass("Exactly one lead stored")
+        return True
+    except Exception as e:
+        results.add_fail("Parallel submissions - Exception", f"Error: {str(e)}")
+        return False
+
+def test_resubmission_keeps_identity():
+    """Test: a later submission updates contact details but keeps id and created_at"""
+    try:
+        leads = find_leads()
+        if len(leads) != 1:
+            results.add_fail("Resubmission", f"Expected 1 lead before resubmitting, found {len(leads)}")
+            return False
+        original = leads[0]
+
+        updated_data = lead_data.copy()
+        updated_data["phone"] = "+47 123 45 678"
+        code, body = submit_lead(updated_data)
+        if code != 200:
+            results.add_fail("Resubmission", f"Status code: {code}")
+            return False
+
+        if body["id"] != original["id"] or body["created_at"] != original["created_at"]:
+            results.add_fail("Resubmission keeps id and created_at",
+                             f"id {original['id']} -> {body['id']}, created_at {original['created_at']} -> {body['created_at']}")
+            return False
+        if body["phone"] != updated_data["phone"]:
+            results.add_fail("Resubmission updates contact details", f"Phone not updated: {body['phone']}")
+            return False
+
+        results.add_pass("Resubmission keeps id and created_at, updates contact details")
+        return True
+    except Exception as e:
+        results.add_fail("Resubmission - Exception", f"Error: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    test_parallel_lead_submissions()
+    test_resubmission_keeps_identity()
+    success = results.summary()
+    exit(0 if success else 1)
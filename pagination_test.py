@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+DigiHome Pagination Testing
+Checks the keyset cursor helpers in backend/pagination.py directly:
+cursor encode/decode round-trips, the tie-break filter and limit validation
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+
+from fastapi import HTTPException  # noqa: E402
+from pagination import SORT, after_cursor, decode_cursor, encode_cursor, keyset_page  # noqa: E402
+
+print("Testing DigiHome pagination helpers")
+print("=" * 70)
+
+class TestResults:
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_pass(self, test_name):
+        self.passed += 1
+        print(f"✅ PASS: {test_name}")
+
+    def add_fail(self, test_name, error):
+        self.failed += 1
+        self.errors.append(f"{test_name}: {error}")
+        print(f"❌ FAIL: {test_name} - {error}")
+
+    def summary(self):
+        print("\n" + "=" * 70)
+        print(f"PAGINATION TEST SUMMARY: {self.passed} passed, {self.failed} failed")
+        if self.errors:
+            print("\nFAILED TESTS:")
+            for error in self.errors:
+                print(f"  - {error}")
+        return self.failed == 0
+
+results = TestResults()
+
+# MongoDB stores datetimes with millisecond precision
+CREATED_AT = datetime(2024, 5, 17, 12, 30, 15, 123000)
+
+def naive(value):
+    return value.replace(tzinfo=None) if isinstance(value, datetime) else value
+
+def matches(row, query):
+    """Evaluate the subset of the query language produced by after_cursor"""
+    if "$or" in query:
+        return any(matches(row, clause) for clause in query["$or"])
+    for field, condition in query.items():
+        value = row[field]
+        if isinstance(condition, dict):
+            (operator, bound), = condition.items()
+            bound = naive(bound)
+            if operator == "$lt" and not value < bound:
+                return False
+            if operator == "$gt" and not value > bound:
+                return False
+        elif value != naive(condition):
+            return False
+    return True
+
+def sort_rows(rows, sort):
+    for field, direction in reversed(sort):
+        rows = sorted(rows, key=lambda row: row[field], reverse=direction < 0)
+    return rows
+
+def test_cursor_round_trip():
+    """Test: decode_cursor returns the sort key that encode_cursor was given"""
+    try:
+        row = {"created_at": CREATED_AT, "id": "3f0c6c1e-7d1e-4a55-9a55-1f0f3e2b8c11", "name": "Ola"}
+        cursor = encode_cursor(row)
+        if any(char in cursor for char in "+/="):
+            results.add_fail("Cursor round-trip", f"Cursor is not URL-safe: {cursor}")
+            return False
+        key = [naive(value) for value in decode_cursor(cursor)]
+        if key != [row["created_at"], row["id"]]:
+            results.add_fail("Cursor round-trip", f"Decoded {key}")
+            return False
+
+        name_sort = [("name", 1), ("id", 1)]
+        key = decode_cursor(encode_cursor(row, name_sort), name_sort)
+        if key != [row["name"], row["id"]]:
+            results.add_fail("Cursor round-trip (name sort)", f"Decoded {key}")
+            return False
+
+        results.add_pass("Cursor encode/decode round-trip")
+        return True
+    except Exception as e:
+        results.add_fail("Cursor round-trip - Exception", f"Error: {str(e)}")
+        return False
+
+def test_invalid_cursor():
+    """Test: malformed cursors and cursors for another sort are rejected with 400"""
+    try:
+        name_cursor = encode_cursor({"name": "Ola", "id": "x", "created_at": CREATED_AT}, [("name", 1)])
+        for cursor in ["not-a-cursor", "e30", name_cursor]:
+            try:
+                decode_cursor(cursor, SORT)
+            except HTTPException as e:
+                if e.status_code != 400:
+                    results.add_fail("Invalid cursor", f"{cursor}: status {e.status_code}")
+                    return False
+                continue
+            results.add_fail("Invalid cursor", f"{cursor} was accepted")
+            return False
+
+        results.add_pass("Invalid cursors rejected with 400")
+        return True
+    except Exception as e:
+        results.add_fail("Invalid cursor - Exception", f"Error: {str(e)}")
+        return False
+
+def test_tie_break_filter():
+    """Test: the $or filter continues after the cursor row when sort values tie"""
+    try:
+        row = {"created_at": CREATED_AT, "id": "b"}
+        query = after_cursor(encode_cursor(row))
+        clauses = [{field: naive(value) if not isinstance(value, dict) else
+                    {op: naive(bound) for op, bound in value.items()}
+                    for field, value in clause.items()} for clause in query["$or"]]
+        expected = [
+            {"created_at": {"$lt": CREATED_AT}},
+            {"created_at": CREATED_AT, "id": {"$lt": "b"}}
+        ]
+        if clauses != expected:
+            results.add_fail("Tie-break filter", f"Got {clauses}")
+            return False
+        results.add_pass("Tie-break $or filter shape")
+        return True
+    except Exception as e:
+        results.add_fail("Tie-break filter - Exception", f"Error: {str(e)}")
+        return False
+
+def test_walk_with_ties():
+    """Test: walking pages visits every row exactly once when many rows share a sort value"""
+    try:
+        rows = []
+        for i in range(50):
+            # Groups of 7 rows share created_at (and names repeat), so page boundaries fall inside ties
+            rows.append({
+                "created_at": CREATED_AT - timedelta(seconds=i // 7),
+                "id": f"{i * 37 % 50:03d}",
+                "name": f"Lead {i % 4}"
+            })
+
+        for sort in (SORT, [("name", 1), ("id", 1)], [("name", -1), ("id", -1)]):
+            expected = sort_rows(rows, sort)
+            seen = []
+            cursor = None
+            while True:
+                remaining = [row for row in expected if cursor is None or matches(row, after_cursor(cursor, sort))]
+                page = remaining[:6]
+                seen.extend(page)
+                if len(remaining) <= 6:
+                    break
+                cursor = encode_cursor(page[-1], sort)
+            if [row["id"] for row in seen] != [row["id"] for row in expected]:
+                results.add_fail("Walk with ties", f"Sort {sort}: rows skipped, repeated or out of order")
+                return False
+
+        results.add_pass("Keyset walk visits every row once despite ties")
+        return True
+    except Exception as e:
+        results.add_fail("Walk with ties - Exception", f"Error: {str(e)}")
+        return False
+
+def test_limit_validation():
+    """Test: keyset_page rejects a limit below 1 before querying"""
+    try:
+        try:
+            asyncio.run(keyset_page(None, {}, {"_id": 0}, 0))
+        except HTTPException as e:
+            if e.status_code == 400:
+                results.add_pass("limit=0 rejected with 400")
+                return True
+            results.add_fail("Limit validation", f"Status {e.status_code}")
+            return False
+        results.add_fail("Limit validation", "limit=0 was accepted")
+        return False
+    except Exception as e:
+        results.add_fail("Limit validation - Exception", f"Error: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    test_cursor_round_trip()
+    test_invalid_cursor()
+    test_tie_break_filter()
+    test_walk_with_ties()
+    test_limit_validation()
+    success = results.summary()
+    exit(0 if success else 1)